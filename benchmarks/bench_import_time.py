@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+## Benchmark - import time of words_n_fun.preprocessing.api (python -X importtime)
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Usage : python benchmarks/bench_import_time.py [--repeat 5] [--top 10]
+# Imports words_n_fun.preprocessing.api in fresh interpreters once pandas, numpy & tqdm are imported, and prints:
+# - the best cumulative import time of words_n_fun.preprocessing.api (about 0.05s, 0.2s when nltk, ftfy &
+#   tqdm.pandas were loaded at import)
+# - the slowest modules imported by it
+
+
+import os
+import sys
+import argparse
+import subprocess
+
+# Root of the repository (imported by the subprocesses)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_import_times() -> dict:
+    '''Cumulative import time (in seconds) of the modules imported by words_n_fun.preprocessing.api, in a fresh interpreter'''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+    code = "import numpy, pandas, tqdm; import words_n_fun.preprocessing.api"
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, env=env,
+                            cwd=ROOT_DIR, check=True).stderr
+    # Lines "import time: self [us] | cumulative | imported package", the modules imported by the package being
+    # listed after the one of tqdm (a module is listed after the modules it imports)
+    cumulative = {}
+    after_tqdm = False
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumul, package = line.split('|')
+            if after_tqdm and cumul.strip().isdigit():
+                cumulative[package.strip()] = int(cumul) / 1e6
+            after_tqdm = after_tqdm or package.strip() == 'tqdm'
+    return cumulative
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [get_import_times() for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times['words_n_fun.preprocessing.api'])
+    print(f"words_n_fun.preprocessing.api: {best['words_n_fun.preprocessing.api']:.3f}s (best of {args.repeat})")
+    print(f"{'module':<50}{'cumulative (s)':>16}")
+    for module, seconds in sorted(best.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{module:<50}{seconds:>16.3f}")
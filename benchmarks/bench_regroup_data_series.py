@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+## Benchmark - utils.regroup_data_series (factorize + take) vs the legacy merge based implementation
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# Usage : python benchmarks/bench_regroup_data_series.py [--nb_docs 100000] [--repeat 3]
+# For each ratio of unique documents, prints the time of:
+# - the raw function (no regroup)
+# - the legacy regroup (unique + merge + reindex)
+# - the current regroup (factorize + take)
+# The crossover point is the ratio from which regrouping is slower than calling the function directly.
+
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from words_n_fun import utils
+from words_n_fun.preprocessing import basic
+
+
+def legacy_regroup(function, docs: pd.Series) -> pd.Series:
+    '''Legacy implementation of utils.regroup_data_series (merge on the string column)'''
+    init_name = docs.name
+    init_index = docs.index
+    df = pd.DataFrame(docs)
+    df.columns = ["input_data"]
+    input_data = pd.Series(docs.unique()).dropna()
+    output_data = function(input_data)
+    docs_processed = pd.DataFrame({'input_data': input_data, 'output_data': output_data})
+    df = df.reset_index().merge(docs_processed, how='left', on='input_data').set_index('index')
+    return df["output_data"].rename(init_name).reindex(init_index)
+
+
+def factorize_regroup(function, docs: pd.Series) -> pd.Series:
+    '''Current implementation of utils.regroup_data_series (without the thresholds)'''
+    codes, unique_docs = utils.factorize_series(docs)
+    return utils.expand_series(function(unique_docs), codes, index=docs.index, name=docs.name)
+
+
+def get_docs(nb_docs: int, percent_unique: float) -> pd.Series:
+    '''Builds a pd.Series of documents with a given ratio of unique documents'''
+    nb_unique = max(1, int(nb_docs * percent_unique))
+    rng = np.random.default_rng(42)
+    words = np.array(['Chauffeur', 'accompagnateur', 'pers', 'à', 'mob', 'ans', 'de', 'expérience', 'Je', 'maîtrise',
+                      'langages', 'informatiques', 'Permis', 'Coordinateur', "d'Equipe", "d'Action", 'Territoriale'])
+    unique_docs = [' '.join(rng.choice(words, 12)) + f' {i}' for i in range(nb_unique)]
+    return pd.Series(rng.choice(np.array(unique_docs, dtype=object), nb_docs), dtype=object)
+
+
+def timeit(function, docs: pd.Series, repeat: int) -> float:
+    '''Best time of several runs'''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(docs)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nb_docs', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # A fast (to_lower) and a slow (remove_accents) transformation, without their own regroup wrapper
+    functions = {
+        'to_lower': lambda docs: docs.str.lower(),
+        'remove_accents': basic.impl_remove_accents.__wrapped__,
+    }
+    print(f"{'function':<16}{'% unique':>10}{'raw (s)':>10}{'legacy (s)':>12}{'factorize (s)':>15}")
+    for name, function in functions.items():
+        for percent_unique in [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0]:
+            docs = get_docs(args.nb_docs, percent_unique)
+            raw = timeit(function, docs, args.repeat)
+            legacy = timeit(lambda x: legacy_regroup(function, x), docs, args.repeat)
+            current = timeit(lambda x: factorize_regroup(function, x), docs, args.repeat)
+            print(f"{name:<16}{percent_unique:>10.2f}{raw:>10.3f}{legacy:>12.3f}{current:>15.3f}")
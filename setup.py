@@ -45,14 +45,14 @@ setup(
     platforms=['windows', 'linux'],
     python_requires='>=3.8',
     package_data={
-        'words_n_fun': ['configs/*.json', 'nltk_data/corpora/stopwords/french']
+        'words_n_fun': ['configs/*.json', 'configs/stopwords.bin', 'nltk_data/corpora/stopwords/french']
     },
     include_package_data=True,
     install_requires=[
         'pandas>=1.3,<1.5; python_version < "3.10"',
         'pandas>=1.3; python_version >= "3.10"',
-        'numpy>=1.19,<1.24; python_version < "3.10"',
-        'numpy>=1.19; python_version >= "3.10"',
+        'numpy>=1.20,<1.24; python_version < "3.10"',
+        'numpy>=1.20; python_version >= "3.10"',
         'nltk>=3.4',
         'ftfy>=5.8',
         'tqdm>=4.40',
@@ -60,7 +60,8 @@ setup(
         'requests>=2.23',
     ],
     extras_require={
-        "lemmatizer": ["spacy>=3.7.1", "markupsafe>=2.1.3", "Cython>=3.0.3"]
+        "lemmatizer": ["spacy>=3.7.1", "markupsafe>=2.1.3", "Cython>=3.0.3"],
+        "arrow": ["pyarrow>=7.0.0"]
     }
-    # pip install words_n_fun || pip install words_n_fun[lemmatizer]
+    # pip install words_n_fun || pip install words_n_fun[lemmatizer] || pip install words_n_fun[arrow]
 )
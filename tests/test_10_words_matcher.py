@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+## Test - unit test of words_matcher functions
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Libs unittest
+import unittest
+
+# Utils libs
+import os
+import re
+import numpy as np
+import pandas as pd
+from words_n_fun import utils
+from words_n_fun.preprocessing import words_matcher
+
+# Disable logging
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class WordsMatcherTests(unittest.TestCase):
+    '''Main class to test all functions in words_matcher.py.'''
+
+
+    def setUp(self):
+        '''SetUp fonction'''
+        # On se place dans le bon répertoire
+        # Change directory to script directory
+        abspath = os.path.abspath(__file__)
+        dname = os.path.dirname(abspath)
+        os.chdir(dname)
+
+
+    def test_remove_words(self):
+        '''Testing function words_matcher.WordsMatcher.remove_words'''
+        matcher = words_matcher.WordsMatcher(['le', 'de', "aujourd'hui", 'aujourd', 'c.', '(se)', '', 'le'])
+        self.assertEqual(matcher.nb_words, 6)
+
+        # Vérification du fonctionnement type
+        self.assertEqual(matcher.remove_words("le chat de la voisine"), " chat  la voisine")
+        self.assertEqual(matcher.remove_words("lent delà le"), "lent delà ")
+        # Phrases : the longest word is removed
+        self.assertEqual(matcher.remove_words("c'est aujourd'hui"), "c'est ")
+        self.assertEqual(matcher.remove_words("aujourd'huile aujourd"), "'huile ")
+        # Words beginning or ending with a boundary character
+        self.assertEqual(matcher.remove_words("c. chauffeur (se)"), " chauffeur ")
+        self.assertEqual(matcher.remove_words("c.le c. chauffeur(se)"), "c.  chauffeur(se)")
+        self.assertEqual(matcher.remove_words("le.le.de"), "..")
+        self.assertEqual(matcher.remove_words(""), "")
+
+        # Same results as the regex
+        words = ['le', 'de', "aujourd'hui", 'aujourd', 'c.', '(se)', 'hui', "j'ai", 'ai le']
+        regex = re.compile(utils.get_regex_match_words(words_matcher.sort_words(words)))
+        matcher = words_matcher.WordsMatcher(words)
+        for text in ["Je maîtrise 12 langages dont le C & j'ai le Permis B", "c.(se)le aujourd'hui.de", "ai le ai lele (se)(se) c.c.",
+                     "  de\tle\nde  ", "aujourd'hui'hui j'ai le", "..le..(se).."]:
+            self.assertEqual(matcher.remove_words(text), regex.sub('', text))
+
+
+    def test_transform(self):
+        '''Testing function words_matcher.WordsMatcher.transform'''
+        docs = pd.Series(["le chat de la voisine", 5, None, np.nan, ""], index=[3, 4, 5, 6, 7], name='docs')
+        result = words_matcher.WordsMatcher(['le', 'de']).transform(docs)
+
+        # Vérification du fonctionnement type
+        self.assertEqual(list(result.replace({np.nan: None})), [" chat  la voisine", None, None, None, ""])
+        self.assertEqual(list(result.index), [3, 4, 5, 6, 7])
+        self.assertEqual(result.name, 'docs')
+        pd.testing.assert_series_equal(result, docs.str.replace(utils.get_regex_match_words(['le', 'de']), '', regex=True).astype(object))
+
+
+    def test_regex_matcher(self):
+        '''Testing function words_matcher.RegexMatcher'''
+        docs = pd.Series(["Le chat de la voisine", 5, None, ""])
+        matcher = words_matcher.RegexMatcher(['le', 'de', 'de'])
+        self.assertEqual(matcher.nb_words, 2)
+
+        # Vérification du fonctionnement type
+        self.assertEqual(matcher.remove_words("le chat de la voisine"), " chat  la voisine")
+        self.assertEqual(list(matcher.transform(docs).replace({np.nan: None})), ["Le chat  la voisine", None, None, ""])
+        self.assertEqual(list(words_matcher.RegexMatcher(['le', 'de'], case_insensitive=True).transform(docs).replace({np.nan: None})),
+                         [" chat  la voisine", None, None, ""])
+
+
+    def test_matcher_registry(self):
+        '''Testing function words_matcher.MatcherRegistry'''
+        registry = words_matcher.MatcherRegistry(maxsize=2)
+
+        # Vérification du fonctionnement type
+        matcher = registry.get(['le', 'de'])
+        self.assertEqual(type(matcher), words_matcher.WordsMatcher)
+        self.assertEqual(registry.cache_info(), words_matcher.MatcherInfo(0, 1, 2, 1))
+        # Same set of words : same matcher
+        self.assertIs(registry.get(('de', 'le', 'le')), matcher)
+        self.assertIs(registry.get(frozenset(['le', 'de'])), matcher)
+        self.assertEqual(registry.cache_info(), words_matcher.MatcherInfo(2, 1, 2, 1))
+        # Other flags : other matchers
+        matcher_regex = registry.get(['le', 'de'], engine='regex')
+        self.assertEqual(type(matcher_regex), words_matcher.RegexMatcher)
+        self.assertEqual(type(registry.get(['le', 'de'], case_insensitive=True)), words_matcher.RegexMatcher)
+        self.assertEqual(type(registry.get(['le', 'de'], case_insensitive=True, engine='regex')), words_matcher.RegexMatcher)
+        self.assertEqual(registry.cache_info(), words_matcher.MatcherInfo(3, 3, 2, 2))
+        # LRU : the least recently used matchers have been dropped
+        self.assertIsNot(registry.get(['le', 'de']), matcher)
+        self.assertEqual(len(registry), 2)
+        registry.clear()
+        self.assertEqual(registry.cache_info(), words_matcher.MatcherInfo(0, 0, 2, 0))
+        # Default registry
+        self.assertIs(words_matcher.get_matcher(['le', 'de']), words_matcher.MATCHERS.get(['de', 'le']))
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            registry.get(['le'], engine='toto')
+        with self.assertRaises(ValueError):
+            words_matcher.MatcherRegistry(maxsize=0)
+
+
+    def test_sort_words(self):
+        '''Testing function words_matcher.sort_words'''
+        # Vérification du fonctionnement type
+        self.assertEqual(words_matcher.sort_words(['de', "aujourd'hui", 'le', 'aujourd', 'de']), ["aujourd'hui", 'aujourd', 'de', 'le'])
+        self.assertEqual(words_matcher.sort_words([]), [])
+
+
+# Execution des tests
+if __name__ == '__main__':
+    unittest.main()
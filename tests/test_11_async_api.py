@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+## Test - unit test of async_api functions
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Libs unittest
+import unittest
+
+# Utils libs
+import os
+import asyncio
+from words_n_fun.preprocessing import api
+from words_n_fun.preprocessing.async_api import AsyncPreProcessor
+
+# Disable logging
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class AsyncPreProcessorTests(unittest.TestCase):
+    '''Main class to test all functions in async_api.py.'''
+
+
+    def setUp(self):
+        '''SetUp fonction'''
+        # On se place dans le bon répertoire
+        # Change directory to script directory
+        abspath = os.path.abspath(__file__)
+        dname = os.path.dirname(abspath)
+        os.chdir(dname)
+
+
+    def test_transform(self):
+        '''Testing function async_api.AsyncPreProcessor.transform'''
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B",
+                "Coordinateur d'Equipe d'Action Territoriale ", 5, None, "Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", '']
+        expected = api.preprocess_pipeline(docs)
+
+        async def run(async_preprocessor, docs):
+            async with async_preprocessor:
+                return await asyncio.gather(*[async_preprocessor.transform(text) for text in docs])
+
+        # Vérification du fonctionnement type : concurrent calls are processed by a single batch
+        async_preprocessor = AsyncPreProcessor(max_wait=0.05)
+        self.assertEqual(asyncio.run(run(async_preprocessor, docs)), expected)
+        self.assertEqual((async_preprocessor.nb_batches, async_preprocessor.nb_docs), (1, 7))
+        # max_batch_size
+        async_preprocessor = AsyncPreProcessor(max_batch_size=3, max_wait=0.05)
+        self.assertEqual(asyncio.run(run(async_preprocessor, docs)), expected)
+        self.assertEqual((async_preprocessor.nb_batches, async_preprocessor.nb_docs), (3, 7))
+        # Successive calls
+        async def run_successive(async_preprocessor, docs):
+            async with async_preprocessor:
+                return [await async_preprocessor.transform(text) for text in docs]
+        async_preprocessor = AsyncPreProcessor(preprocessor=api.PreProcessor(pipeline=['to_lower', 'trim_string']), max_wait=0)
+        self.assertEqual(asyncio.run(run_successive(async_preprocessor, docs[:3])), api.preprocess_pipeline(docs[:3], pipeline=['to_lower', 'trim_string']))
+        self.assertEqual(async_preprocessor.nb_batches, 3)
+
+        # Gestion des erreurs
+        async_preprocessor = AsyncPreProcessor(preprocessor=api.PreProcessor(pipeline=[lambda x: x.str.upper() + 1]))
+        with self.assertRaises(TypeError):
+            asyncio.run(run(async_preprocessor, docs))
+        with self.assertRaises(ValueError):
+            AsyncPreProcessor(max_batch_size=0)
+        with self.assertRaises(ValueError):
+            AsyncPreProcessor(max_wait=-1)
+
+
+# Execution des tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+## Test - import time of the package (lazy dependencies, the timing is in benchmarks/bench_import_time.py)
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Libs unittest
+import unittest
+
+# Utils libs
+import os
+import sys
+import subprocess
+
+# Disable logging
+import logging
+logging.disable(logging.CRITICAL)
+
+# Root of the repository (imported by the subprocesses)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    '''Runs python code in a fresh interpreter (nothing imported yet)'''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                          cwd=ROOT_DIR, check=True)
+
+
+class ImportTimeTests(unittest.TestCase):
+    '''Main class to test the import time of the package.'''
+
+    def test_lazy_dependencies(self):
+        '''Testing that the heavy dependencies are only imported on use'''
+        code = ("import sys; import words_n_fun.preprocessing.api; "
+                "print(','.join(m for m in ('nltk', 'ftfy', 'spacy') if m in sys.modules))")
+        self.assertEqual(run_python(code).stdout.strip(), '')
+        # tqdm.pandas is not registered at import
+        code = "import pandas as pd; import words_n_fun.preprocessing.api; print(hasattr(pd.Series, 'progress_apply'))"
+        self.assertEqual(run_python(code).stdout.strip(), 'False')
+        # Loaded on use
+        code = ("import sys; import pandas as pd; from words_n_fun.preprocessing import basic, stopwords; "
+                "basic.stemmatize('chauffeur'); basic.fix_text('chauffeur'); basic.remove_accents(pd.Series(['é']), use_tqdm=True); "
+                "print(len(stopwords.STOPWORDS_OPTIONS['all']) > 0, 'nltk' in sys.modules, 'ftfy' in sys.modules, "
+                "hasattr(pd.Series, 'progress_apply'))")
+        self.assertEqual(run_python(code).stdout.strip(), 'True True True True')
+
+
+# Execution des tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+## Test - unit test of span_arrays functions
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Libs unittest
+import unittest
+
+# Utils libs
+import numpy as np
+import pandas as pd
+from words_n_fun import utils
+from words_n_fun.preprocessing.span_arrays import SpanArray, SpanArrayBuilder
+
+# Disable logging
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class SpanArraysTests(unittest.TestCase):
+    '''Main class to test all functions in span_arrays.py.'''
+
+    def setUp(self):
+        '''SetUp fonction'''
+        self.spans = SpanArray.from_rows([("Bonjour. Au revoir", [(0, 9), (9, 18)]), (None, []), ("", []), ("abc", [(1, 3)])])
+
+    def test_span_array(self):
+        '''Testing the class SpanArray'''
+        spans = self.spans
+        # Vérification du fonctionnement type
+        self.assertEqual(len(spans), 4)
+        self.assertEqual(spans.nb_spans, 3)
+        self.assertEqual(list(spans.offsets), [0, 2, 2, 2, 3])
+        self.assertEqual(spans.offsets.dtype, np.int64)
+        self.assertEqual(spans.nbytes, 8 * (5 + 3 + 3))
+        self.assertEqual(list(spans.lengths()), [2, 0, 0, 1])
+        self.assertEqual(list(spans.row_ids()), [0, 0, 3])
+        self.assertEqual(spans.get_substrings(), ["Bonjour. ", "Au revoir", "bc"])
+        self.assertEqual(spans[0], ["Bonjour. ", "Au revoir"])
+        self.assertEqual(spans[1], None)
+        self.assertEqual(spans[2], [])
+        self.assertEqual(spans[-1], ["bc"])
+        self.assertEqual(spans[-4], ["Bonjour. ", "Au revoir"])
+        self.assertEqual(list(spans), [["Bonjour. ", "Au revoir"], None, [], ["bc"]])
+        self.assertEqual(spans.to_series().tolist(), [["Bonjour. ", "Au revoir"], None, [], ["bc"]])
+        df = pd.DataFrame({'row_id': [0, 0, 3], 'start': [0, 9, 1], 'end': [9, 18, 3], 'text': ["Bonjour. ", "Au revoir", "bc"]})
+        pd.testing.assert_frame_equal(spans.to_frame(), df)
+        pd.testing.assert_frame_equal(spans.to_frame(with_text=False), df.drop(columns='text'))
+        # Empty
+        empty = SpanArray.from_rows([])
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.to_frame().shape, (0, 4))
+        # Builder
+        builder = SpanArrayBuilder()
+        builder.append("abc", [(0, 1)])
+        builder.append("de", iter([(0, 1), (1, 2)]))
+        self.assertEqual(list(builder.build()), [["a"], ["d", "e"]])
+
+        # Gestion des erreurs
+        with self.assertRaises(IndexError):
+            spans[4]
+        with self.assertRaises(IndexError):
+            spans[-5]
+        with self.assertRaises(ValueError):
+            SpanArray(["abc"], np.array([0, 1, 2]), np.array([0, 1]), np.array([1, 2]))
+        with self.assertRaises(ValueError):
+            SpanArray(["abc"], np.array([0, 2]), np.array([0]), np.array([1, 2]))
+        with self.assertRaises(ValueError):
+            SpanArray(["abc"], np.array([0, 1]), np.array([0, 1]), np.array([1, 2]))
+
+    @unittest.skipIf(not utils.PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_span_array_to_arrow(self):
+        '''Testing the function SpanArray.to_arrow'''
+        import pyarrow as pa
+        array = self.spans.to_arrow()
+        self.assertEqual(array.type, pa.list_(pa.string()))
+        self.assertEqual(array.to_pylist(), [["Bonjour. ", "Au revoir"], None, [], ["bc"]])
+        self.assertEqual(SpanArray.from_rows([]).to_arrow().to_pylist(), [])
+
+
+# Execution des tests
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+## Test - unit test of vocabulary functions
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Libs unittest
+import unittest
+
+# Utils libs
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from words_n_fun.preprocessing.vocabulary import Vocabulary
+
+# Disable logging
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class VocabularyTests(unittest.TestCase):
+    '''Main class to test all functions in vocabulary.py.'''
+
+    def setUp(self):
+        '''SetUp fonction'''
+        self.docs = ["test compte ok test", "la fonction compte les mots", None, "le test de la fonction"]
+
+    def test_fit(self):
+        '''Testing the functions Vocabulary.fit & Vocabulary.partial_fit'''
+        # Vérification du fonctionnement type
+        vocabulary = Vocabulary().fit(self.docs)
+        self.assertEqual(vocabulary.nb_docs, 4)
+        self.assertEqual(vocabulary.counts['test'], 3)
+        self.assertEqual(vocabulary.words, ['test', 'compte', 'fonction', 'la', 'de', 'le', 'les', 'mots', 'ok'])
+        self.assertEqual(len(vocabulary), 9)
+        self.assertEqual(vocabulary.unknown_id, 9)
+        self.assertIn('mots', vocabulary)
+        self.assertNotIn('Mots', vocabulary)
+        # Chunk by chunk: same counts
+        chunked = Vocabulary()
+        for chunk in [self.docs[:1], self.docs[1:3], self.docs[3:]]:
+            chunked.partial_fit(pd.Series(chunk, dtype=object))
+        self.assertEqual(chunked.counts, vocabulary.counts)
+        self.assertEqual(chunked.words, vocabulary.words)
+        self.assertEqual(chunked.nb_docs, 4)
+        # fit resets the counts
+        self.assertEqual(chunked.fit(["a b a"]).words, ['a', 'b'])
+        self.assertEqual(chunked.nb_docs, 1)
+        # Pruning
+        self.assertEqual(Vocabulary(min_count=2).fit(self.docs).words, ['test', 'compte', 'fonction', 'la'])
+        self.assertEqual(Vocabulary(max_size=2).fit(self.docs).words, ['test', 'compte'])
+        self.assertEqual(Vocabulary(min_count=4).fit(self.docs).words, [])
+        # to_frame
+        df = pd.DataFrame({'word': ['test', 'compte'], 'count': np.array([3, 2], dtype=np.int64)})
+        pd.testing.assert_frame_equal(Vocabulary(max_size=2).fit(self.docs).to_frame(), df)
+        df = pd.DataFrame({'word': ['compte', 'test'], 'count': np.array([2, 3], dtype=np.int64)})
+        pd.testing.assert_frame_equal(Vocabulary(max_size=2).fit(self.docs).to_frame(sort_by='word'), df)
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            Vocabulary(min_count=0)
+        with self.assertRaises(ValueError):
+            Vocabulary(max_size=0)
+        with self.assertRaises(ValueError):
+            vocabulary.to_frame(sort_by='id')
+
+    def test_encode(self):
+        '''Testing the functions Vocabulary.encode & Vocabulary.decode'''
+        vocabulary = Vocabulary(min_count=2).fit(self.docs)
+        # Vérification du fonctionnement type
+        ids, offsets = vocabulary.encode(pd.Series(["la fonction test", np.nan, "", "compte inconnu"]))
+        self.assertEqual(ids.dtype, np.int32)
+        self.assertEqual(offsets.dtype, np.int64)
+        self.assertEqual(ids.tolist(), [3, 2, 0, 1, 4])
+        self.assertEqual(offsets.tolist(), [0, 3, 3, 3, 5])
+        self.assertEqual(vocabulary.decode(ids), ['la', 'fonction', 'test', 'compte', None])
+        # No document
+        ids, offsets = vocabulary.encode([])
+        self.assertEqual(ids.tolist(), [])
+        self.assertEqual(offsets.tolist(), [0])
+        # The ids are updated after partial_fit
+        vocabulary.partial_fit(["inconnu inconnu inconnu inconnu"])
+        self.assertEqual(vocabulary.encode(["inconnu"])[0].tolist(), [0])
+
+    def test_save_load(self):
+        '''Testing the functions Vocabulary.save & Vocabulary.load'''
+        vocabulary = Vocabulary(min_count=2, max_size=3).fit(self.docs)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'vocabulary.json')
+            vocabulary.save(path)
+            # Vérification du fonctionnement type
+            loaded = Vocabulary.load(path)
+            self.assertEqual(loaded.counts, vocabulary.counts)
+            self.assertEqual(loaded.words, vocabulary.words)
+            self.assertEqual((loaded.min_count, loaded.max_size, loaded.nb_docs), (2, 3, 4))
+
+            # Gestion des erreurs
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 0}, f)
+            with self.assertRaises(ValueError):
+                Vocabulary.load(path)
+            with self.assertRaises(FileNotFoundError):
+                Vocabulary.load(os.path.join(tmp_dir, 'absent.json'))
+
+
+# Execution des tests
+if __name__ == '__main__':
+    unittest.main()
@@ -26,6 +26,7 @@ import ntpath
 # Utils libs
 import os
 import re
+import tempfile
 
 # Libs unittest
 import unittest
@@ -262,6 +263,155 @@ class UtilsTests(unittest.TestCase):
             utils.get_file_length("imaginary_file.txt")
 
 
+    def test_csv_index(self):
+        '''Testing functions utils.get_csv_index, utils.build_csv_index, utils.read_csv_rows & utils.estimate_file_length'''
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            test_file = os.path.join(tmp_dir, 'test.csv')
+            df = pd.DataFrame({'docs': [f'ligne {i}' if i % 7 else f'ligne\n"{i}", suite' for i in range(1000)], 'tags': range(1000)})
+            df.to_csv(test_file, index=False)
+            with open(test_file, 'a', encoding='utf-8') as f:
+                f.write('\n\n')
+
+            # Vérification du fonctionnement type
+            index = utils.build_csv_index(test_file, step=100)
+            self.assertEqual(index['nb_rows'], 1001)
+            self.assertEqual(len(index['offsets']), 11)
+            self.assertEqual(utils.get_file_length(test_file), 1001)
+            self.assertEqual(utils.estimate_file_length(test_file), 1001)
+            self.assertTrue(abs(utils.estimate_file_length(test_file, sample_size=2000) - 1001) < 200)
+            # Fichier sidecar
+            self.assertFalse(os.path.exists(test_file + utils.CSV_INDEX_SUFFIX))
+            self.assertEqual(utils.get_csv_index(test_file, step=100, save=True), index)
+            self.assertTrue(os.path.exists(test_file + utils.CSV_INDEX_SUFFIX))
+            with patch('words_n_fun.utils.build_csv_index') as mock_build:
+                self.assertEqual(utils.get_file_length(test_file), 1001)
+                mock_build.assert_not_called()
+            # Invalidation quand le fichier change
+            with open(test_file, 'a', encoding='utf-8') as f:
+                f.write('nouvelle ligne,1000\n')
+            self.assertEqual(utils.get_file_length(test_file), 1002)
+            # Lecture directe de lignes
+            for start_row in [1, 99, 100, 101, 350, 998]:
+                pd.testing.assert_frame_equal(utils.read_csv_rows(test_file, start_row, nrows=3, names=['docs', 'tags']),
+                                              df.iloc[start_row - 1: start_row + 2].reset_index(drop=True))
+            self.assertEqual(utils.read_csv_rows(test_file, 1001, names=['docs', 'tags']).values.tolist(), [['nouvelle ligne', 1000]])
+            self.assertEqual(utils.read_csv_rows(test_file, 5000, names=['docs', 'tags']).shape, (0, 2))
+
+            with self.assertRaises(ValueError):
+                utils.read_csv_rows(test_file, -1)
+            with self.assertRaises(ValueError):
+                utils.build_csv_index(test_file, step=0)
+            with self.assertRaises(FileNotFoundError):
+                utils.get_csv_index("imaginary_file.csv")
+            with self.assertRaises(FileNotFoundError):
+                utils.estimate_file_length("imaginary_file.csv")
+
+
+    def test_is_file_empty(self):
+        '''Testing function utils.is_file_empty'''
+        # Vérification du fonctionnement type
+        self.assertFalse(utils.is_file_empty("./testing_file.csv"))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            empty_file = os.path.join(tmp_dir, 'empty.csv')
+            with open(empty_file, 'w', encoding='utf-8') as f:
+                f.write('\n\n')
+            self.assertTrue(utils.is_file_empty(empty_file))
+
+        with self.assertRaises(FileNotFoundError):
+            utils.is_file_empty("imaginary_file.txt")
+
+
+    @unittest.skipIf(not utils.PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_columnar_files(self):
+        '''Testing the parquet & arrow functions of utils'''
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        df = pd.DataFrame({'docs': ['Bonjour', None, 'Salut', 'Été'] * 5, 'tags': list(range(20))})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parquet_file = os.path.join(tmp_dir, 'test.parquet')
+            pq.write_table(table, parquet_file, row_group_size=3)
+            arrow_file = os.path.join(tmp_dir, 'test.arrow')
+            with pa.ipc.new_file(arrow_file, table.schema) as writer:
+                writer.write_table(table, max_chunksize=3)
+
+            # Vérification du fonctionnement type
+            for filename, file_format in [(parquet_file, 'parquet'), (arrow_file, 'arrow')]:
+                self.assertEqual(utils.get_file_format(filename), file_format)
+                self.assertEqual(utils.get_docs_type(filename), 'file_path')
+                self.assertEqual(utils.get_file_length(filename), 20)
+                self.assertEqual(utils.get_docs_length(filename), 20)
+                self.assertEqual(utils.get_docs_length(filename, nrows=7), 7)
+                self.assertFalse(utils.is_file_empty(filename))
+                self.assertEqual(utils.get_columns_to_use(filename), ['docs', 'tags'])
+                self.assertEqual(utils.get_column_to_be_processed(filename, prefered_column='tags'), 'tags')
+                self.assertTrue(utils.get_new_csv_name(filename).endswith(f'.{file_format}'))
+                pd.testing.assert_frame_equal(utils.read_columnar_file(filename), df)
+                pd.testing.assert_frame_equal(utils.read_columnar_file(filename, columns_to_load=['tags']), df[['tags']])
+                # Chunks (with a continuous index)
+                chunks = list(utils.get_generator(filename, chunksize=7))
+                self.assertEqual([chunk.shape[0] for chunk in chunks], [7, 7, 6])
+                pd.testing.assert_frame_equal(pd.concat(chunks), df)
+                chunks = list(utils.get_df_generator_from_columnar(filename, chunksize=4, nrows=10, columns_to_load=['docs']))
+                self.assertEqual([chunk.shape[0] for chunk in chunks], [4, 4, 2])
+                pd.testing.assert_frame_equal(pd.concat(chunks), df[['docs']].iloc[:10])
+                tables = list(utils.get_df_generator_from_columnar(filename, chunksize=8, as_arrow=True))
+                self.assertEqual([t.num_rows for t in tables], [8, 8, 4])
+                # Writer
+                new_file = utils.get_new_csv_name(filename)
+                with utils.ColumnarFileWriter(new_file) as writer:
+                    for t in tables:
+                        writer.write(utils.set_arrow_column(t, 'new', t.column('tags').to_pandas() * 2))
+                    writer.write(pd.DataFrame({'docs': [None], 'tags': [20], 'new': [40]}))
+                result = utils.read_columnar_file(new_file)
+                self.assertEqual(list(result.columns), ['docs', 'tags', 'new'])
+                self.assertEqual(list(result['new']), list(range(0, 42, 2)))
+                # Data agnostic decorators
+                path = utils.data_agnostic(lambda docs: docs.str.lower())(filename)
+                self.assertTrue(path.endswith(f'.{file_format}'))
+                self.assertEqual(list(utils.read_columnar_file(path)['docs'].iloc[:4]), ['bonjour', None, 'salut', 'été'])
+                self.assertEqual(utils.data_agnostic_input(lambda docs: list(docs))(filename), list(df['docs']))
+
+            # Mixed types are converted to strings
+            self.assertEqual(utils.to_arrow_array(pd.Series(['a', 5, None])).to_pylist(), ['a', '5', None])
+            self.assertEqual(utils.to_arrow_table(df).num_rows, 20)
+
+            # Gestion des erreurs
+            with self.assertRaises(ValueError):
+                next(utils.get_df_generator_from_columnar(parquet_file, chunksize=-1))
+            with self.assertRaises(ValueError):
+                next(utils.get_df_generator_from_columnar(parquet_file, nrows=-1))
+            with self.assertRaises(FileNotFoundError):
+                next(utils.get_df_generator_from_columnar(os.path.join(tmp_dir, 'imaginary_file.parquet')))
+            with self.assertRaises(ValueError):
+                utils.ColumnarFileWriter(os.path.join(tmp_dir, 'test.csv'))
+
+
+    @unittest.skipIf(not utils.PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_as_string_dtype(self):
+        '''Testing functions utils.as_string_dtype & utils.is_arrow_string'''
+        docs = pd.Series(['a', 5, None, np.nan, 'b'], index=[2, 3, 4, 5, 6], name='docs')
+
+        # Vérification du fonctionnement type
+        docs_arrow = utils.as_string_dtype(docs, 'pyarrow')
+        self.assertTrue(utils.is_arrow_string(docs_arrow))
+        self.assertFalse(utils.is_arrow_string(docs))
+        self.assertEqual(list(docs_arrow.isna()), [False, True, True, True, False])
+        self.assertEqual((list(docs_arrow.index), docs_arrow.name), ([2, 3, 4, 5, 6], 'docs'))
+        self.assertIs(utils.as_string_dtype(docs_arrow, 'pyarrow'), docs_arrow)
+        docs_object = utils.as_string_dtype(docs_arrow, 'object')
+        self.assertEqual(docs_object.dtype, object)
+        self.assertEqual(list(docs_object), ['a', None, None, None, 'b'])
+        self.assertIs(utils.as_string_dtype(docs, 'object'), docs)
+        codes, uniques = utils.factorize_series(pd.Series(['a', None, 'a'], dtype='string[pyarrow]'))
+        self.assertTrue(utils.is_arrow_string(uniques))
+        self.assertEqual(list(codes), [0, 1, 0])
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            utils.as_string_dtype(docs, 'string')
+
+
     def test_get_new_csv_name(self):
         '''Testing function utils.get_new_csv_name'''
         input_file = "./testing_file.csv"
@@ -396,6 +546,20 @@ class UtilsTests(unittest.TestCase):
         result = pd.concat([_ for _ in generator_to_test])
         self.assertEqual(result.columns[0], '0')
 
+        # Vérification index continu entre les chunks (lecture en une seule passe)
+        generator_to_test = utils.get_df_generator_from_csv(input_file, first_row='header', sep=',', chunksize=2, nrows=5)
+        chunks = [_ for _ in generator_to_test]
+        self.assertEqual([list(chunk.index) for chunk in chunks], [[0, 1], [2, 3], [4]])
+        pd.testing.assert_frame_equal(pd.concat(chunks), pd.concat(expected_result[:5]))
+        # Champs sur plusieurs lignes
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            multiline_file = os.path.join(tmp_dir, 'multiline.csv')
+            with open(multiline_file, 'w', encoding='utf-8') as f:
+                f.write('docs,tags\n"ligne 1\nsuite",a\n\nligne 2,b\n"ligne, 3",c\n')
+            generator_to_test = utils.get_df_generator_from_csv(multiline_file, first_row='header', sep=',', chunksize=2)
+            result = pd.concat([_ for _ in generator_to_test])
+            pd.testing.assert_frame_equal(result, pd.DataFrame({'docs': ['ligne 1\nsuite', 'ligne 2', 'ligne, 3'], 'tags': ['a', 'b', 'c']}))
+
 
         # Autres tests (mélange certains arguments)
         #
@@ -525,6 +689,20 @@ class UtilsTests(unittest.TestCase):
         pd.testing.assert_series_equal(utils.regroup_data_series(test_function, min_nb_data=1)(data_no_duplicates), data_no_duplicates_results)
         # Vérification du foctionnement pas assez de doublons
         pd.testing.assert_series_equal(utils.regroup_data_series(test_function, min_nb_data=1, max_percent_unique=0.5)(data_not_enough_duplicates), data_not_enough_duplicates_results)
+        # Vérification fonctionnement valeurs nulles & index
+        def test_function_na(docs):
+            return docs.apply(lambda x: x.upper() if isinstance(x, str) else f'null {x}')
+        data_na = pd.Series(['avant', None, np.nan, 'avant', None, 5, 'après'] * 2000, index=range(3, 14003)[::-1], name='test')
+        pd.testing.assert_series_equal(utils.regroup_data_series(test_function_na)(data_na), test_function_na(data_na))
+        # Vérification désactivation du wrapper
+        def test_function_len(docs):
+            return pd.Series([len(docs)] * len(docs), index=docs.index)
+        self.assertEqual(utils.regroup_data_series(test_function_len)(data_na).iloc[0], 5)
+        with utils.regroup_disabled():
+            self.assertEqual(utils.regroup_data_series(test_function_len)(data_na).iloc[0], 14000)
+        self.assertEqual(utils.regroup_data_series(test_function_len)(data_na).iloc[0], 5)
+        data_empty = pd.Series([], dtype=object, name='test')
+        pd.testing.assert_series_equal(utils.regroup_data_series(test_function, min_nb_data=0)(data_empty), test_function(data_empty), check_dtype=False)
 
 
 
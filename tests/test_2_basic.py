@@ -34,6 +34,7 @@ import pandas as pd
 from words_n_fun import utils
 from words_n_fun.preprocessing import basic
 from words_n_fun.preprocessing import stopwords
+from words_n_fun.preprocessing import words_matcher
 
 # Disable logging
 import logging
@@ -244,6 +245,25 @@ class BasicTests(unittest.TestCase):
 
         # Vérification du fonctionnement type
         self.assertEqual(list(basic.stemmatize(pd.Series(docs)).replace({np.nan: None})), docs_stemmatized)
+        self.assertEqual(list(basic.impl_stemmatize(pd.Series(docs), use_tqdm=True).replace({np.nan: None})), docs_stemmatized)
+        self.assertEqual([basic.doc_stemmatize(text) for text in docs], docs_stemmatized)
+        # Index & name are kept
+        result = basic.stemmatize(pd.Series(docs * 3, index=range(20, 35), name='docs'))
+        self.assertEqual(list(result.index), list(range(20, 35)))
+        self.assertEqual(result.name, 'docs')
+        self.assertEqual(list(result.replace({np.nan: None})), docs_stemmatized * 3)
+        self.assertEqual(list(basic.stemmatize(pd.Series([], dtype=object))), [])
+        self.assertEqual(list(basic.stemmatize(pd.Series([None, 5]))), [None, None])
+
+
+    def test_stem_token(self):
+        '''Testing function basic.stem_token'''
+        # Vérification du fonctionnement type
+        self.assertEqual(basic.stem_token('langages'), 'langag')
+        self.assertEqual(basic.stem_token(''), '')
+        hits = basic.stem_token.cache_info().hits
+        self.assertEqual(basic.stem_token('langages'), 'langag')
+        self.assertEqual(basic.stem_token.cache_info().hits, hits + 1)
 
 
 
@@ -295,7 +315,41 @@ class BasicTests(unittest.TestCase):
         # Vérification du fonctionnement type
         self.assertEqual(list(basic.remove_words(pd.Series(docs), words_to_remove).replace({np.nan: None})), docs_processed)
         self.assertEqual(list(basic.remove_words(pd.Series(docs), words_to_remove, case_insensitive=True).replace({np.nan: None})), docs_processed_case)
-
+        # Engine regex : same results
+        self.assertEqual(list(basic.remove_words(pd.Series(docs), words_to_remove, engine='regex').replace({np.nan: None})), docs_processed)
+        self.assertEqual(list(basic.remove_words(pd.Series(docs), words_to_remove, case_insensitive=True, engine='regex').replace({np.nan: None})), docs_processed_case)
+
+        # Pre-built matcher
+        matcher = words_matcher.get_matcher(words_to_remove)
+        self.assertEqual(list(basic.remove_words(pd.Series(docs), matcher=matcher).replace({np.nan: None})), docs_processed)
+        self.assertEqual(basic.remove_words(docs[2], matcher=matcher), docs_processed[2])
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            basic.remove_words(pd.Series(docs), words_to_remove, engine='toto')
+        with self.assertRaises(ValueError):
+            basic.remove_words(pd.Series(docs))
+
+
+
+    @unittest.skipIf(not utils.PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_arrow_kernels(self):
+        '''Testing the Arrow kernels of basic.py (Arrow-backed strings)'''
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B",
+                "  Ceci est\tun\u00a0test\u2028avec\x0b\x0b des espaces_ et ² ٣ ⅷ \u0301 \U0001F600 ", "Ceci est encore un\tautre test.\n", "", None]
+        docs_object = pd.Series(docs, dtype=object)
+        docs_arrow = pd.Series(docs, dtype='string[pyarrow]')
+        for function, kwargs in [(basic.get_true_spaces, {}), (basic.to_lower, {}), (basic.to_lower, {'threshold_nb_chars': 2}),
+                                 (basic.remove_punct, {}), (basic.remove_punct, {'del_parenthesis': False, 'replacement_char': '#'}),
+                                 (basic.trim_string, {}), (basic.remove_leading_and_ending_spaces, {}),
+                                 (basic.remove_numeric, {}), (basic.remove_numeric, {'replacement_char': '\\1'})]:
+            # Vérification du fonctionnement type : same results as with Python objects, Arrow-backed strings are kept
+            result = function(docs_arrow, **kwargs)
+            self.assertTrue(utils.is_arrow_string(result))
+            self.assertEqual(list(result.to_numpy(dtype=object, na_value=None)), list(function(docs_object, **kwargs).replace({np.nan: None})))
+        # Fall back for the characters lowered differently by Arrow
+        docs_arrow = pd.Series(["İSTANBUL", "ΣΑΣ", None], dtype='string[pyarrow]')
+        self.assertEqual(list(basic.to_lower(docs_arrow).to_numpy(dtype=object, na_value=None)), ["i̇stanbul", "σας", None])
 
 
     def test_fix_text(self):
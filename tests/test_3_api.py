@@ -24,8 +24,10 @@ from unittest.mock import patch
 
 # Utils libs
 import os
+import tempfile
 import functools
 import importlib
+import numpy as np
 import pandas as pd
 from words_n_fun import utils
 from words_n_fun.preprocessing import api
@@ -179,6 +181,66 @@ class ApiTests(unittest.TestCase):
             os.remove(f)
 
 
+    @unittest.skipIf(not utils.PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_preprocess_pipeline_columnar(self):
+        '''Testing function api.preprocess_pipeline on parquet & arrow files'''
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", None,
+                "Coordinateur d'Equipe d'Action Territoriale ", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B"] * 5
+        df = pd.DataFrame({'docs': docs, 'tags': list(range(20))})
+        expected = api.preprocess_pipeline(df['docs']).replace({np.nan: None})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parquet_file = os.path.join(tmp_dir, 'test.parquet')
+            pq.write_table(table, parquet_file, row_group_size=3)
+            arrow_file = os.path.join(tmp_dir, 'test.arrow')
+            with pa.ipc.new_file(arrow_file, table.schema) as writer:
+                writer.write_table(table, max_chunksize=3)
+
+            # Vérification du fonctionnement type
+            for filename, extension in [(parquet_file, '.parquet'), (arrow_file, '.arrow')]:
+                for kwargs in [{}, {'chunksize': 7}, {'chunksize': 6, 'n_jobs': 2}]:
+                    output_file = api.preprocess_pipeline(filename, **kwargs)
+                    self.assertTrue(output_file.endswith(extension))
+                    result = utils.read_columnar_file(output_file)
+                    self.assertEqual(list(result.columns), ['docs', 'tags'])
+                    self.assertEqual(list(result['docs']), list(expected))
+                    self.assertEqual(list(result['tags']), list(range(20)))
+                # modify_data & nrows
+                result = utils.read_columnar_file(api.preprocess_pipeline(filename, modify_data=False, nrows=9, chunksize=4))
+                self.assertEqual(list(result.columns), ['docs', 'tags', 'docs_processed'])
+                self.assertEqual(list(result['docs']), docs[:9])
+                self.assertEqual(list(result['docs_processed']), list(expected[:9]))
+
+
+    @unittest.skipIf(not utils.PYARROW_AVAILABLE, "pyarrow is not installed")
+    def test_preprocess_pipeline_string_dtype(self):
+        '''Testing the string_dtype option of api.preprocess_pipeline'''
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B",
+                "Coordinateur d'Equipe d'Action Territoriale ", None, "İSTANBUL ΣΑΣ"] * 300
+        pipeline = ['get_true_spaces', 'to_lower', 'remove_stopwords', 'remove_numeric', 'remove_punct', 'trim_string', 'remove_accents']
+        expected = api.preprocess_pipeline(pd.Series(docs), pipeline=pipeline)
+        docs_arrow = pd.Series(docs, dtype='string[pyarrow]')
+
+        # Vérification du fonctionnement type
+        for kwargs in [{}, {'chunksize': 400}, {'compiled': True}]:
+            result = api.preprocess_pipeline(pd.Series(docs), pipeline=pipeline, string_dtype='pyarrow', **kwargs)
+            self.assertTrue(utils.is_arrow_string(result))
+            self.assertEqual(list(result.to_numpy(dtype=object, na_value=None)), list(expected))
+            # The dtype of Arrow-backed strings is kept
+            self.assertTrue(utils.is_arrow_string(api.preprocess_pipeline(docs_arrow, pipeline=pipeline, **kwargs)))
+        result = api.preprocess_pipeline(docs_arrow, pipeline=pipeline, string_dtype='object')
+        self.assertEqual(result.dtype, object)
+        self.assertEqual(list(result), list(expected))
+        df = api.preprocess_pipeline(pd.DataFrame({'docs': docs}), pipeline=pipeline, string_dtype='pyarrow')
+        self.assertTrue(utils.is_arrow_string(df['docs']))
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            api.preprocess_pipeline(docs, string_dtype='string')
+
+
     def test_PreProcessor(self):
         '''Test de la classe api.PreProcessor'''
         docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B", "Coordinateur d'Equipe d'Action Territoriale ", 5, None]
@@ -250,6 +312,18 @@ class ApiTests(unittest.TestCase):
         pd.testing.assert_frame_equal(pd.read_csv(api.PreProcessor(nrows=2).transform(test_file)), result_file_nrows)
         pd.testing.assert_frame_equal(pd.read_csv(api.PreProcessor(nrows=2, first_row='data').transform(test_file)), result_file_nrows_data)
         pd.testing.assert_frame_equal(pd.read_csv(api.PreProcessor(nrows=2, first_row='skip').transform(test_file)), result_file_nrows_skip)
+        # Verification fonctionnement n_jobs
+        self.assertEqual(api.PreProcessor(n_jobs=2).transform(docs), docs_def_pipeline)
+        self.assertEqual(api.PreProcessor(n_jobs=2, chunksize=1).transform(np.array(docs, dtype=object)).tolist(), docs_def_pipeline)
+        pd.testing.assert_series_equal(api.PreProcessor(n_jobs=2, chunksize=2).transform(pd.Series(docs, index=range(5, 10))),
+                                       api.PreProcessor().transform(pd.Series(docs, index=range(5, 10))))
+        pd.testing.assert_frame_equal(api.PreProcessor(n_jobs=2, chunksize=1).transform(pd.DataFrame({'docs': docs, 'tags': range(5)})),
+                                      api.PreProcessor().transform(pd.DataFrame({'docs': docs, 'tags': range(5)})))
+        self.assertEqual(api.PreProcessor(n_jobs=-1).transform(docs[0]), docs_def_pipeline[0])
+        pd.testing.assert_frame_equal(pd.read_csv(api.PreProcessor(n_jobs=2, chunksize=1).transform(test_file)), result_file)
+        pd.testing.assert_frame_equal(pd.read_csv(api.PreProcessor(n_jobs=2, compiled=True).transform(test_file)), result_file)
+        # Non picklable pipelines are processed in a single process
+        self.assertEqual(api.PreProcessor(pipeline=['to_lower', lambda x: x.str.upper()], n_jobs=2).transform(['a', 'b']), ['A', 'B'])
 
         with self.assertRaises(ValueError):
             api.PreProcessor(chunksize=-3).transform(docs)
@@ -257,6 +331,10 @@ class ApiTests(unittest.TestCase):
             api.PreProcessor(first_row='bad_value').transform(docs)
         with self.assertRaises(ValueError):
             api.PreProcessor(nrows=-3).transform(docs)
+        with self.assertRaises(ValueError):
+            api.PreProcessor(n_jobs=0).transform(docs)
+        with self.assertRaises(ValueError):
+            api.PreProcessor(n_jobs=-2).transform(docs)
 
         # Nettoyage fichiers
         dir = os.path.abspath(os.getcwd())
@@ -337,6 +415,80 @@ class ApiTests(unittest.TestCase):
             result = api.process_block_of_data(docs, ['to_lower', 'trim_string'], -1)
             pd.testing.assert_series_equal(result, expected)
 
+            # Data regrouped once for the whole pipeline
+            seen_docs = []
+            def record_docs(docs):
+                seen_docs.append(len(docs))
+                return docs
+            docs = pd.Series(["Ceci est un TEST", "ceci est un test", " Ceci est un test ", None, np.nan, 5, "Un autre test"] * 300,
+                             index=range(2100, 0, -1), name='docs')
+            pipeline = ['to_lower', record_docs, 'remove_leading_and_ending_spaces', record_docs, 'remove_accents', 'stemmatize']
+            expected = api.process_block_of_data(docs, pipeline, -1, min_nb_data=100000)
+            seen_docs.clear()
+            result = api.process_block_of_data(docs, pipeline, -1)
+            pd.testing.assert_series_equal(result, expected)
+            self.assertEqual(seen_docs, [5, 4])
+            # Not enough duplicates
+            seen_docs = []
+            result = api.process_block_of_data(docs, pipeline, -1, max_percent_unique=0.001)
+            pd.testing.assert_series_equal(result, expected)
+            self.assertEqual(seen_docs, [2100, 2100])
+
+    def test_compile_pipeline(self):
+        '''Testing function api.compile_pipeline'''
+        docs = ["Chauffeur(se) accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B",
+                "Coordinateur d'Equipe d'Action Territoriale ", "  CHAUFFEUR/ CHAUFFEUSE\t poids lourds  ", "https://www.pole-emploi.fr est un site",
+                "Chauffeur(se) accompagnateur(trice) pers à mob - 5 ans de expérience.", 5, None, np.nan, '']
+
+        # Vérification du fonctionnement type
+        pipeline = [item for item in api.DEFAULT_PIPELINE]
+        result = api.compile_pipeline(pipeline)(pd.Series(docs))
+        expected = api.process_block_of_data(pd.Series(docs), pipeline, -1)
+        self.assertEqual(list(result.replace({np.nan: None})), list(expected.replace({np.nan: None})))
+        self.assertEqual(api.preprocess_pipeline(docs, pipeline=pipeline, compiled=True),
+                         api.preprocess_pipeline(docs, pipeline=pipeline))
+
+        # Each transformation must give the same result as the non compiled version
+        for item in api.USAGE.keys():
+            if item == 'lemmatize':
+                continue
+            result = api.compile_pipeline([item])(pd.Series(docs))
+            expected = api.process_block_of_data(pd.Series(docs), [item], -1)
+            self.assertEqual(list(result.replace({np.nan: None})), list(expected.replace({np.nan: None})), item)
+
+        # Mix of fused steps, batch steps & callables
+        pipeline = ['notnull', 'to_lower', 'remove_gender_synonyms', lambda x: x.str.upper(), 'remove_punct', 'trim_string']
+        result = api.compile_pipeline(pipeline)(pd.Series(docs, index=range(10, 20)))
+        expected = api.process_block_of_data(pd.Series(docs, index=range(10, 20)), pipeline, -1)
+        pd.testing.assert_series_equal(result, expected, check_dtype=False)
+
+        # Manage PreProcessor
+        preprocessor = api.get_preprocessor(pipeline=['to_lower', 'trim_string'], compiled=True, chunksize=3)
+        self.assertEqual(preprocessor.transform(docs[:5]), api.preprocess_pipeline(docs[:5], pipeline=['to_lower', 'trim_string']))
+
+
+    def test_transform_one(self):
+        '''Testing function api.PreProcessor.transform_one'''
+        docs = ["Chauffeur(se) accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B",
+                "Coordinateur d'Equipe d'Action Territoriale ", "  CHAUFFEUR/ CHAUFFEUSE\t poids lourds  ", "https://www.pole-emploi.fr est un site",
+                "serveur/serveur(se), agriculteur (trice) blabla ouvrier/ ouvrière blabla aide apprenti boucher /aide apprentie bouchere", '']
+
+        # Vérification du fonctionnement type
+        preprocessor = api.PreProcessor()
+        self.assertEqual([preprocessor.transform_one(text) for text in docs], api.preprocess_pipeline(docs))
+        self.assertEqual(preprocessor.transform_one(None), '')
+        # Each transformation must give the same result as transform
+        for item in api.USAGE.keys():
+            if item == 'lemmatize':
+                continue
+            preprocessor = api.PreProcessor(pipeline=[item])
+            self.assertEqual([preprocessor.transform_one(text) for text in docs], api.preprocess_pipeline(docs, pipeline=[item]), item)
+        # Callables & pipeline update
+        preprocessor = api.PreProcessor(pipeline=['to_lower', lambda x: x.str.replace('chauffeur', 'conducteur'), 'trim_string'])
+        self.assertEqual(preprocessor.transform_one("  CHAUFFEUR  poids lourds "), "conducteur poids lourds")
+        preprocessor.pipeline = ['trim_string']
+        self.assertEqual(preprocessor.transform_one("  CHAUFFEUR  poids lourds "), "CHAUFFEUR poids lourds")
+
 
 
 
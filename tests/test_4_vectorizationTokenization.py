@@ -66,6 +66,19 @@ class VectorizationTokenizationTests(unittest.TestCase):
         self.assertEqual(list(sequences.replace({np.nan:None})), char_sequences)
         self.assertEqual(list(next_items.replace({np.nan:None})), char_next_items)
 
+        # output_format spans (a sequence of words is the span from its first to its last word)
+        sequences, next_items = vectorization_tokenization.split_text_into_tokens(pd.Series(docs), nbech=3, seq_size=3, step=2, granularity="word", output_format='spans')
+        self.assertEqual([None if row is None else [sequence.split() for sequence in row] for row in sequences], words_sequences)
+        self.assertEqual(list(next_items), words_next_items)
+        self.assertEqual(sequences[0][0], 'Chauffeur(se)  accompagnateur(trice) pers')
+        self.assertEqual(list(sequences.lengths()), [3, 3, 1, 0, 0])
+        sequences, next_items = vectorization_tokenization.split_text_into_tokens(pd.Series(docs), nbech=4, seq_size=2, step=2, granularity="char", output_format='spans')
+        self.assertEqual(list(sequences), char_sequences)
+        self.assertEqual(list(next_items), char_next_items)
+        self.assertEqual(list(next_items.starts[:4]), [2, 4, 6, 8])
+
+        with self.assertRaises(ValueError):
+            vectorization_tokenization.split_text_into_tokens(pd.Series(docs), output_format='test')
         with self.assertRaises(ValueError):
             vectorization_tokenization.split_text_into_tokens(pd.Series(docs), nbech=-1)
         with self.assertRaises(ValueError):
@@ -75,6 +88,53 @@ class VectorizationTokenizationTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             vectorization_tokenization.split_text_into_tokens(pd.Series(docs), granularity='test')
 
+    def test_split_text_into_token_ids(self):
+        '''Testing function vectorization_tokenization.split_text_into_token_ids'''
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B", "Coordinateur d'Equipe d'Action Territoriale ", 5, None]
+        # Same sequences as split_text_into_tokens (without its extra last window)
+        words_sequences = [[['Chauffeur(se)', 'accompagnateur(trice)', 'pers'], ['pers', 'à', 'mob'], ['mob', '-', '5']],
+                            [['Je', 'maîtrise', '12'], ['12', 'langages', 'informatiques'], ['informatiques', 'dont', 'le']],
+                            [['Coordinateur', "d'Equipe", "d'Action"]],
+                            [],
+                            []]
+        words_next_items = [['à', '-', 'ans'], ['langages', 'dont', 'C'], ['Territoriale'], [], []]
+        char_sequences = [['Ch', 'au', 'ff', 'eu'], ['Je', ' m', 'aî', 'tr'], ['Co', 'or', 'di', 'na'], [], []]
+        char_next_items = [['a', 'f', 'e', 'r'], [' ', 'a', 't', 'i'], ['o', 'd', 'n', 't'], [], []]
+
+        # Vérification du fonctionnement type
+        sequences, next_items, offsets, vocabulary = vectorization_tokenization.split_text_into_token_ids(pd.Series(docs), nbech=3, seq_size=3, step=2, granularity="word")
+        self.assertEqual(sequences.dtype, np.int32)
+        self.assertEqual(sequences.shape, (7, 3))
+        self.assertEqual(list(offsets), [0, 3, 6, 7, 7, 7])
+        self.assertEqual(vocabulary[:3], ['Chauffeur(se)', 'accompagnateur(trice)', 'pers'])
+        self.assertEqual([[[vocabulary[i] for i in sequences[k]] for k in range(offsets[d], offsets[d + 1])] for d in range(len(docs))], words_sequences)
+        self.assertEqual([[vocabulary[next_items[k]] for k in range(offsets[d], offsets[d + 1])] for d in range(len(docs))], words_next_items)
+        sequences, next_items, offsets, vocabulary = vectorization_tokenization.split_text_into_token_ids(pd.Series(docs), nbech=4, seq_size=2, step=2, granularity="char")
+        self.assertEqual([[''.join(vocabulary[i] for i in sequences[k]) for k in range(offsets[d], offsets[d + 1])] for d in range(len(docs))], char_sequences)
+        self.assertEqual([[vocabulary[next_items[k]] for k in range(offsets[d], offsets[d + 1])] for d in range(len(docs))], char_next_items)
+        # "." excluded
+        sequences, next_items, offsets, vocabulary = vectorization_tokenization.split_text_into_token_ids(pd.Series(["a.bcd.ef"]), seq_size=2, granularity="char")
+        self.assertEqual([''.join(vocabulary[i] for i in sequence) for sequence in sequences], ['bc', 'cd'])
+        # Vocabulary of a previous chunk
+        sequences, next_items, offsets, vocabulary = vectorization_tokenization.split_text_into_token_ids(pd.Series(["b a c d"]), seq_size=2, vocabulary=['a', 'b'])
+        self.assertEqual(vocabulary, ['a', 'b', 'c', 'd'])
+        self.assertEqual(sequences.tolist(), [[1, 0], [0, 2]])
+        self.assertEqual(next_items.tolist(), [2, 3])
+        # Empty
+        sequences, next_items, offsets, vocabulary = vectorization_tokenization.split_text_into_token_ids(pd.Series([], dtype=object))
+        self.assertEqual(sequences.shape, (0, 3))
+        self.assertEqual(list(offsets), [0])
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            vectorization_tokenization.split_text_into_token_ids(pd.Series(docs), nbech=-1)
+        with self.assertRaises(ValueError):
+            vectorization_tokenization.split_text_into_token_ids(pd.Series(docs), seq_size=-1)
+        with self.assertRaises(ValueError):
+            vectorization_tokenization.split_text_into_token_ids(pd.Series(docs), step=-1)
+        with self.assertRaises(ValueError):
+            vectorization_tokenization.split_text_into_token_ids(pd.Series(docs), granularity='test')
+
 
 # Execution des tests
 if __name__ == '__main__':
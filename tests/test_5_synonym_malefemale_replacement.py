@@ -23,6 +23,7 @@ import unittest
 
 # Utils libs
 import os
+import tempfile
 import numpy as np
 import pandas as pd
 from words_n_fun.preprocessing import synonym_malefemale_replacement
@@ -52,6 +53,77 @@ class SynonymTests(unittest.TestCase):
 
         # Vérification du fonctionnement type
         self.assertEqual(list(synonym_malefemale_replacement.remove_gender_synonyms(pd.Series(docs)).replace({np.nan:None})), docs_gender_syn_removed)
+        # Index & name are kept, the documents without "/" nor parenthesis are unchanged
+        series = pd.Series(["vendeur / vendeuse", "vendeur  en boulangerie ", "vendeur ( se)"], index=[3, 1, 7], name='titre')
+        result = synonym_malefemale_replacement.remove_gender_synonyms(series)
+        pd.testing.assert_series_equal(result, pd.Series(["vendeur", "vendeur  en boulangerie ", "vendeur "], index=[3, 1, 7], name='titre', dtype=object))
+        # Missing values are kept as is, the other values that are not str become NaN (as with the .str accessor)
+        result = synonym_malefemale_replacement.remove_gender_synonyms(pd.Series(["serveur/serveuse", None, np.nan, 5], dtype=object))
+        self.assertEqual(result[0], "serveur")
+        self.assertIsNone(result[1])
+        self.assertTrue(np.isnan(result[2]))
+        self.assertTrue(np.isnan(result[3]))
+
+
+    def test_doc_remove_gender_synonyms(self):
+        '''Testing function synonym_malefemale_replacement.doc_remove_gender_synonyms'''
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B", "Coordinateur d'Equipe d'Action Territoriale ", 5, None, "serveur/serveur(se), agriculteur (trice) blabla ouvrier/ ouvrière blabla aide apprenti boucher /aide apprentie bouchere"]
+        docs_gender_syn_removed = ['Chauffeur   accompagnateur  pers à mob - 5 ans de expérience.', "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B", "Coordinateur d'Equipe d'Action Territoriale ", None, None, 'serveur , agriculteur  blabla ouvrier blabla aide apprenti boucher']
+
+        # Vérification du fonctionnement type
+        self.assertEqual(list(pd.Series([synonym_malefemale_replacement.doc_remove_gender_synonyms(text) for text in docs], dtype=object).replace({np.nan: None})), docs_gender_syn_removed)
+
+
+    def test_gender_synonym_index(self):
+        '''Testing class synonym_malefemale_replacement.GenderSynonymIndex'''
+        docs = ["Chauffeur(se)  accompagnateur(trice)", None, "serveur/serveur(se), ouvrier/ ouvrière", "vendeur", "Chauffeur(se) / ouvrier/ouvrière"]
+
+        # Vérification du fonctionnement type
+        index = synonym_malefemale_replacement.GenderSynonymIndex().fit(docs)
+        self.assertEqual(index.nb_docs, 5)
+        self.assertEqual(index.synonyms, {('Chauffeur', 'se'): 0, ('accompagnateur', 'trice'): 0, ('serveur', 'se'): 2,
+                                          ('ouvrier', 'ouvrière'): 2, ('serveur', 'serveur'): 2})
+        self.assertIn(('serveur', 'se'), index)
+        self.assertEqual(len(index), 5)
+        # Chunk by chunk : same index
+        chunked_index = synonym_malefemale_replacement.GenderSynonymIndex()
+        for i in range(0, len(docs), 2):
+            chunked_index.partial_fit(docs[i:i + 2])
+        self.assertEqual(chunked_index.synonyms, index.synonyms)
+        self.assertEqual(chunked_index.nb_docs, index.nb_docs)
+        # Same results with or without index for the documents of the corpus
+        expected = synonym_malefemale_replacement.remove_gender_synonyms(pd.Series(docs))
+        pd.testing.assert_series_equal(index.transform(pd.Series(docs)), expected)
+        pd.testing.assert_series_equal(synonym_malefemale_replacement.remove_gender_synonyms(pd.Series(docs), index=index), expected)
+        self.assertTrue(index.is_fitted)
+        self.assertTrue(index.is_synonym('serveur', 'se'))
+        self.assertFalse(index.is_synonym('serveur', 'boucher'))
+        # The fitted index is the authority: the pairs it does not contain are kept
+        self.assertFalse(index.is_synonym('vendeur', 'vendeuse'))
+        self.assertEqual(synonym_malefemale_replacement.doc_remove_gender_synonyms("vendeur/vendeuse", index=index), "vendeur/vendeuse")
+        index.synonyms[('vendeur', 'vendeuse')] = 5
+        self.assertEqual(synonym_malefemale_replacement.doc_remove_gender_synonyms("vendeur/vendeuse", index=index), "vendeur")
+        del index.synonyms[('vendeur', 'vendeuse')]
+        # An index not fitted yet falls back on the rules of matching_words
+        empty_index = synonym_malefemale_replacement.GenderSynonymIndex()
+        self.assertFalse(empty_index.is_fitted)
+        self.assertEqual(synonym_malefemale_replacement.doc_remove_gender_synonyms("vendeur/vendeuse", index=empty_index), "vendeur")
+        # Save & load
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'index.json')
+            index.save(path)
+            loaded_index = synonym_malefemale_replacement.GenderSynonymIndex.load(path)
+            self.assertEqual(loaded_index.synonyms, index.synonyms)
+            self.assertEqual(loaded_index.nb_docs, 5)
+            self.assertTrue(loaded_index.is_fitted)
+
+            # Gestion des erreurs
+            with open(path, 'w') as f:
+                f.write('{"version": 0}')
+            with self.assertRaises(ValueError):
+                synonym_malefemale_replacement.GenderSynonymIndex.load(path)
+            with self.assertRaises(FileNotFoundError):
+                synonym_malefemale_replacement.GenderSynonymIndex.load(os.path.join(tmp_dir, 'missing.json'))
 
 
     def test_matching_words(self):
@@ -62,6 +134,22 @@ class SynonymTests(unittest.TestCase):
 
         # Vérification du fonctionnement type
         self.assertEqual(synonym_malefemale_replacement.matching_words(word1,word2), result)
+        # Suffixes of SYNONYM_DICT
+        self.assertEqual(synonym_malefemale_replacement.matching_words('conducteur', 'trice'), ('conducteur', 'trice', 'conducteur'))
+        self.assertEqual(synonym_malefemale_replacement.matching_words('boucher', 'bouchère'), ('boucher', 'bouchère', 'boucher'))
+        self.assertEqual(synonym_malefemale_replacement.matching_words('boucher', 'boulangère'), ('boucher', 'boulangère', 'unknown'))
+        self.assertEqual(synonym_malefemale_replacement.matching_words('ouvrier', 'x'), ('ouvrier', 'x', 'unknown'))
+        self.assertEqual(synonym_malefemale_replacement.matching_words('r', 'euse'), ('r', 'euse', 'unknown'))
+        # Trie of the suffixes
+        trie = synonym_malefemale_replacement._build_suffixes_trie({'eur': ['euse', 'rice'], 'r': ['re']})
+        self.assertEqual(trie['r'][None], ['re'])
+        self.assertEqual(trie['r']['u']['e'][None], ['euse', 'rice'])
+
+        # Gestion des erreurs
+        with self.assertRaises(TypeError):
+            synonym_malefemale_replacement.matching_words('', 'euse')
+        with self.assertRaises(TypeError):
+            synonym_malefemale_replacement.matching_words('serveur', '')
 
 
     def test_update_synonyms_set(self):
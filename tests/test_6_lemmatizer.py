@@ -58,6 +58,44 @@ class LemmatizerTests(unittest.TestCase):
             # Vérification du fonctionnement type
             self.assertEqual(list(lemmatizer.lemmatize(pd.Series(docs)).replace({np.nan:None})), docs_lemmatized)
             self.assertEqual(list(lemmatizer.lemmatize(pd.Series(docs*100)).replace({np.nan:None})), docs_lemmatized*100)
+            self.assertEqual([lemmatizer.doc_lemmatize(text) for text in docs], docs_lemmatized)
+            # Batches & processes
+            self.assertEqual(list(lemmatizer.lemmatize(pd.Series(docs*10), batch_size=3).replace({np.nan:None})), docs_lemmatized*10)
+            self.assertEqual(list(lemmatizer.lemmatize(pd.Series(docs*10), batch_size=7, n_process=2).replace({np.nan:None})), docs_lemmatized*10)
+            # Only the components needed by the lemmatizer are loaded
+            for component in lemmatizer.EXCLUDED_COMPONENTS:
+                self.assertNotIn(component, lemmatizer.get_spacy_model().pipe_names)
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            lemmatizer.lemmatize(pd.Series(docs), batch_size=0)
+        with self.assertRaises(ValueError):
+            lemmatizer.lemmatize(pd.Series(docs), n_process=0)
+
+
+    def test_spacy_model(self):
+        '''Testing functions lemmatizer.set_spacy_model, get_spacy_model & preload'''
+        if spacy.util.is_package("fr_core_news_sm"):
+            # Vérification du fonctionnement type : the model is loaded once
+            model = lemmatizer.preload()
+            self.assertIs(lemmatizer.get_spacy_model(), model)
+            # Other components
+            try:
+                model_with_ner = lemmatizer.preload('fr_core_news_sm', exclude=['parser'])
+                self.assertIn('ner', model_with_ner.pipe_names)
+                self.assertIsNot(model_with_ner, model)
+                self.assertIs(lemmatizer.get_spacy_model(), model_with_ner)
+            finally:
+                lemmatizer.set_spacy_model()
+            self.assertIs(lemmatizer.get_spacy_model(), model)
+
+        # Gestion des erreurs
+        try:
+            lemmatizer.set_spacy_model('model_that_does_not_exist')
+            with self.assertRaises(Exception):
+                lemmatizer.lemmatize(pd.Series(["test"]))
+        finally:
+            lemmatizer.set_spacy_model()
 
 
 # Execution des tests
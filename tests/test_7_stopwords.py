@@ -23,9 +23,10 @@ import unittest
 
 # Utils libs
 import os
+import tempfile
 import numpy as np
 import pandas as pd
-from words_n_fun.preprocessing import stopwords
+from words_n_fun.preprocessing import stopwords, words_matcher
 
 # Disable logging
 import logging
@@ -72,6 +73,23 @@ class StopwordsTests(unittest.TestCase):
         self.assertEqual(list(stopwords.remove_stopwords(pd.Series(docs), opt='none', set_to_add=['mob', 'langages', 'pers'], set_to_remove=['pers']).replace({np.nan: None})), docs_stopwords_removed_custom_add_remove)
         # Test remove all
         self.assertEqual(list(stopwords.remove_stopwords(pd.Series(docs), opt='none', set_to_add=['mob', 'langages', 'Action', 'permis'], set_to_remove=['mob', 'langages', 'Action', 'permis', 'à', 'dont']).replace({np.nan: None})), docs_unchanged)
+        # Engine regex : same results
+        self.assertEqual(list(stopwords.remove_stopwords(pd.Series(docs), engine='regex').replace({np.nan:None})), docs_stopwords_removed)
+        self.assertEqual(list(stopwords.remove_stopwords(pd.Series(docs), opt='', set_to_add=stopwords.STOPWORDS_OFFRES_1 + stopwords.STOPWORDS_OFFRES_2, engine='regex').replace({np.nan: None})), docs_stopwords_removed_custom_add)
+        self.assertEqual(list(stopwords.remove_stopwords(pd.Series(docs), set_to_remove=['à', 'dont'], engine='regex').replace({np.nan: None})), docs_stopwords_removed_custom_remove)
+
+        # Pre-built matcher
+        matcher = stopwords.get_stopwords_matcher(set_to_remove=['à', 'dont'])
+        self.assertIs(stopwords.get_stopwords_matcher(set_to_remove=['à', 'dont']), matcher)
+        self.assertEqual(list(stopwords.remove_stopwords(pd.Series(docs), matcher=matcher).replace({np.nan: None})), docs_stopwords_removed_custom_remove)
+        self.assertEqual(stopwords.doc_remove_stopwords(docs[1], matcher=matcher), docs_stopwords_removed_custom_remove[1])
+        self.assertEqual(stopwords.get_stopwords_matcher(opt='none'), None)
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            stopwords.remove_stopwords(pd.Series(docs), engine='toto')
+        with self.assertRaises(ValueError):
+            stopwords.get_stopwords_matcher(engine='toto')
 
 
     def test_stopwords_ascii(self):
@@ -91,6 +109,48 @@ class StopwordsTests(unittest.TestCase):
         # Vérification du fonctionnement type
         self.assertEqual(type(stopwords.stopwords_nltk_ascii()), list)
 
+    def test_stopwords_artifact(self):
+        '''Testing functions stopwords.build_stopwords_artifact & stopwords.load_stopwords_artifact'''
+        # Vérification du fonctionnement type
+        # The shipped artifact is up to date (else: make build-stopwords)
+        self.assertIsNotNone(stopwords.load_stopwords_artifact())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'stopwords.bin')
+            stopwords.build_stopwords_artifact(path)
+            artifact = stopwords.load_stopwords_artifact(path)
+            self.assertEqual({opt: set(words) for opt, words in artifact['options'].items()}, stopwords._build_stopwords_options())
+            self.assertEqual(set(artifact['matchers'].keys()), {'iso', 'nltk', 'offres_pe', 'all'})
+            self.assertEqual(type(artifact['matchers']['all']), words_matcher.WordsMatcher)
+            self.assertEqual(artifact['matchers']['all'].remove_words("le chauffeur et la chauffeuse"), " chauffeur   chauffeuse")
+            # Same sources : same file
+            with open(path, 'rb') as f:
+                content = f.read()
+            stopwords.build_stopwords_artifact(path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), content)
+            # Options & matchers of the module
+            self.assertEqual(stopwords.get_stopwords_options(), stopwords._build_stopwords_options())
+            self.assertIs(stopwords.STOPWORDS_OPTIONS, stopwords.get_stopwords_options())
+
+            # Gestion des erreurs : fallback on the construction of the sets
+            self.assertIsNone(stopwords.load_stopwords_artifact(os.path.join(tmp_dir, 'missing.bin')))
+            # Corrupted payload
+            corrupted = bytearray(content)
+            corrupted[-10] ^= 1
+            with open(path, 'wb') as f:
+                f.write(corrupted)
+            self.assertIsNone(stopwords.load_stopwords_artifact(path))
+            # Other format version
+            with open(path, 'wb') as f:
+                f.write(stopwords.ARTIFACT_HEADER.pack(stopwords.ARTIFACT_MAGIC, stopwords.STOPWORDS_ARTIFACT_VERSION + 1, bytes(32)))
+                f.write(content[stopwords.ARTIFACT_HEADER.size:])
+            self.assertIsNone(stopwords.load_stopwords_artifact(path))
+            # Truncated or empty file
+            for truncated in (content[:20], b''):
+                with open(path, 'wb') as f:
+                    f.write(truncated)
+                self.assertIsNone(stopwords.load_stopwords_artifact(path))
+
 
 
 # Execution des tests
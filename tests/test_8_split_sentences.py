@@ -23,6 +23,7 @@ import unittest
 
 # utils libs
 import os
+import tempfile
 import pandas as pd
 from words_n_fun.preprocessing import split_sentences
 
@@ -88,6 +89,33 @@ class SplitSentencesTests(unittest.TestCase):
         expected = ["(Tata (titi) tutu)  Mais", "pas de )( sans rien de (Tarari)"]
         self.assertEquals(expected, result)
 
+    def test_find_parenthesis_groups(self):
+        """Test the parenthesis replaced by keys"""
+        text = "(Tata (titi) tutu)  Mais pas de )( sans rien"
+        self.assertEqual(split_sentences.find_parenthesis_groups(text), [(0, 17, 1)])
+        # Empty parenthesis are not replaced, nor the ones around them
+        text = "(a) (b () c) ((d) e"
+        self.assertEqual(split_sentences.find_parenthesis_groups(text), [(0, 2, 0), (14, 16, 1)])
+        self.assertEqual(split_sentences.find_parenthesis_groups("sans parenthèses"), [])
+        # Keys which key_to_parenthesis would mix up
+        self.assertIsNone(split_sentences.find_parenthesis_groups("(a)" * 11 + "0"))
+        self.assertIsNone(split_sentences.find_parenthesis_groups("UID_PE_PARENTHESES_0 (a)"))
+
+    def test_split_line(self):
+        """Test the linear split: same results as parenthesis_to_key, split & key_to_parenthesis"""
+        lines = [
+            "(Tata (titi) tutu)  Mais. pas de )( sans rien. ",
+            "Je parle (Anglais (Lu, Parlé). Espagnol (Parlé)) et en sports. Et (a). b (c). M. D. (e) f. ",
+            "x (a). " * 12 + "(b)0. Fin",
+            "(a) (b () c). ((d) e. f",
+            "Pas de parenthèse. Ici",
+        ]
+        for line in lines:
+            for re_specialsplit in [split_sentences.re_specialsplit_v1, split_sentences.re_specialsplit_v2]:
+                keyed_line, key_paren = split_sentences.parenthesis_to_key(line)
+                expected = split_sentences.key_to_parenthesis(re_specialsplit.split(keyed_line), key_paren)
+                self.assertEqual(split_sentences.split_line(line, re_specialsplit), expected)
+
     def test_extra_split(self):
         """tests cases of script"""
         # Same splits
@@ -408,6 +436,119 @@ class SplitSentencesTests(unittest.TestCase):
             df, df2
         )  # On check si pas de modif. sur df original
 
+        # Other columns & index
+        df = pd.DataFrame(
+            {"id": [3, 1, 2], "docs": ["a. b", "", "c (d. e). f"], "n": [1.5, 2.5, 3.5]},
+            index=["x", "y", "z"],
+        )
+        df_result = pd.DataFrame(
+            {"id": [3, 3, 1, 2, 2], "docs": ["a. ", "b", "", "c (d. e). ", "f"], "n": [1.5, 1.5, 2.5, 3.5, 3.5]}
+        )
+        pd.testing.assert_frame_equal(split_sentences.split_sentences_df(df, "docs"), df_result)
+        pd.testing.assert_frame_equal(split_sentences.split_sentences_df(df, "docs", use_tqdm=True), df_result)
+        # Empty DataFrame
+        self.assertEqual(len(split_sentences.split_sentences_df(df.iloc[:0], "docs")), 0)
+
+        # output_format spans
+        spans = split_sentences.split_sentences_df(df, "docs", output_format="spans")
+        self.assertEqual(len(spans), 3)
+        self.assertEqual(spans.nb_spans, 5)
+        self.assertEqual(list(spans), [["a. ", "b"], [""], ["c (d. e). ", "f"]])
+        self.assertEqual(spans[-1], ["c (d. e). ", "f"])
+        self.assertEqual(spans.to_frame()["text"].tolist(), df_result["docs"].tolist())
+        self.assertEqual(spans.to_frame()["row_id"].tolist(), [0, 0, 1, 2, 2])
+        spans = split_sentences.split_sentences_df(df, "docs", use_tqdm=True, version=2, output_format="spans")
+        self.assertEqual(list(spans), [["a. b"], [""], ["c (d. e). ", "f"]])
+        self.assertEqual(split_sentences.split_sentences_df(df.iloc[:0], "docs", output_format="spans").nb_spans, 0)
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            split_sentences.split_sentences_df(df, "docs", output_format="lists")
+        with self.assertRaises(ValueError):
+            split_sentences.split_sentences_df(df, "docs", version=3, output_format="spans")
+
+    def test_split_sentences_spans(self):
+        """Fonction pour vérifier le fonctionnement de la fonction split_sentences_spans"""
+        # Vérification du fonctionnement type
+        text = "Bonjour M. Dupont. Le poste (temps plein. CDI) est à pourvoir !  \n\n  Merci.  "
+        for version in [1, 2]:
+            normalized_text, spans = split_sentences.split_sentences_spans(text, version)
+            self.assertEqual(normalized_text, "Bonjour M. Dupont. Le poste (temps plein. CDI) est à pourvoir !\n  Merci.")
+            self.assertEqual([normalized_text[start:end] for start, end in spans], split_sentences.split_sentences(text, version))
+        self.assertEqual(split_sentences.split_sentences_spans("a. b\nc"), ("a. b\nc", [(0, 3), (3, 4), (5, 6)]))
+        self.assertEqual(split_sentences.split_sentences_spans(""), ("", [(0, 0)]))
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            split_sentences.split_sentences_spans(text, 3)
+
+    def test_iter_split_sentences_df(self):
+        """Fonction pour vérifier le fonctionnement de la fonction iter_split_sentences_df"""
+        df = pd.DataFrame(
+            {"OFF_CLE": ["c1", "c2", "c3", "c4", "c5"], "OFF_DESCRIPTION": ["t1\nt2", "t3\nt4. t5", "t6", "t7. t8", ""]},
+            index=[10, 11, 12, 13, 14],
+        )
+        df_result = split_sentences.split_sentences_df(df, "OFF_DESCRIPTION")
+        df_result["sentence_id"] = range(len(df_result))
+        df_result["row_id"] = [0, 0, 1, 1, 1, 2, 3, 3, 4]
+
+        # Vérification du fonctionnement type
+        # Same ids whatever the chunks
+        for chunksize in [0, 1, 2, 10]:
+            chunks = list(split_sentences.iter_split_sentences_df(df, "OFF_DESCRIPTION", chunksize=chunksize))
+            self.assertEqual(len(chunks), 1 if chunksize in [0, 10] else -(-len(df) // chunksize))
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df_result)
+        # Chunks of a generator
+        chunks = split_sentences.iter_split_sentences_df([df.iloc[:3], df.iloc[3:]], "OFF_DESCRIPTION", version=2, use_tqdm=True)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df_result)
+        # csv file
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "offres.csv")
+            df.to_csv(path, index=False, sep=";")
+            chunks = split_sentences.iter_split_sentences_df(path, "OFF_DESCRIPTION", chunksize=2, sep=";", keep_default_na=False)
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df_result)
+            # Empty cells (read as NaN) give one empty sentence, as empty strings
+            chunks = split_sentences.iter_split_sentences_df(path, "OFF_DESCRIPTION", chunksize=2, sep=";")
+            pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df_result)
+            path = os.path.join(tmp_dir, "docs.csv")
+            pd.DataFrame({"docs": ["a. b.", "", "x"]}).to_csv(path, index=False)
+            df_sentences = pd.concat(split_sentences.iter_split_sentences_df(path, "docs", chunksize=2), ignore_index=True)
+            self.assertEqual(df_sentences["docs"].tolist(), ["a. ", "b.", "", "x"])
+            self.assertEqual(df_sentences["row_id"].tolist(), [0, 0, 1, 2])
+        # Null texts of a DataFrame
+        df_sentences = pd.concat(split_sentences.iter_split_sentences_df(pd.DataFrame({"docs": ["a", None, float("nan")]}), "docs"))
+        self.assertEqual(df_sentences["docs"].tolist(), ["a", "", ""])
+
+        # Gestion des erreurs
+        with self.assertRaises(ValueError):
+            split_sentences.iter_split_sentences_df(df, "OFF_DESCRIPTION", version=3)
+        with self.assertRaises(ValueError):
+            split_sentences.iter_split_sentences_df(df, "OFF_DESCRIPTION", chunksize=-1)
+        with self.assertRaises(ValueError):
+            next(split_sentences.iter_split_sentences_df(df.assign(row_id=0), "OFF_DESCRIPTION"))
+        # Files & DataFrames are checked before the first chunk is requested
+        with self.assertRaises(ValueError):
+            split_sentences.iter_split_sentences_df(df.assign(row_id=0), "OFF_DESCRIPTION")
+        with self.assertRaises(ValueError):
+            split_sentences.iter_split_sentences_df(df, "ABSENT")
+        with self.assertRaises(ValueError):
+            split_sentences.iter_split_sentences_df("not a file", "OFF_DESCRIPTION")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "offres.csv")
+            with self.assertRaises(FileNotFoundError):
+                split_sentences.iter_split_sentences_df(path, "OFF_DESCRIPTION")
+            df.to_csv(path, index=False, sep=";")
+            with self.assertRaises(ValueError):
+                split_sentences.iter_split_sentences_df(path, "OFF_DESCRIPTION", sep=";", first_row="other")
+            with self.assertRaises(ValueError):
+                split_sentences.iter_split_sentences_df(path, "ABSENT", sep=";")
+            with self.assertRaises(ValueError):
+                split_sentences.iter_split_sentences_df(path, "OFF_DESCRIPTION", sep=";", first_row="data", columns=["a", "b"])
+        # The chunks of an Iterable are checked when they are split
+        chunks = split_sentences.iter_split_sentences_df([df], "ABSENT")
+        with self.assertRaises(ValueError):
+            next(chunks)
+
 
 # Execution des tests
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+## Tests - unit test of cache functions
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Libs unittest
+import unittest
+
+# Utils libs
+import os
+import pickle
+import tempfile
+import functools
+import numpy as np
+import pandas as pd
+from unittest import mock
+import words_n_fun
+from words_n_fun.preprocessing import api
+from words_n_fun.preprocessing import basic
+from words_n_fun.preprocessing import cache
+from words_n_fun.preprocessing import lemmatizer
+
+# Disable logging
+import logging
+logging.disable(logging.CRITICAL)
+
+
+# Documents seen by record_docs
+processed_docs = []
+
+
+def record_docs(docs: pd.Series) -> pd.Series:
+    '''Pipeline step recording the documents it processes'''
+    processed_docs.extend(docs.replace({np.nan: None}))
+    return docs
+
+
+def upper_docs(docs: pd.Series) -> pd.Series:
+    '''Pipeline step edited by test_get_pipeline_key'''
+    return docs.str.upper()
+
+
+class CacheTests(unittest.TestCase):
+    '''Main class to test all functions in cache.py.'''
+
+
+    def setUp(self):
+        '''SetUp fonction'''
+        # On se place dans le bon répertoire
+        # Change directory to script directory
+        abspath = os.path.abspath(__file__)
+        dname = os.path.dirname(abspath)
+        os.chdir(dname)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'cache.sqlite')
+
+
+    def tearDown(self):
+        '''TearDown fonction'''
+        self.tmp_dir.cleanup()
+
+
+    def test_get_pipeline_key(self):
+        '''Testing function cache.get_pipeline_key'''
+        # Vérification du fonctionnement type
+        key = cache.get_pipeline_key(['to_lower', 'trim_string'])
+        self.assertEqual(key, cache.get_pipeline_key(['to_lower', 'trim_string']))
+        self.assertNotEqual(key, cache.get_pipeline_key(['trim_string', 'to_lower']))
+        self.assertNotEqual(key, cache.get_pipeline_key(['to_lower']))
+        key_partial = cache.get_pipeline_key([functools.partial(basic.remove_words, words_to_remove=['a'])])
+        self.assertEqual(key_partial, cache.get_pipeline_key([functools.partial(basic.remove_words, words_to_remove=['a'])]))
+        self.assertNotEqual(key_partial, cache.get_pipeline_key([functools.partial(basic.remove_words, words_to_remove=['b'])]))
+        self.assertIsNotNone(cache.get_pipeline_key([basic.to_lower]))
+        # The key of a function depends on its code
+        key_function = cache.get_pipeline_key(['to_lower', upper_docs])
+        self.assertIsNotNone(key_function)
+        self.assertEqual(cache.get_pipeline_key(['to_lower', upper_docs]), key_function)
+        code = upper_docs.__code__
+        try:
+            upper_docs.__code__ = (lambda docs: docs.str.lower()).__code__
+            self.assertNotEqual(cache.get_pipeline_key(['to_lower', upper_docs]), key_function)
+        finally:
+            upper_docs.__code__ = code
+        # Lambda functions can't be identified
+        self.assertIsNone(cache.get_pipeline_key(['to_lower', lambda x: x]))
+        # The key of the lemmatization steps depends on the spacy model selected
+        key_lemmatize = cache.get_pipeline_key(['to_lower', 'lemmatize'])
+        key_lemmatize_function = cache.get_pipeline_key(['to_lower', basic.lemmatize])
+        try:
+            lemmatizer.set_spacy_model('fr_core_news_md')
+            self.assertNotEqual(cache.get_pipeline_key(['to_lower', 'lemmatize']), key_lemmatize)
+            self.assertNotEqual(cache.get_pipeline_key(['to_lower', basic.lemmatize]), key_lemmatize_function)
+            self.assertEqual(cache.get_pipeline_key(['to_lower', 'trim_string']), key)
+        finally:
+            lemmatizer.set_spacy_model()
+        self.assertEqual(cache.get_pipeline_key(['to_lower', 'lemmatize']), key_lemmatize)
+        # The key depends on the version of the package
+        with mock.patch.object(words_n_fun, '__version__', 'other'):
+            self.assertNotEqual(cache.get_pipeline_key(['to_lower', 'trim_string']), key)
+            self.assertNotEqual(cache.get_pipeline_key(['to_lower', basic.lemmatize]), key_lemmatize_function)
+
+
+    def test_PipelineCache(self):
+        '''Testing class cache.PipelineCache'''
+        # Vérification du fonctionnement type
+        pipeline_cache = cache.PipelineCache(self.cache_path)
+        self.assertEqual(pipeline_cache.get_many('key', ['a', 'b']), {})
+        pipeline_cache.set_many('key', {'a': 'A', 'b': None})
+        self.assertEqual(pipeline_cache.get_many('key', ['a', 'b', 'c']), {'a': 'A', 'b': None})
+        self.assertEqual(pipeline_cache.get_many('other_key', ['a']), {})
+        stats = pipeline_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries'], stats['size']), (2, 4, 2, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 6)
+        # Persistence
+        pipeline_cache.close()
+        pipeline_cache = pickle.loads(pickle.dumps(cache.PipelineCache(self.cache_path)))
+        self.assertEqual(pipeline_cache.get_many('key', ['a']), {'a': 'A'})
+        pipeline_cache.clear()
+        self.assertEqual(pipeline_cache.stats()['entries'], 0)
+
+        # Eviction
+        pipeline_cache = cache.PipelineCache(self.cache_path, max_size=10)
+        pipeline_cache.set_many('key', {'a': 'aaaaa'})
+        pipeline_cache.set_many('key', {'b': 'bbbbb'})
+        pipeline_cache.get_many('key', ['a'])
+        pipeline_cache.set_many('key', {'c': 'ccccc'})
+        self.assertEqual(pipeline_cache.get_many('key', ['a', 'b', 'c']), {'a': 'aaaaa', 'c': 'ccccc'})
+        self.assertEqual(pipeline_cache.stats()['evictions'], 1)
+        pipeline_cache.close()
+
+        with self.assertRaises(ValueError):
+            cache.PipelineCache(self.cache_path, max_size=-1)
+
+
+    def test_cache_api(self):
+        '''Testing the cache option of api.PreProcessor'''
+        docs = ["Chauffeur(se)  accompagnateur(trice) pers à mob - 5 ans de expérience.", "Je maîtrise 12 langages informatiques dont le C & j'ai le Permis B",
+                "Coordinateur d'Equipe d'Action Territoriale ", 5, None, np.nan, "Coordinateur d'Equipe d'Action Territoriale "]
+        expected = api.preprocess_pipeline(pd.Series(docs))
+
+        # Vérification du fonctionnement type
+        pd.testing.assert_series_equal(api.preprocess_pipeline(pd.Series(docs), cache=self.cache_path), expected)
+        stats = cache.PipelineCache(self.cache_path).stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (0, 3, 3))
+        # Hits are served without running the pipeline
+        expected_lower = list(api.preprocess_pipeline(pd.Series(docs), pipeline=['to_lower']).replace({np.nan: None}))
+        processed_docs.clear()
+        result = api.preprocess_pipeline(pd.Series(docs), pipeline=['to_lower', record_docs], cache=self.cache_path)
+        self.assertEqual(list(result.replace({np.nan: None})), expected_lower)
+        self.assertEqual(processed_docs, [doc.lower() for doc in docs[:3]] + [None, None, None])
+        processed_docs.clear()
+        result = api.preprocess_pipeline(pd.Series(docs), pipeline=['to_lower', record_docs], cache=self.cache_path)
+        self.assertEqual(list(result.replace({np.nan: None})), expected_lower)
+        # Without any string left to process, a sentinel string is added (its output is dropped)
+        self.assertEqual(processed_docs, [None, None, None, ''])
+        preprocessor = api.PreProcessor(cache=self.cache_path)
+        pd.testing.assert_series_equal(preprocessor.transform(pd.Series(docs)), expected)
+        self.assertEqual(preprocessor.cache.stats()['hits'], 6)
+        # Only the new documents are processed
+        new_docs = docs + ['Un nouveau document']
+        pd.testing.assert_series_equal(preprocessor.transform(pd.Series(new_docs)), api.preprocess_pipeline(pd.Series(new_docs)))
+        stats = preprocessor.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (9, 7, 7))
+        # Other pipelines use other entries
+        self.assertEqual(api.preprocess_pipeline(docs, pipeline=['to_lower'], cache=preprocessor.cache),
+                         api.preprocess_pipeline(docs, pipeline=['to_lower']))
+        self.assertEqual(preprocessor.cache.stats()['entries'], 10)
+        # Other options
+        self.assertEqual(api.preprocess_pipeline(docs, cache=self.cache_path, compiled=True, n_jobs=2, chunksize=2),
+                         api.preprocess_pipeline(docs))
+        self.assertEqual(api.preprocess_pipeline(docs, pipeline=['to_lower', lambda x: x], cache=self.cache_path),
+                         api.preprocess_pipeline(docs, pipeline=['to_lower']))
+
+
+    def test_cache_outputs(self):
+        '''Testing that the outputs are the same without cache, with a cold cache & with a warm cache'''
+        docs = pd.Series(['abc', "Je maîtrise 12 langages", 5, None, np.nan, 'abc'], dtype=object)
+        # Vérification du fonctionnement type
+        for pipeline in [api.DEFAULT_PIPELINE, ['notnull'], ['to_lower', 'trim_string'], ['notnull', upper_docs], ['notnull', record_docs]]:
+            uncached = api.preprocess_pipeline(docs, pipeline=pipeline)
+            cold = api.preprocess_pipeline(docs, pipeline=pipeline, cache=self.cache_path)
+            warm = api.preprocess_pipeline(docs, pipeline=pipeline, cache=self.cache_path)
+            pd.testing.assert_series_equal(cold, uncached)
+            pd.testing.assert_series_equal(warm, uncached)
+        # Non str values are processed unchanged
+        self.assertEqual(list(api.preprocess_pipeline(docs, pipeline=['notnull'], cache=self.cache_path)),
+                         ['abc', "Je maîtrise 12 langages", 5, '', '', 'abc'])
+        # A new version of the package does not use the outputs of the previous one
+        preprocessor = api.PreProcessor(cache=self.cache_path)
+        preprocessor.transform(docs)
+        hits = preprocessor.cache.stats()['hits']
+        with mock.patch.object(words_n_fun, '__version__', 'other'):
+            preprocessor = api.PreProcessor(cache=self.cache_path)
+            pd.testing.assert_series_equal(preprocessor.transform(docs), api.preprocess_pipeline(docs))
+            self.assertEqual(preprocessor.cache.stats()['hits'], hits)
+
+
+# Execution des tests
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import os
 import logging
+import importlib.metadata
 
 from tqdm import tqdm
 
@@ -23,6 +25,18 @@ ch.setFormatter(formatter)
 logger.addHandler(ch)
 
 
+# Version of the package: installed distribution, or version.txt when used from the sources (None if not found)
+try:
+    __version__ = importlib.metadata.version(__name__)
+except importlib.metadata.PackageNotFoundError:
+    _version_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'version.txt')
+    if os.path.isfile(_version_path):
+        with open(_version_path, 'r') as _version_file:
+            __version__ = f"{_version_file.read().strip()}+local"
+    else:
+        __version__ = None
+
+
 ## Manage tqdm
 # On créé une classe à utiliser à la place de celle de tqdm
 # def level: INFO
@@ -43,3 +57,17 @@ class CustomTqdm(tqdm):
     @staticmethod
     def setLevel(level):
         CustomTqdm.level = level
+
+
+# tqdm.pandas (progress_apply) is registered on the first use of a progress bar rather than at import
+_tqdm_pandas_registered = False
+
+
+def register_tqdm_pandas() -> None:
+    '''Registers the progress_apply methods of pandas (tqdm.pandas) with CustomTqdm
+    Called before each progress_apply: the registration imports large parts of pandas (a few hundred milliseconds)
+    '''
+    global _tqdm_pandas_registered
+    if not _tqdm_pandas_registered:
+        CustomTqdm.pandas()
+        _tqdm_pandas_registered = True
@@ -19,9 +19,11 @@
 #
 # Classes :
 # - PreProcessor -> SkLearn Pipeline compatible class interface
+# - CompiledPipeline -> Pipeline compiled into a single document level function
 #
 # Fonctions :
 # - get_preprocessor -> Returns a PreProcessor class instance
+# - compile_pipeline -> Compiles a pipeline into a single function
 # - preprocess_pipeline -> Preprocessing pipeline
 # - check_pipeline_order -> Checks the sequence of transformations for unexpected behaviours
 # - listing_count_words -> Word count and listing
@@ -32,13 +34,18 @@ import os
 import gc
 import copy
 import json
+import math
+import pickle
 import functools
 import numpy as np
 import pandas as pd
-from typing import Union
+from typing import Union, Callable
+from concurrent.futures import ProcessPoolExecutor
 
 from words_n_fun import utils
-from words_n_fun.preprocessing import basic
+from words_n_fun.preprocessing import arrow_kernels, basic
+from words_n_fun.preprocessing.cache import PipelineCache, CachedPipeline, get_pipeline_key
+from words_n_fun.preprocessing.vocabulary import Vocabulary
 
 
 # Get logger
@@ -76,6 +83,39 @@ USAGE = {
 }
 
 
+# Document level (str -> str) implementations of the USAGE transformations
+# They are used by compiled pipelines to chain several transformations on a document while it is still in cache,
+# and by PreProcessor.transform_one to process a single document without pandas
+USAGE_DOC = {
+    'notnull': basic.doc_notnull,
+    'remove_non_string': basic.doc_remove_non_string,
+    'get_true_spaces': basic.doc_get_true_spaces,
+    'remove_accents': basic.doc_remove_accents,
+    'remove_stopwords': functools.partial(basic.doc_remove_stopwords, opt='all'),
+    'trim_string': basic.doc_trim_string,
+    'remove_leading_and_ending_spaces': basic.doc_remove_leading_and_ending_spaces,
+    'remove_punct': functools.partial(basic.doc_remove_punct, del_parenthesis=True, replacement_char=' '),
+    'remove_punct_except_parenthesis': functools.partial(basic.doc_remove_punct, del_parenthesis=False, replacement_char=' '),
+    'pe_matching': basic.doc_pe_matching,
+    'to_lower': functools.partial(basic.doc_to_lower, threshold_nb_chars=0),
+    'to_lower_except_singleletters': functools.partial(basic.doc_to_lower, threshold_nb_chars=2),
+    'remove_numeric': functools.partial(basic.doc_remove_numeric, replacement_char=' '),
+    'remove_gender_synonyms': basic.doc_remove_gender_synonyms,
+    'lemmatize': basic.doc_lemmatize,
+    'stemmatize': basic.doc_stemmatize,
+    'add_point': basic.doc_add_point,
+    'add_space_around_special': basic.doc_deal_with_specific_characters,
+    'replace_urls': basic.doc_replace_urls,
+    'replace_urls_with_domains': functools.partial(basic.doc_replace_urls, replace_with_domain=True),
+    'fix_text': basic.doc_fix_text,
+}
+
+
+# Transformations applied on the whole batch of documents by compiled pipelines, despite their document level
+# implementation: the spacy model lemmatizes the documents by batches (cf. lemmatizer.lemmatize)
+BATCH_ONLY = {'lemmatize'}
+
+
 # Default pipeline
 DEFAULT_PIPELINE = ['remove_non_string', 'get_true_spaces', 'to_lower_except_singleletters', 'pe_matching',
                     'remove_gender_synonyms', 'remove_punct_except_parenthesis', 'remove_numeric',
@@ -90,7 +130,9 @@ class PreProcessor():
 
     def __init__(self, pipeline: Union[list, None] = DEFAULT_PIPELINE, prefered_column: str = 'docs',
                  modify_data: bool = True, chunksize: int = 0, first_row: str = 'header',
-                 columns: list = ['docs', 'tags'], sep: str = ',', nrows: int = 0, **pandas_args) -> None:
+                 columns: list = ['docs', 'tags'], sep: str = ',', nrows: int = 0, compiled: bool = False,
+                 n_jobs: int = 1, cache: Union[str, PipelineCache, None] = None,
+                 string_dtype: Union[str, None] = None, **pandas_args) -> None:
         '''Class constructor
         The purpose of a lot of these arguments are to handle the case when the input of the transform method is a path to
         a csv file. While handy, this use case is not advised.
@@ -104,11 +146,17 @@ class PreProcessor():
             columns (list<str>) : When working with a pandas dataframe or csv file, specifies the columns to use, if first_row != 'header'. Truncate the data if there is too much columns & add some if they are missing (default : ['docs', 'tags'])
             sep (str): When working with a pandas dataframe or csv file, specifies the csv separator (default: ',')
             nrows (int) : When working with a pandas dataframe or csv file, specifies the maximum number of lines to read (default: 0 we take it all)
+            compiled (bool): If True, the pipeline is compiled into a single function (cf. compile_pipeline) (default: False)
+            n_jobs (int): Number of processes used to process the chunks in parallel, -1 means all the CPUs (default: 1)
+            cache (str | PipelineCache): Persistent cache of the outputs (or path to its SQLite file), outputs of documents already processed by the same pipeline are reused (default: None)
+            string_dtype (str): 'pyarrow' to process the documents as Arrow-backed strings (string[pyarrow], faster for some transformations), 'object' as Python objects, None to keep their dtype. It is also the dtype of the pd.Series outputs (default: None)
             pandas_args : When working with a pandas dataframe or csv file, specifies arguments to pass to pandas
         Raises:
             ValueError: If chunksize < 0
             ValueError: If first_row is different than 'header', 'data' or 'skip'
             ValueError: If nrows < 0
+            ValueError: If n_jobs is 0 or < -1
+            ValueError: If string_dtype is not None, 'pyarrow' or 'object'
         '''
         if chunksize < 0:
             raise ValueError("chunksize parameter must be >= 0")
@@ -116,6 +164,10 @@ class PreProcessor():
             raise ValueError('first_row parameter must be one of header, data, or skip')
         if nrows < 0:
             raise ValueError('nrows parameter must be >= 0')
+        if n_jobs == 0 or n_jobs < -1:
+            raise ValueError('n_jobs parameter must be >= 1 or -1')
+        if string_dtype not in (None, 'pyarrow', 'object'):
+            raise ValueError("string_dtype parameter must be None, 'pyarrow' or 'object'")
         if not modify_data:
             logger.warning("modify_data must be True for the preprocessor class to remain Sklearn compatible")
         # Set properties
@@ -127,6 +179,10 @@ class PreProcessor():
         self.columns = columns
         self.sep = sep
         self.nrows = nrows
+        self.compiled = compiled
+        self.n_jobs = n_jobs
+        self.cache = PipelineCache(cache) if isinstance(cache, str) else cache
+        self.string_dtype = string_dtype
         self.pandas_args = pandas_args
     
     @property
@@ -141,6 +197,8 @@ class PreProcessor():
         self._pipeline = value
         # Check the order of transformations in the pipeline, warnings are displayed if unexpected behaviours could occur
         check_pipeline_order(self._pipeline)
+        # Document level transformations, used by transform_one
+        self._doc_pipeline = _get_doc_pipeline(self._pipeline)
     
     def fit(self):
         '''Required to be compatible with Sklearn pipelines'''
@@ -150,7 +208,7 @@ class PreProcessor():
         '''Wrapper around preprocess_pipeline
 
         Args:
-            docs (?): Documents to be preprocessed (compatible types : str ending by .csv, str, list, np.ndarray, pd.Series, pd.DataFrame)
+            docs (?): Documents to be preprocessed (compatible types : str ending by .csv, .parquet or .arrow, str, list, np.ndarray, pd.Series, pd.DataFrame)
         Returns:
             ?: Preprocessed documents (the initial type is preserved except for str ending by .csv -> pd.DataFrame)
         '''
@@ -158,12 +216,30 @@ class PreProcessor():
             logger.warning("pd.Series is the prefered type for api.Preprocessor, other types might not be compatible with some Sklearn pipelines ")
         return _preprocess_transform(docs, pipeline=self.pipeline, prefered_column=self.prefered_column, modify_data=self.modify_data,
                                    chunksize=self.chunksize, first_row=self.first_row, columns=self.columns, sep=self.sep,
-                                   nrows=self.nrows, **self.pandas_args)
+                                   nrows=self.nrows, compiled=self.compiled, n_jobs=self.n_jobs, cache=self.cache,
+                                   string_dtype=self.string_dtype, **self.pandas_args)
+
+    def transform_one(self, text: str) -> str:
+        '''Preprocesses a single document, without pandas
+        The document level implementations of the transformations (cf. USAGE_DOC) are chained on the document,
+        with the same results as transform. Low latency alternative to transform for online use.
+        The cache of the preprocessor is not used.
+
+        Args:
+            text (str): Document to be preprocessed
+        Returns:
+            str: Preprocessed document
+        '''
+        for transformation in self._doc_pipeline:
+            text = transformation(text)
+        return text
 
 
 def get_preprocessor(pipeline: list = DEFAULT_PIPELINE, prefered_column: str = 'docs', modify_data: bool = True,
                      chunksize: int = 0, first_row: str = 'header', columns: list = ['docs', 'tags'], sep: str = ',',
-                     nrows: int = 0, **pandas_args) -> PreProcessor:
+                     nrows: int = 0, compiled: bool = False, n_jobs: int = 1,
+                     cache: Union[str, PipelineCache, None] = None, string_dtype: Union[str, None] = None,
+                     **pandas_args) -> PreProcessor:
     '''Retourne une instance de PreProcessor
 
     Kwargs:
@@ -175,6 +251,10 @@ def get_preprocessor(pipeline: list = DEFAULT_PIPELINE, prefered_column: str = '
         columns (list<str>) : When working with a pandas dataframe or csv file, specifies the columns to use, if first_row != 'header'. Truncate the data if there is too much columns & add some if they are missing (default : ['docs', 'tags'])
         sep (str): When working with a pandas dataframe or csv file, specifies the csv separator (default: ',')
         nrows (int) : When working with a pandas dataframe or csv file, specifies the maximum number of lines to read (default: 0 we take it all)
+        compiled (bool): If True, the pipeline is compiled into a single function (cf. compile_pipeline) (default: False)
+        n_jobs (int): Number of processes used to process the chunks in parallel, -1 means all the CPUs (default: 1)
+        cache (str | PipelineCache): Persistent cache of the outputs (or path to its SQLite file), outputs of documents already processed by the same pipeline are reused (default: None)
+        string_dtype (str): 'pyarrow' to process the documents as Arrow-backed strings (string[pyarrow], faster for some transformations), 'object' as Python objects, None to keep their dtype. It is also the dtype of the pd.Series outputs (default: None)
         pandas_args : When working with a pandas dataframe or csv file, specifies arguments to pass to pandas
     Returns:
         PreProcessor: A PreProcessor instance with its pipeline set
@@ -182,34 +262,207 @@ def get_preprocessor(pipeline: list = DEFAULT_PIPELINE, prefered_column: str = '
     logger.debug('Calling api.get_preprocessor')
     return PreProcessor(pipeline=pipeline, prefered_column=prefered_column, modify_data=modify_data,
                         chunksize=chunksize, first_row=first_row, columns=columns, sep=sep,
-                        nrows=nrows, **pandas_args)
+                        nrows=nrows, compiled=compiled, n_jobs=n_jobs, cache=cache,
+                        string_dtype=string_dtype, **pandas_args)
+
+def _get_doc_pipeline(pipeline: Union[list, None]) -> list:
+    '''Returns the document level transformations of a pipeline
+    Callables (pd.Series -> pd.Series) are applied on a pd.Series of one document
+
+    Args:
+        pipeline (list): List of transformations to apply (from the USAGE dict or callables)
+    Returns:
+        list: Document level transformations (str -> str)
+    '''
+    transformations = []
+    for item in pipeline or []:
+        if isinstance(item, str) and item in USAGE_DOC.keys():
+            transformations.append(USAGE_DOC[item])
+        elif callable(item):
+            transformations.append(_on_one_document(item))
+    return transformations
+
+
+def _on_one_document(function: Callable) -> Callable:
+    '''Returns a document level version of a transformation (pd.Series -> pd.Series)
+
+    Args:
+        function (Callable): Transformation (pd.Series -> pd.Series)
+    Returns:
+        Callable: Transformation (str -> str)
+    '''
+    @functools.wraps(function)
+    def wrapper(text: str) -> str:
+        return function(pd.Series([text], dtype=object)).iloc[0]
+    return wrapper
+
 
 @utils.data_agnostic
-def process_block_of_data(chunk: pd.Series, pipeline: list, max_chunksize: int):
-    """ sub function to call a small block of data"""
+def process_block_of_data(chunk: pd.Series, pipeline: list, max_chunksize: int, min_nb_data: int = 1000,
+                          max_percent_unique: float = 0.9, string_dtype: Union[str, None] = None) -> pd.Series:
+    '''Applies the transformations of a pipeline on a block of data
+    Identical documents are regrouped once for the whole pipeline: the transformations are applied on the unique
+    documents, which are regrouped again after each step (some transformations, eg. to_lower, create new duplicates).
+    The results are expanded back to the original rows at the end.
+    Arrow-backed strings (string[pyarrow]) stay Arrow-backed through the whole pipeline: the transformations having an
+    Arrow kernel (cf. arrow_kernels.py) use it, the other ones are applied on Python objects and their results are
+    converted back after the step.
+
+    Args:
+        chunk (pd.Series): Documents to process
+        pipeline (list): List of transformations to apply (from the USAGE dict or callables)
+        max_chunksize (int): Size of the biggest chunk
+    Kwargs:
+        min_nb_data (int): Minimum number of documents required to regroup the data (default: 1000)
+        max_percent_unique (float): Maximum ratio of unique documents required to regroup the data (default: 0.9)
+        string_dtype (str): 'pyarrow' to process the documents as Arrow-backed strings, 'object' as Python objects,
+            None to keep their dtype (default: None)
+    Returns:
+        pd.Series: Processed documents (with the dtype string_dtype if not None, otherwise the dtype of chunk)
+    '''
+    # The documents are converted once, before the first transformation
+    if string_dtype is not None:
+        chunk = utils.as_string_dtype(chunk, string_dtype)
+    keep_arrow = utils.is_arrow_string(chunk)
+    # Regroup identical documents, if there is enough data & enough duplicates
+    codes = None
+    if len(chunk) >= min_nb_data and len(chunk) > 0:
+        codes, uniques = utils.factorize_series(chunk)
+        if len(uniques) / len(chunk) > max_percent_unique:
+            codes = None
+        else:
+            logger.debug(f"Preprocessing: {len(uniques)} unique documents out of {len(chunk)}")
     for item in pipeline:
         # If item is a string, we apply the corresponding function from USAGE
         if item in USAGE.keys():
-            logger.info(f"Preprocessing: step {item}")
-            chunk = USAGE[item](chunk)
+            function = USAGE[item]
         # If it's a callable, it is directly called
         elif callable(item):
-            logger.info(f"Preprocessing: step {item}")
-            chunk = item(chunk)
+            function = item
+        else:
+            continue
+        logger.info(f"Preprocessing: step {item}")
+        # Transformations without Arrow kernel are applied on Python objects
+        if keep_arrow and not (isinstance(item, str) and item in arrow_kernels.KERNELS):
+            function = _on_objects(function)
+        if codes is None:
+            chunk = function(chunk)
+        else:
+            # The data is already regrouped, the regroup_data_series wrappers of the functions are disabled
+            with utils.regroup_disabled():
+                uniques = function(uniques)
+            # Regroup the documents that became identical
+            new_codes, uniques = utils.factorize_series(uniques)
+            codes = new_codes[codes]
         # gc collect if more than a thousand elements (improve memory usage)
         if max_chunksize >= 1000:
             gc.collect()
+    if codes is not None:
+        chunk = utils.expand_series(uniques, codes, index=chunk.index, name=chunk.name)
     return chunk
 
+
+def _on_objects(function: Callable) -> Callable:
+    '''Returns a version of a transformation taking & returning Arrow-backed strings, applied on Python objects
+
+    Args:
+        function (Callable): Transformation (pd.Series -> pd.Series)
+    Returns:
+        Callable: Transformation
+    '''
+    @functools.wraps(function)
+    def wrapper(docs: pd.Series) -> pd.Series:
+        return utils.as_string_dtype(function(utils.as_string_dtype(docs, 'object')), 'pyarrow')
+    return wrapper
+
+
+class CompiledPipeline():
+    '''Class CompiledPipeline:
+    A pipeline compiled into a single pd.Series -> pd.Series function.
+    Consecutive transformations having a document level implementation (cf. USAGE_DOC) are fused: they are
+    chained on each document while it is still in cache instead of performing a full pass over the pd.Series per
+    transformation. The other transformations (lemmatize, cf. BATCH_ONLY, custom functions) are applied on the whole batch.
+    Duplicated documents are regrouped once before the first transformation and the results are expanded once
+    at the end.
+    '''
+
+    def __init__(self, pipeline: list) -> None:
+        '''Class constructor
+
+        Args:
+            pipeline (list): List of transformations to apply (from the USAGE dict or callables)
+        '''
+        self.pipeline = pipeline
+        # Each step is a tuple (is_fused, transformations)
+        self.steps = []
+        for item in pipeline:
+            if isinstance(item, str) and item in USAGE_DOC.keys() and item not in BATCH_ONLY:
+                if self.steps and self.steps[-1][0]:
+                    self.steps[-1][1].append(USAGE_DOC[item])
+                else:
+                    self.steps.append((True, [USAGE_DOC[item]]))
+            elif item in USAGE.keys():
+                self.steps.append((False, [USAGE[item]]))
+            elif callable(item):
+                self.steps.append((False, [item]))
+
+    def __call__(self, docs: pd.Series) -> pd.Series:
+        '''Applies the compiled pipeline
+
+        Args:
+            docs (pd.Series): Documents to process
+        Returns:
+            pd.Series: Processed documents
+        '''
+        codes, uniques = utils.factorize_series(docs)
+        logger.debug(f"Compiled pipeline: processing {len(uniques)} unique documents out of {len(docs)}")
+        for is_fused, transformations in self.steps:
+            if is_fused:
+                uniques = pd.Series([self._apply_fused(text, transformations) for text in uniques], dtype=object)
+            else:
+                # The data is already regrouped, the regroup_data_series wrappers of the functions are disabled
+                with utils.regroup_disabled():
+                    uniques = transformations[0](uniques.copy())
+        return utils.expand_series(uniques, codes, index=docs.index, name=docs.name)
+
+    @staticmethod
+    def _apply_fused(text, transformations: list):
+        '''Chains document level transformations on a document
+
+        Args:
+            text (str): Document to process
+            transformations (list): Document level transformations
+        Returns:
+            str: Processed document
+        '''
+        for transformation in transformations:
+            text = transformation(text)
+        return text
+
+
+def compile_pipeline(pipeline: list) -> Callable:
+    '''Compiles a pipeline into a single pd.Series -> pd.Series function (cf. CompiledPipeline)
+    The result can be used as the only item of a pipeline
+
+    Args:
+        pipeline (list): List of transformations to apply (from the USAGE dict or callables)
+    Returns:
+        CompiledPipeline: The compiled pipeline
+    '''
+    logger.debug('Calling api.compile_pipeline')
+    return CompiledPipeline(pipeline)
+
+
 def preprocess_pipeline(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame],
                         pipeline: list = DEFAULT_PIPELINE, prefered_column: str = 'docs',
                         modify_data: bool = True, chunksize: int = 0, first_row: str = 'header',
-                        columns: list = ['docs', 'tags'], sep: str = ',', nrows: int = 0,
-                        **pandas_args) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
+                        columns: list = ['docs', 'tags'], sep: str = ',', nrows: int = 0, compiled: bool = False,
+                        n_jobs: int = 1, cache: Union[str, PipelineCache, None] = None,
+                        string_dtype: Union[str, None] = None, **pandas_args) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
     '''Preprocessing pipeline
 
     Args:
-        docs (?): Documents to be preprocessed (compatible types : str ending by .csv, str, list, np.ndarray, pd.Series, pd.DataFrame)
+        docs (?): Documents to be preprocessed (compatible types : str ending by .csv, .parquet or .arrow, str, list, np.ndarray, pd.Series, pd.DataFrame)
     Kwargs:
         pipeline (list): List of transformations to apply (from the USAGE dict) (default: DEFAULT_PIPELINE)
         prefered_column (str): Default column name to consider as the document container when working with a pandas dataframe or csv file (default: 'docs')
@@ -219,30 +472,36 @@ def preprocess_pipeline(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFra
         columns (list<str>) : When working with a pandas dataframe or csv file, specifies the columns to use, if first_row != 'header'. Truncate the data if there is too much columns & add some if they are missing (default : ['docs', 'tags'])
         sep (str): When working with a pandas dataframe or csv file, specifies the csv separator (default: ',')
         nrows (int) : When working with a pandas dataframe or csv file, specifies the maximum number of lines to read (default: 0 we take it all)
+        compiled (bool): If True, the pipeline is compiled into a single function (cf. compile_pipeline) (default: False)
+        n_jobs (int): Number of processes used to process the chunks in parallel, -1 means all the CPUs (default: 1)
+        cache (str | PipelineCache): Persistent cache of the outputs (or path to its SQLite file), outputs of documents already processed by the same pipeline are reused (default: None)
+        string_dtype (str): 'pyarrow' to process the documents as Arrow-backed strings (string[pyarrow], faster for some transformations), 'object' as Python objects, None to keep their dtype. It is also the dtype of the pd.Series outputs (default: None)
         pandas_args : When working with a pandas dataframe or csv file, specifies arguments to pass to pandas
     Raises:
         ValueError: If chunksize < 0
         ValueError: If first_row is different than 'header', 'data' or 'skip'
         ValueError: If nrows < 0
+        ValueError: If n_jobs is 0 or < -1
     Returns:
         ?: Preprocessed documents (the initial type is preserved except for str ending by .csv -> pd.DataFrame)
     '''
     logger.debug('Calling api.preprocess_pipeline')
     preprocessor = PreProcessor( pipeline, prefered_column, modify_data, chunksize, first_row,
-                 columns, sep, nrows, **pandas_args)
+                 columns, sep, nrows, compiled, n_jobs, cache, string_dtype, **pandas_args)
     return preprocessor.transform(docs)
 
 
 def _preprocess_transform(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame],
                         pipeline: list = DEFAULT_PIPELINE, prefered_column: str = 'docs',
                         modify_data: bool = True, chunksize: int = 0, first_row: str = 'header',
-                        columns: list = ['docs', 'tags'], sep: str = ',', nrows: int = 0,
-                        **pandas_args) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
+                        columns: list = ['docs', 'tags'], sep: str = ',', nrows: int = 0, compiled: bool = False,
+                        n_jobs: int = 1, cache: Union[str, PipelineCache, None] = None,
+                        string_dtype: Union[str, None] = None, **pandas_args) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
     '''Preprocessing trasform
     processing of the data once the initialisation has been performed
     @deprecated: this function is going to be inserted in the PreProcessor
     Args:
-        docs (?): Documents to be preprocessed (compatible types : str ending by .csv, str, list, np.ndarray, pd.Series, pd.DataFrame)
+        docs (?): Documents to be preprocessed (compatible types : str ending by .csv, .parquet or .arrow, str, list, np.ndarray, pd.Series, pd.DataFrame)
     Kwargs:
         pipeline (list): List of transformations to apply (from the USAGE dict) (default: DEFAULT_PIPELINE)
         prefered_column (str): Default column name to consider as the document container when working with a pandas dataframe or csv file (default: 'docs')
@@ -252,27 +511,46 @@ def _preprocess_transform(docs: Union[str, list, np.ndarray, pd.Series, pd.DataF
         columns (list<str>) : When working with a pandas dataframe or csv file, specifies the columns to use, if first_row != 'header'. Truncate the data if there is too much columns & add some if they are missing (default : ['docs', 'tags'])
         sep (str): When working with a pandas dataframe or csv file, specifies the csv separator (default: ',')
         nrows (int) : When working with a pandas dataframe or csv file, specifies the maximum number of lines to read (default: 0 we take it all)
+        compiled (bool): If True, the pipeline is compiled into a single function (cf. compile_pipeline) (default: False)
+        n_jobs (int): Number of processes used to process the chunks in parallel, -1 means all the CPUs (default: 1)
+        cache (str | PipelineCache): Persistent cache of the outputs (or path to its SQLite file), outputs of documents already processed by the same pipeline are reused (default: None)
+        string_dtype (str): 'pyarrow' to process the documents as Arrow-backed strings (string[pyarrow], faster for some transformations), 'object' as Python objects, None to keep their dtype. It is also the dtype of the pd.Series outputs (default: None)
         pandas_args : When working with a pandas dataframe or csv file, specifies arguments to pass to pandas
     Raises:
         ValueError: If chunksize < 0
         ValueError: If first_row is different than 'header', 'data' or 'skip'
         ValueError: If nrows < 0
+        ValueError: If n_jobs is 0 or < -1
     Returns:
-        ?: Preprocessed documents (the initial type is preserved except for str ending by .csv -> pd.DataFrame)
+        ?: Preprocessed documents (the initial type is preserved, files -> path to the output file, in the same format)
     '''
 
     # Get docs type
     docs_type = utils.get_docs_type(docs)
+    # Get the number of processes to use
+    n_jobs = _get_n_jobs(n_jobs, pipeline)
     # Get nb of elements to process
-    docs_length = utils.get_docs_length(docs, first_row=first_row, sep=sep, nrows=nrows)
-    max_chunksize = min(chunksize, docs_length) if chunksize != 0 else docs_length
+    # A csv file processed chunkwise is streamed, we don't read it entirely beforehand just to count its rows
+    if docs_type == 'file_path' and chunksize != 0:
+        max_chunksize = chunksize
+    else:
+        docs_length = utils.get_docs_length(docs, first_row=first_row, sep=sep, nrows=nrows)
+        # If not specified, the chunksize is set such that each process gets one chunk
+        if n_jobs > 1 and chunksize == 0:
+            chunksize = max(1, math.ceil(docs_length / n_jobs))
+        max_chunksize = min(chunksize, docs_length) if chunksize != 0 else docs_length
     # We need to deepcopy the data if it is a pandas dataframe
     if docs_type in ('pd.DataFrame', 'file_path'):
         docs_copy = copy.deepcopy(docs)
     else:
         docs_copy = docs  # Not really a copy, no need & avoid memory waste
-    gen = utils.get_generator(docs_copy, chunksize=chunksize, first_row=first_row,
-                              columns=columns, sep=sep, nrows=nrows, **pandas_args)
+    # Parquet & arrow files are streamed as pyarrow Tables, only the column to process is converted to pandas
+    is_columnar = docs_type == 'file_path' and utils.get_file_format(docs_copy) in ('parquet', 'arrow')
+    if is_columnar:
+        gen = utils.get_df_generator_from_columnar(docs_copy, chunksize=chunksize, nrows=nrows, as_arrow=True)
+    else:
+        gen = utils.get_generator(docs_copy, chunksize=chunksize, first_row=first_row,
+                                  columns=columns, sep=sep, nrows=nrows, **pandas_args)
     # Get the columns name that need to be processed (if working with a dataframe or csv file)
     docs_column = utils.get_column_to_be_processed(docs_copy, prefered_column=prefered_column,
                                                    first_row=first_row, columns=columns, sep=sep)
@@ -286,30 +564,48 @@ def _preprocess_transform(docs: Union[str, list, np.ndarray, pd.Series, pd.DataF
             column_to_write = docs_column
     elif docs_type == 'pd.DataFrame':
         column_to_write = utils.get_new_column_name(list(docs_copy.columns), docs_column) if not modify_data else docs_column
+    # The pipeline key must be computed on the pipeline definition, hence before compilation
+    pipeline_key = get_pipeline_key(pipeline) if cache is not None else None
+    if cache is not None and pipeline_key is None:
+        logger.warning("The pipeline can't be identified across runs (eg. it contains lambda functions), the cache is not used")
+    # The whole pipeline can be compiled into a single transformation
+    if compiled:
+        pipeline = [compile_pipeline(pipeline)]
+    # Outputs already in the cache are reused, the pipeline is only applied on the other documents
+    if pipeline_key is not None:
+        if isinstance(cache, str):
+            cache = PipelineCache(cache)
+        pipeline = [CachedPipeline(functools.partial(process_block_of_data, pipeline=pipeline, max_chunksize=max_chunksize),
+                                   pipeline_key, cache)]
     docs_outputs = []  # Will contain the reults of the preprocessing pipeline if we are note working with csv files
-    # Chunk iteration
-
-        
-
-    for i, docs_gen in enumerate(gen):
-        if chunksize != 0:
-            logger.info(f"Processing chunck n°{i + 1}:")
-        # For files or dataframes, we get the column to work with
-        if docs_type in ('pd.DataFrame', 'file_path'):
-            docs_input = docs_gen[docs_column]
-        else:
-            docs_input = docs_gen
-        # Sequential processing of all the pipeline transformations
-        docs_input=process_block_of_data(docs_input, pipeline, max_chunksize)
-        # If working with a file, we append the processed chunk to the newly created result file
-        if docs_type == 'file_path':
-            docs_gen[column_to_write] = docs_input
-            with_header = True if i == 0 else False
-            with open(new_csv_file, 'a', encoding='utf-8') as f:
-                docs_gen.to_csv(f, header=with_header, sep=sep, index=False)
-        # Otherwise it is appended to docs_outputs
-        else:
-            docs_outputs.append(docs_input)
+    # For files or dataframes, we get the column to work with
+    if is_columnar:
+        chunks = ((docs_gen, docs_gen.column(docs_column).to_pandas()) for docs_gen in gen)
+    elif docs_type in ('pd.DataFrame', 'file_path'):
+        chunks = ((docs_gen, docs_gen[docs_column]) for docs_gen in gen)
+    else:
+        chunks = ((docs_gen, docs_gen) for docs_gen in gen)
+    # Parquet & arrow outputs are written chunk by chunk (one row group / record batch per chunk)
+    writer = utils.ColumnarFileWriter(new_csv_file) if is_columnar else None
+    try:
+        # Chunk iteration
+        for i, (docs_gen, docs_input) in enumerate(_process_chunks(chunks, pipeline, max_chunksize, n_jobs, string_dtype)):
+            if chunksize != 0:
+                logger.info(f"Processed chunck n°{i + 1}")
+            if is_columnar:
+                writer.write(utils.set_arrow_column(docs_gen, column_to_write, docs_input))
+            # If working with a file, we append the processed chunk to the newly created result file
+            elif docs_type == 'file_path':
+                docs_gen[column_to_write] = docs_input
+                with_header = True if i == 0 else False
+                with open(new_csv_file, 'a', encoding='utf-8') as f:
+                    docs_gen.to_csv(f, header=with_header, sep=sep, index=False)
+            # Otherwise it is appended to docs_outputs
+            else:
+                docs_outputs.append(docs_input)
+    finally:
+        if writer is not None:
+            writer.close()
     # Manage return types, either a str, a path to the result file, a list, a np.ndarray, a pd.Series or a Dataframe
     if docs_type == 'file_path':
         return new_csv_file
@@ -328,6 +624,62 @@ def _preprocess_transform(docs: Union[str, list, np.ndarray, pd.Series, pd.DataF
             return docs_copy
 
 
+def _get_n_jobs(n_jobs: int, pipeline: list) -> int:
+    '''Gets the number of processes to use to process the chunks
+
+    Args:
+        n_jobs (int): Number of processes asked for, -1 means all the CPUs
+        pipeline (list): Pipeline to apply
+    Raises:
+        ValueError: If n_jobs is 0 or < -1
+    Returns:
+        int: Number of processes to use
+    '''
+    if n_jobs == 0 or n_jobs < -1:
+        raise ValueError('n_jobs parameter must be >= 1 or -1')
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs > 1:
+        # The pipeline is sent to the worker processes, hence it must be picklable (eg. no lambda functions)
+        try:
+            pickle.dumps(pipeline)
+        except Exception:
+            logger.warning("The pipeline can't be pickled (eg. it contains lambda functions), it will be processed in a single process")
+            n_jobs = 1
+    return n_jobs
+
+
+def _process_chunks(chunks, pipeline: list, max_chunksize: int, n_jobs: int = 1, string_dtype: Union[str, None] = None):
+    '''Applies the pipeline on each chunk, the results are yielded in the same order as the chunks
+
+    Args:
+        chunks (generator): Tuples (raw chunk, documents of the chunk to process)
+        pipeline (list): List of transformations to apply
+        max_chunksize (int): Size of the biggest chunk
+    Kwargs:
+        n_jobs (int): Number of processes to use (default: 1)
+        string_dtype (str): dtype used to process the documents, cf. process_block_of_data (default: None)
+    Returns:
+        (generator): Tuples (raw chunk, processed documents of the chunk)
+    '''
+    if n_jobs == 1:
+        for raw_chunk, docs_input in chunks:
+            yield raw_chunk, process_block_of_data(docs_input, pipeline, max_chunksize, string_dtype=string_dtype)
+        return
+    logger.info(f"Processing the chunks with {n_jobs} processes")
+    # The number of chunks sent to the pool is bounded, so that a big file is not fully loaded in memory
+    max_pending = 2 * n_jobs
+    pending = []
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        for raw_chunk, docs_input in chunks:
+            pending.append((raw_chunk, executor.submit(process_block_of_data, docs_input, pipeline, max_chunksize, string_dtype=string_dtype)))
+            if len(pending) >= max_pending:
+                raw_chunk, future = pending.pop(0)
+                yield raw_chunk, future.result()
+        for raw_chunk, future in pending:
+            yield raw_chunk, future.result()
+
+
 def check_pipeline_order(pipeline: list) -> None:
     '''Checks the order of transformations in the pipeline, warnings are displayed if unexpected behaviours could occur
 
@@ -419,10 +771,10 @@ def listing_count_words(docs: pd.Series) -> pd.DataFrame:
         docs (pd.Series): Documents to process
     Returns:
         pd.DataFrame: Dataframe listing all the words appearing in the documents along with their respective count
+            (in alphabetical order, cf. Vocabulary to count a corpus chunk by chunk)
     '''
     logger.debug('Calling api.listing_count_words')
-    words = list([word for sentence in docs.str.split() for word in sentence])
-    return pd.DataFrame(words, columns=['word']).groupby('word').size().to_frame('count').reset_index()
+    return Vocabulary().fit(docs).to_frame(sort_by='word')
 
 
 @utils.data_agnostic_input
@@ -435,7 +787,7 @@ def list_one_appearance_word(docs: pd.Series) -> pd.Series:
         pd.Series: List of the words appearing only once
     '''
     logger.debug('Calling fonction api.list_one_appearance_word')
-    count_words = listing_count_words(docs)
+    count_words = Vocabulary().fit(docs).to_frame(sort_by='word')
     # Return result (le reset index permet juste d'avoir un index continue)
     return count_words[count_words['count'] == 1]['word'].reset_index(drop=True)
 
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+## Arrow compute kernels of some basic transformations
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# Versions of some transformations of basic.py running on Arrow-backed strings (string[pyarrow]) with the
+# pyarrow compute kernels, without creating a Python str object per document.
+# The regex of basic.py are translated for RE2 (the regex engine of Arrow): the Python character classes (\s, \w)
+# are replaced by explicit lists of code points, hence the results are exactly the same as with the re module.
+# Each kernel returns None if it can't be used (pyarrow not installed, not Arrow-backed strings, unsupported
+# arguments...), the transformation then falls back on its Python implementation (cf. use_kernel).
+#
+# Fonctions :
+# - use_kernel -> Decorator using an Arrow kernel for Arrow-backed strings, with a fallback on the decorated function
+# - get_true_spaces -> Replaces all whitespaces by a single space
+# - to_lower -> Transforms the string to lower case
+# - remove_punct -> Replaces all non alpha-numeric characters by spaces
+# - trim_string -> Trims spaces at the beginning and ending of the string (multiple spaces become one)
+# - remove_leading_and_ending_spaces -> Removes leading and trailing spaces
+# - remove_numeric -> Replaces numeric strings by a space
+
+
+import re
+import sys
+import logging
+import functools
+import pandas as pd
+from functools import wraps
+from typing import Union, Callable
+
+from words_n_fun import utils
+
+if utils.PYARROW_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Transformations (USAGE names) having an Arrow kernel
+KERNELS = {'get_true_spaces', 'to_lower', 'remove_punct', 'trim_string', 'remove_leading_and_ending_spaces', 'remove_numeric'}
+
+
+def use_kernel(kernel: Callable) -> Callable:
+    '''Decorator using an Arrow kernel to process Arrow-backed strings
+    If the kernel can't be used, the decorated function is applied on Python objects and the result is
+    converted back, hence Arrow-backed strings always give Arrow-backed strings.
+
+    Args:
+        kernel (Callable): Arrow kernel, with the same arguments as the decorated function
+    Returns:
+        Callable: Decorator
+    '''
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(docs: pd.Series, *args, **kwargs) -> pd.Series:
+            if not utils.is_arrow_string(docs):
+                return function(docs, *args, **kwargs)
+            result = kernel(docs, *args, **kwargs)
+            if result is None:
+                logger.debug(f"Arrow kernel not used for {function.__name__}")
+                result = utils.as_string_dtype(function(utils.as_string_dtype(docs, 'object'), *args, **kwargs), 'pyarrow')
+            return result
+        return wrapper
+    return decorator
+
+
+def get_true_spaces(docs: pd.Series) -> Union[pd.Series, None]:
+    '''Replaces all whitespaces by a single space - Arrow kernel
+
+    Args:
+        docs (pd.Series): Documents to process
+    Returns:
+        pd.Series: Modified documents, None if the kernel can't be used
+    '''
+    if not _is_supported(docs):
+        return None
+    return _to_series(pc.replace_substring_regex(_to_arrow(docs), '[' + _re2_class(r'\s') + ']', ' '), docs)
+
+
+def to_lower(docs: pd.Series, threshold_nb_chars: int = 0, use_tqdm: bool = False) -> Union[pd.Series, None]:
+    '''Transforms the string to lower case - Arrow kernel
+    Not used if some documents contain characters lowered differently by Python (eg. 'İ', final sigma)
+
+    Args:
+        docs (pd.Series): Documents to process
+    Kwargs:
+        threshold_nb_chars (int): Minimum number of characters for a token to be transformed to lowercase (def=0).
+        use_tqdm (bool): Unused, the kernel processes all the documents at once (def=False)
+    Returns:
+        pd.Series: Modified documents, None if the kernel can't be used
+    '''
+    if threshold_nb_chars > 1 or not _is_supported(docs):
+        return None
+    values = _to_arrow(docs)
+    if pc.any(pc.match_substring_regex(values, '[' + _lower_mismatches_class() + ']')).as_py():
+        return None
+    return _to_series(pc.utf8_lower(values), docs)
+
+
+def remove_punct(docs: pd.Series, del_parenthesis: bool = True, replacement_char: str = ' ') -> Union[pd.Series, None]:
+    '''Replaces all non alpha-numeric characters by spaces - Arrow kernel
+
+    Args:
+        docs (pd.Series): Documents to process
+    Kwargs:
+        del_parenthesis (bool): Whether parenthesis and slashes are removed (def= True)
+        replacement_char (str): Replacement character (def= ' ')
+    Returns:
+        pd.Series: Modified documents, None if the kernel can't be used
+    '''
+    if not _is_supported(docs, replacement_char):
+        return None
+    kept_characters = _re2_class(r'\w') + _re2_class(r'\s') + ('' if del_parenthesis else r'\(\)\/')
+    return _to_series(pc.replace_substring_regex(_to_arrow(docs), '[^' + kept_characters + ']|_', replacement_char), docs)
+
+
+def trim_string(docs: pd.Series) -> Union[pd.Series, None]:
+    '''Trims spaces: multiple spaces become one - Arrow kernel
+
+    Args:
+        docs (pd.Series): Documents to process
+    Returns:
+        pd.Series: Modified documents, None if the kernel can't be used
+    '''
+    if not _is_supported(docs):
+        return None
+    values = pc.replace_substring_regex(_to_arrow(docs), r'[\t\f\x0b ]{2,}', ' ')
+    return _to_series(pc.utf8_trim(values, characters=_whitespaces()), docs)
+
+
+def remove_leading_and_ending_spaces(docs: pd.Series) -> Union[pd.Series, None]:
+    '''Removes leading and trailing spaces - Arrow kernel
+
+    Args:
+        docs (pd.Series): Documents to process
+    Returns:
+        pd.Series: Modified documents, None if the kernel can't be used
+    '''
+    if not _is_supported(docs):
+        return None
+    return _to_series(pc.utf8_trim(_to_arrow(docs), characters=_whitespaces()), docs)
+
+
+def remove_numeric(docs: pd.Series, replacement_char: str = ' ') -> Union[pd.Series, None]:
+    '''Replaces numeric strings by a space - Arrow kernel
+
+    Args:
+        docs (pd.Series): Documents to process
+    Kwargs:
+        replacement_char (str): Replacement character (def= ' ')
+    Returns:
+        pd.Series: Modified documents, None if the kernel can't be used
+    '''
+    if not _is_supported(docs, replacement_char):
+        return None
+    return _to_series(pc.replace_substring_regex(_to_arrow(docs), '[0-9]+', replacement_char), docs)
+
+
+def _is_supported(docs: pd.Series, replacement_char: str = '') -> bool:
+    '''Checks if the Arrow kernels can be used
+
+    Args:
+        docs (pd.Series): Documents to process
+    Kwargs:
+        replacement_char (str): Replacement string of a regex substitution (def= '')
+    Returns:
+        bool: True if the Arrow kernels can be used
+    '''
+    # Backslashes are handled differently by the re module and RE2 in the replacement strings
+    return utils.PYARROW_AVAILABLE and utils.is_arrow_string(docs) and '\\' not in replacement_char
+
+
+def _to_arrow(docs: pd.Series) -> 'pa.Array':
+    '''Returns the Arrow array of Arrow-backed strings (no copy)'''
+    return pa.array(docs.array)
+
+
+def _to_series(values: 'pa.Array', docs: pd.Series) -> pd.Series:
+    '''Returns a pd.Series with the same dtype, index and name as docs'''
+    return pd.Series(type(docs.array)(pa.chunked_array([values])), index=docs.index, name=docs.name)
+
+
+def _code_points():
+    '''Returns all the code points, except the surrogates (they are not valid in UTF-8 strings), as two strings'''
+    return ''.join(map(chr, range(0xD800))), ''.join(map(chr, range(0xE000, sys.maxunicode + 1)))
+
+
+@functools.lru_cache(maxsize=None)
+def _re2_class(python_class: str) -> str:
+    '''Returns the content of a RE2 character class matching exactly the same code points as a Python character class
+    (eg. \\s or \\w, whose definitions in RE2 are restricted to ASCII characters)
+
+    Args:
+        python_class (str): Content of a Python character class
+    Returns:
+        str: Content of the RE2 character class
+    '''
+    regex = re.compile(f'[{python_class}]+')
+    ranges = []
+    for code_points, offset in zip(_code_points(), (0, 0xE000)):
+        for match in regex.finditer(code_points):
+            start, end = match.start() + offset, match.end() - 1 + offset
+            ranges.append(f'\\x{{{start:X}}}' if start == end else f'\\x{{{start:X}}}-\\x{{{end:X}}}')
+    return ''.join(ranges)
+
+
+@functools.lru_cache(maxsize=1)
+def _whitespaces() -> str:
+    '''Returns the characters matched by \\s with the re module'''
+    return ''.join(re.findall(r'\s', ''.join(_code_points())))
+
+
+@functools.lru_cache(maxsize=1)
+def _lower_mismatches_class() -> str:
+    '''Returns the content of a RE2 character class matching the characters lowered differently by str.lower and
+    the utf8_lower kernel of Arrow (eg. 'İ' -> 'i̇' with Python, final sigma)
+    '''
+    characters = ''.join(_code_points())
+    # utf8_lower maps each code point to a single code point, the characters it modifies are found in one call
+    lowered = pc.utf8_lower(pa.array([characters]))[0].as_py()
+    candidates = {c for c, lower in zip(characters, lowered) if c != lower}
+    candidates.update(c for c in characters if c.lower() != c)
+    # The final sigma depends on the context (cf. str.lower)
+    mismatches = {'Σ'}.union(c for c in candidates if c.lower() != pc.utf8_lower(pa.scalar(c)).as_py())
+    return ''.join(f'\\x{{{ord(c):X}}}' for c in sorted(mismatches))
+
+
+if __name__ == '__main__':
+    logger.error("This script is not stand alone but belongs to a package that has to be imported.")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+## Asyncio API of the preprocessing pipelines
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# Classes :
+# - AsyncPreProcessor -> Asyncio façade of a PreProcessor, concurrent requests are processed by micro-batches
+
+
+import asyncio
+import logging
+import pandas as pd
+from typing import Union, List
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from words_n_fun import utils
+from words_n_fun.preprocessing.api import PreProcessor
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+
+class AsyncPreProcessor():
+    '''Class AsyncPreProcessor:
+    Asyncio façade of a PreProcessor, for web services. The documents of concurrent calls to transform are
+    collected into micro-batches: a batch is processed as soon as it holds max_batch_size documents, or max_wait
+    seconds after its first document. Each batch is processed by the vectorized pipeline (PreProcessor.transform on
+    a pd.Series of its unique documents) in an executor, the event loop is never blocked.
+    '''
+
+    def __init__(self, preprocessor: Union[PreProcessor, None] = None, max_batch_size: int = 256,
+                 max_wait: float = 0.005, executor: Union[Executor, None] = None) -> None:
+        '''Class constructor
+
+        Kwargs:
+            preprocessor (PreProcessor): Preprocessor applied on the batches (default: PreProcessor with the default pipeline)
+            max_batch_size (int): Maximum number of documents of a batch (default: 256)
+            max_wait (float): Maximum time (in seconds) a document waits for other documents before its batch is processed (default: 0.005)
+            executor (Executor): Executor processing the batches, its owner has to shut it down. If None, a single
+                thread executor is created (and shut down by aclose) (default: None)
+        Raises:
+            ValueError: If max_batch_size < 1
+            ValueError: If max_wait < 0
+        '''
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size parameter must be >= 1")
+        if max_wait < 0:
+            raise ValueError("max_wait parameter must be >= 0")
+        self.preprocessor = preprocessor if preprocessor is not None else PreProcessor()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+        # Statistics
+        self.nb_batches = 0
+        self.nb_docs = 0
+        # Documents waiting for their batch, with the futures of their callers
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def transform(self, text: str) -> str:
+        '''Preprocesses a document, along with the documents of the concurrent calls
+
+        Args:
+            text (str): Document to be preprocessed
+        Returns:
+            str: Preprocessed document
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    async def aclose(self) -> None:
+        '''Processes the pending documents, waits for the running batches and shuts down the executor (if created by the class)'''
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> 'AsyncPreProcessor':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _flush(self) -> None:
+        '''Starts the processing of the pending documents'''
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        # A reference to the task is kept until it is done
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list) -> None:
+        '''Processes a batch in the executor and resolves the futures of the callers
+
+        Args:
+            batch (list): Documents, with the futures of their callers
+        '''
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, self._process_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.nb_batches += 1
+            self.nb_docs += len(batch)
+            for (_, future), result in zip(batch, results):
+                # The caller may have been cancelled meanwhile
+                if not future.done():
+                    future.set_result(result)
+
+    def _process_batch(self, texts: list) -> List[str]:
+        '''Processes a batch of documents with the vectorized pipeline (executor side)
+
+        Args:
+            texts (list): Documents to be preprocessed
+        Returns:
+            list: Preprocessed documents
+        '''
+        # Identical documents (frequent in online traffic) are processed once
+        codes, uniques = utils.factorize_series(pd.Series(texts, dtype=object))
+        logger.debug(f"AsyncPreProcessor: batch of {len(uniques)} unique documents out of {len(texts)}")
+        return utils.expand_series(self.preprocessor.transform(uniques), codes).tolist()
+
+
+if __name__ == '__main__':
+    logger.error("This script is not stand alone but belongs to a package that has to be imported.")
@@ -31,33 +31,93 @@
 # - remove_gender_synonyms -> [French] Removes gendered synonyms
 # - lemmatize -> Lemmatizes the document
 # - stemmatize -> Stemmatizes the words of the document
+# - stem_token -> Returns the stem of a token (cached)
 # - add_point -> Adds a dot at the end of each line
 # - deal_with_specific_characters -> Ads spaces before and after some punctuations (, : ; .)
 # - replace_urls -> Replaces URLs by spaces
 # - remove_words -> Replaces words from a list
 # - fix_text -> Fixes numerous inconsistencies within a text (via ftfy)
+# - doc_* -> Document level (str -> str) versions of the above transformations, used by compiled pipelines & PreProcessor.transform_one
+#
+# Arrow-backed strings (string[pyarrow]) are processed with the pyarrow compute kernels by get_true_spaces, to_lower,
+# remove_punct, trim_string, remove_leading_and_ending_spaces & remove_numeric (cf. arrow_kernels.py)
 
 
 
 
-import ftfy
+import re
 import logging
+import functools
+import itertools
 import unicodedata
 import numpy as np
 import pandas as pd
-from typing import List, Union
-from nltk.stem.snowball import FrenchStemmer
+from typing import List, Union, TYPE_CHECKING
 
 from words_n_fun import CustomTqdm as tqdm
+from words_n_fun import register_tqdm_pandas
 from words_n_fun import utils
-from words_n_fun.preprocessing import (lemmatizer, stopwords,
-                                       synonym_malefemale_replacement)
+from words_n_fun.preprocessing import (arrow_kernels, lemmatizer, stopwords,
+                                       synonym_malefemale_replacement, words_matcher)
+
+if TYPE_CHECKING:
+    from nltk.stem.snowball import FrenchStemmer
 
-tqdm.pandas()
 
 # Get logger
 logger = logging.getLogger(__name__)
 
+# Regex shared by the pd.Series and the document level implementations
+RE_TRUE_SPACES = re.compile(r'\s')
+RE_PE_MATCHING = re.compile(utils.get_regex_match_words([r'(permis)\s+(b)'], case_insensitive=True, words_as_regex=True))
+RE_PUNCT = re.compile(r"[^\w\s]|_")
+RE_PUNCT_EXCEPT_PARENTHESIS = re.compile(r"[^\w\s\(\)\/]|_")
+RE_MULTIPLE_SPACES = re.compile(r'[\t\f\v ]{2,}')
+RE_LEADING_AND_ENDING_SPACES = re.compile(r'(^(\s)+)|((\s)+$)')
+RE_NUMERIC = re.compile(r'([0-9]+)')
+RE_SPECIFIC_CHARACTERS = re.compile(r"(\s)?([',.;:])(\s)?")
+# based on : https://stackoverflow.com/questions/6038061/regular-expression-to-find-urls-within-a-string
+RE_URLS = re.compile(r'(?i)(?<!\w|/)(((http|ftp|https):\/\/)*(www\.|ftp\.)+|((http|ftp|https):\/\/)+(www\.|ftp\.)*)([\w_-]+(?:(?:\.[\w_-]+)+))([\w.,@?^=%&:\/~+#-]*[\w@?^=%&\/~+#-])?')
+
+# Maximum number of stems kept in cache (cf. stem_token)
+STEM_CACHE_SIZE = 2 ** 18
+
+
+def _doc_na(text) -> Union[float, None]:
+    '''Returns what the pandas .str accessor returns for a non string value
+    (null values are kept as is, other values become NaN)
+
+    Args:
+        text (?): Non string value
+    Returns:
+        ?: None, NaN or the original null value
+    '''
+    return text if pd.api.types.is_scalar(text) and pd.isna(text) else np.nan
+
+
+@functools.lru_cache(maxsize=1)
+def get_french_stemmer() -> 'FrenchStemmer':
+    '''Returns a (shared) FRENCH stemmer instance
+    nltk is imported on the first call (it takes more than 100 ms)
+
+    Returns:
+        FrenchStemmer: The nltk FRENCH stemmer
+    '''
+    from nltk.stem.snowball import FrenchStemmer
+    return FrenchStemmer()
+
+
+@functools.lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem_token(token: str) -> str:
+    '''Returns the stem of a token (FRENCH stemmer), cached
+    The vocabulary of the documents follows a Zipf law: most tokens are stemmed once per process
+
+    Args:
+        token (str): Token to stem
+    Returns:
+        str: Stem
+    '''
+    return get_french_stemmer().stem(token)
 
 
 def impl_notnull(docs: pd.Series) -> pd.Series:
@@ -85,6 +145,18 @@ def notnull(docs: pd.Series) -> pd.Series:
     logger.debug('Calling basic.remove_non_string')
     return impl_notnull(docs)
 
+
+def doc_notnull(text: str) -> str:
+    '''Replaces null values by an empty character - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    return '' if pd.api.types.is_scalar(text) and pd.isna(text) else text
+
 def impl_remove_non_string(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
     '''Replaces all non strings by an empty character
 
@@ -95,6 +167,7 @@ def impl_remove_non_string(docs: pd.Series, use_tqdm: bool = False) -> pd.Series
         pd.Series: Modified documents
     '''
     if use_tqdm:
+        register_tqdm_pandas()
         return docs.progress_apply(lambda x: x if isinstance(x, str) else '')
     else: 
         return docs.apply(lambda x: x if isinstance(x, str) else '')
@@ -104,7 +177,21 @@ def impl_remove_non_string(docs: pd.Series, use_tqdm: bool = False) -> pd.Series
 def remove_non_string(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
     return impl_remove_non_string(docs, use_tqdm)
 
+
+def doc_remove_non_string(text: str) -> str:
+    '''Replaces all non strings by an empty character - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    return text if isinstance(text, str) else ''
+
+
 @utils.regroup_data_series
+@arrow_kernels.use_kernel(arrow_kernels.get_true_spaces)
 def impl_get_true_spaces(docs: pd.Series) -> pd.Series:
     '''Replaces all whitespaces by a single space
 
@@ -114,7 +201,7 @@ def impl_get_true_spaces(docs: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Modified documents
     '''
-    return docs.str.replace(r'\s', ' ', regex=True)
+    return docs.str.replace(RE_TRUE_SPACES, ' ', regex=True)
 
 @utils.data_agnostic
 def get_true_spaces(docs: pd.Series) -> pd.Series:
@@ -129,7 +216,21 @@ def get_true_spaces(docs: pd.Series) -> pd.Series:
     logger.debug('Calling basic.get_true_spaces')
     return impl_get_true_spaces(docs)
 
+
+def doc_get_true_spaces(text: str) -> str:
+    '''Replaces all whitespaces by a single space - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    return RE_TRUE_SPACES.sub(' ', text) if isinstance(text, str) else _doc_na(text)
+
+
 @utils.regroup_data_series
+@arrow_kernels.use_kernel(arrow_kernels.to_lower)
 def impl_to_lower(docs: pd.Series, threshold_nb_chars: int = 0, use_tqdm: bool = False) -> pd.Series:
     '''Transforms the string to lower case
 
@@ -144,6 +245,7 @@ def impl_to_lower(docs: pd.Series, threshold_nb_chars: int = 0, use_tqdm: bool =
     if threshold_nb_chars > 1:
         logger.debug(f"Applying lower case transform for tokens of at least {threshold_nb_chars} chars.")
         if use_tqdm:
+            register_tqdm_pandas()
             return docs.progress_apply(lambda x: " ".join(x.lower() if len(x) >= threshold_nb_chars else x for x in x.split((" "))) if isinstance(x, str) else None)
         else:
             return docs.apply(lambda x: " ".join(x.lower() if len(x) >= threshold_nb_chars else x for x in x.split((" "))) if isinstance(x, str) else None)
@@ -165,6 +267,25 @@ def to_lower(docs: pd.Series, threshold_nb_chars: int = 0, use_tqdm: bool = Fals
     logger.debug('Calling basic.to_lower')
     return impl_to_lower(docs, threshold_nb_chars, use_tqdm)
 
+
+def doc_to_lower(text: str, threshold_nb_chars: int = 0) -> str:
+    '''Transforms the string to lower case - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        threshold_nb_chars (int): Minimum number of characters for a token to be transformed to lowercase (def=0).
+
+    Returns:
+        str: Modified document
+    '''
+    if threshold_nb_chars > 1:
+        if not isinstance(text, str):
+            return None
+        return " ".join(x.lower() if len(x) >= threshold_nb_chars else x for x in text.split(" "))
+    return text.lower() if isinstance(text, str) else _doc_na(text)
+
+
 @utils.regroup_data_series
 def impl_pe_matching(docs: pd.Series) -> pd.Series:
     '''Specific one-to-one tokens replacements
@@ -177,9 +298,8 @@ def impl_pe_matching(docs: pd.Series) -> pd.Series:
         pd.Series: Modified documents
     '''
     logger.debug('Calling basic.pe_matching')
-    # One can add more rules here
-    regex = utils.get_regex_match_words(['(permis)\s+(b)'], case_insensitive=True, words_as_regex=True)
-    docs = docs.str.replace(regex, r'\2\3', regex=True)
+    # One can add more rules here (cf. RE_PE_MATCHING)
+    docs = docs.str.replace(RE_PE_MATCHING, r'\2\3', regex=True)
     return docs
 
 
@@ -198,6 +318,20 @@ def pe_matching(docs: pd.Series) -> pd.Series:
     return impl_pe_matching(docs)
 
 
+def doc_pe_matching(text: str) -> str:
+    '''Specific one-to-one tokens replacements - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    return RE_PE_MATCHING.sub(r'\2\3', text) if isinstance(text, str) else _doc_na(text)
+
+
+
+@arrow_kernels.use_kernel(arrow_kernels.remove_punct)
 def impl_remove_punct(docs: pd.Series, del_parenthesis: bool = True, replacement_char: str = ' ') -> pd.Series:
     '''Replaces all non alpha-numeric characters by spaces
 
@@ -209,10 +343,7 @@ def impl_remove_punct(docs: pd.Series, del_parenthesis: bool = True, replacement
     Returns:
         pd.Series: Modified documents
     '''
-    if not del_parenthesis:
-        regex = r"[^\w\s\(\)\/]|_"
-    else:
-        regex = r"[^\w\s]|_"
+    regex = RE_PUNCT if del_parenthesis else RE_PUNCT_EXCEPT_PARENTHESIS
     return docs.str.replace(regex, replacement_char, regex=True)
 
 @utils.data_agnostic
@@ -231,6 +362,24 @@ def remove_punct(docs: pd.Series, del_parenthesis: bool = True, replacement_char
     return impl_remove_punct(docs, del_parenthesis, replacement_char)
 
 
+def doc_remove_punct(text: str, del_parenthesis: bool = True, replacement_char: str = ' ') -> str:
+    '''Replaces all non alpha-numeric characters by spaces - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        del_parenthesis (bool): Whether parenthesis and slashes are removed (def= True)
+        replacement_char (str): Replacement character (def= ' ')
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        return _doc_na(text)
+    regex = RE_PUNCT if del_parenthesis else RE_PUNCT_EXCEPT_PARENTHESIS
+    return regex.sub(replacement_char, text)
+
+
+@arrow_kernels.use_kernel(arrow_kernels.trim_string)
 def impl_trim_string(docs: pd.Series) -> pd.Series:
     '''Trims spaces: multiple spaces become one
 
@@ -241,7 +390,7 @@ def impl_trim_string(docs: pd.Series) -> pd.Series:
         pd.Series: Modified documents
     '''
     # TODO: better way ?
-    docs = docs.str.replace(r'[\t\f\v ]{2,}', ' ', regex=True)
+    docs = docs.str.replace(RE_MULTIPLE_SPACES, ' ', regex=True)
     docs = impl_remove_leading_and_ending_spaces(docs)
     return docs
 
@@ -260,7 +409,23 @@ def trim_string(docs: pd.Series) -> pd.Series:
     logger.debug('Calling basic.trim_string')
     return impl_trim_string(docs)
 
+
+def doc_trim_string(text: str) -> str:
+    '''Trims spaces: multiple spaces become one - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        return _doc_na(text)
+    return doc_remove_leading_and_ending_spaces(RE_MULTIPLE_SPACES.sub(' ', text))
+
+
 @utils.regroup_data_series
+@arrow_kernels.use_kernel(arrow_kernels.remove_leading_and_ending_spaces)
 def impl_remove_leading_and_ending_spaces(docs: pd.Series) -> pd.Series:
     '''Removes leading and trailing spaces
 
@@ -270,7 +435,7 @@ def impl_remove_leading_and_ending_spaces(docs: pd.Series) -> pd.Series:
     Returns:
         pd.Series: Modified documents
     '''
-    return docs.str.replace(r'(^(\s)+)|((\s)+$)', '', regex=True)
+    return docs.str.replace(RE_LEADING_AND_ENDING_SPACES, '', regex=True)
 
 
 
@@ -287,7 +452,21 @@ def remove_leading_and_ending_spaces(docs: pd.Series) -> pd.Series:
     logger.debug('Calling basic.remove_leading_and_ending_spaces')
     return impl_remove_leading_and_ending_spaces(docs)
 
+
+def doc_remove_leading_and_ending_spaces(text: str) -> str:
+    '''Removes leading and trailing spaces - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    return RE_LEADING_AND_ENDING_SPACES.sub('', text) if isinstance(text, str) else _doc_na(text)
+
+
 @utils.regroup_data_series
+@arrow_kernels.use_kernel(arrow_kernels.remove_numeric)
 def impl_remove_numeric(docs: pd.Series, replacement_char: str = ' ') -> pd.Series:
     '''Replaces numeric strings by a space
 
@@ -298,7 +477,7 @@ def impl_remove_numeric(docs: pd.Series, replacement_char: str = ' ') -> pd.Seri
     Returns:
         pd.Series: Modified documents
     '''
-    return docs.str.replace(r'([0-9]+)', replacement_char, regex=True)
+    return docs.str.replace(RE_NUMERIC, replacement_char, regex=True)
 
 
 @utils.data_agnostic
@@ -315,8 +494,23 @@ def remove_numeric(docs: pd.Series, replacement_char: str = ' ') -> pd.Series:
     logger.debug('Calling basic.remove_numeric')
     return impl_remove_numeric(docs, replacement_char)
 
+
+def doc_remove_numeric(text: str, replacement_char: str = ' ') -> str:
+    '''Replaces numeric strings by a space - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        replacement_char (str): Replacement character (def= ' ')
+    Returns:
+        str: Modified document
+    '''
+    return RE_NUMERIC.sub(replacement_char, text) if isinstance(text, str) else _doc_na(text)
+
+
 def impl_remove_stopwords(docs: pd.Series, opt: str = 'all', set_to_add: Union[list, None] = None,
-                     set_to_remove: Union[list, None] = None) -> pd.Series:
+                     set_to_remove: Union[list, None] = None, engine: str = 'token',
+                     matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> pd.Series:
     '''Removes stopwords
 
     Args:
@@ -325,16 +519,19 @@ def impl_remove_stopwords(docs: pd.Series, opt: str = 'all', set_to_add: Union[l
         opt (str): Specifies which stopwords set are used, cf stopwords.py (def='all')
         set_to_add (list): List of words to append to the stopwords list
         set_to_remove (list): List of words to remove from the stopwords list
+        engine (str): 'token' or 'regex', same results, cf stopwords.py (def='token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher, cf. stopwords.get_stopwords_matcher (def=None)
     Returns:
         pd.Series: Modified documents
     '''
     # stopwords.remove_stopwords use data_agnostic and regroup_data_series wrappers already
-    return stopwords.remove_stopwords(docs, opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove)
+    return stopwords.remove_stopwords(docs, opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove, engine=engine, matcher=matcher)
 
 
 # called function already with wrappers
 def remove_stopwords(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame], opt: str = 'all', set_to_add: Union[list, None] = None,
-                     set_to_remove: Union[list, None] = None) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
+                     set_to_remove: Union[list, None] = None, engine: str = 'token',
+                     matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
     '''Removes stopwords
 
     Args:
@@ -343,11 +540,32 @@ def remove_stopwords(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame]
         opt (str): Specifies which stopwords set are used, cf stopwords.py (def='all')
         set_to_add (list): List of words to append to the stopwords list
         set_to_remove (list): List of words to remove from the stopwords list
+        engine (str): 'token' or 'regex', same results, cf stopwords.py (def='token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher, cf. stopwords.get_stopwords_matcher (def=None)
     Returns:
         pd.Series: Modified documents
     '''
     logger.debug('Calling basic.remove_stopwords')
-    return impl_remove_stopwords(docs, opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove)
+    return impl_remove_stopwords(docs, opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove, engine=engine, matcher=matcher)
+
+
+def doc_remove_stopwords(text: str, opt: str = 'all', set_to_add: Union[list, None] = None,
+                         set_to_remove: Union[list, None] = None, engine: str = 'token',
+                         matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> str:
+    '''Removes stopwords - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        opt (str): Specifies which stopwords set are used, cf stopwords.py (def='all')
+        set_to_add (list): List of words to append to the stopwords list
+        set_to_remove (list): List of words to remove from the stopwords list
+        engine (str): 'token' or 'regex', same results, cf stopwords.py (def='token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher, cf. stopwords.get_stopwords_matcher (def=None)
+    Returns:
+        str: Modified document
+    '''
+    return stopwords.doc_remove_stopwords(text, opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove, engine=engine, matcher=matcher)
 
 @utils.regroup_data_series
 def impl_remove_accents(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
@@ -362,6 +580,7 @@ def impl_remove_accents(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
         pd.Series: Modified documents
     '''
     if use_tqdm:
+        register_tqdm_pandas()
         return docs.progress_apply(lambda x: ''.join((c for c in unicodedata.normalize('NFD', x) if unicodedata.category(c) != 'Mn')) if isinstance(x, str) else None)
     else:
         return docs.apply(lambda x: ''.join((c for c in unicodedata.normalize('NFD', x) if unicodedata.category(c) != 'Mn')) if isinstance(x, str) else None)
@@ -381,65 +600,117 @@ def remove_accents(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
     '''
     return impl_remove_accents(docs, use_tqdm)
 
-def impl_remove_gender_synonyms(docs: pd.Series) -> pd.Series:
+
+def doc_remove_accents(text: str) -> str:
+    '''Removes all accents and special characters (ç..) - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        return None
+    return ''.join((c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn'))
+
+def impl_remove_gender_synonyms(docs: pd.Series, index: Union[synonym_malefemale_replacement.GenderSynonymIndex, None] = None) -> pd.Series:
     '''[French] Removes gendered synonyms
     # Find occurences such as "male version / female version" (eg: Coiffeur / Coiffeuse)
     # By convention, the male version is kept (in accordance with the lemmatizer)
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        index (GenderSynonymIndex): Index of the synonyms of the corpus, cf. synonym_malefemale_replacement (default: None)
 
     Returns:
         pd.Series: Modified documents
     '''
     # synonym_malefemale_replacement.remove_gender_synonyms uses data_agnostic and regroup_data_series wrappers already
-    return synonym_malefemale_replacement.remove_gender_synonyms(docs)
+    return synonym_malefemale_replacement.remove_gender_synonyms(docs, index=index)
 
 
 # wrappers in the main function
-def remove_gender_synonyms(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame]) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
+def remove_gender_synonyms(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame],
+                           index: Union[synonym_malefemale_replacement.GenderSynonymIndex, None] = None) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
     '''[French] Removes gendered synonyms
     # Find occurences such as "male version / female version" (eg: Coiffeur / Coiffeuse)
     # By convention, the male version is kept (in accordance with the lemmatizer)
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        index (GenderSynonymIndex): Index of the synonyms of the corpus, cf. synonym_malefemale_replacement (default: None)
 
     Returns:
         pd.Series: Modified documents
     '''
     logger.debug('Calling basic.remove_gender_synonyms')
-    return impl_remove_gender_synonyms(docs)
+    return impl_remove_gender_synonyms(docs, index=index)
+
+
+def doc_remove_gender_synonyms(text: str, index: Union[synonym_malefemale_replacement.GenderSynonymIndex, None] = None) -> str:
+    '''[French] Removes gendered synonyms - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        index (GenderSynonymIndex): Index of the synonyms of the corpus, cf. synonym_malefemale_replacement (default: None)
+
+    Returns:
+        str: Modified document
+    '''
+    return synonym_malefemale_replacement.doc_remove_gender_synonyms(text, index=index)
 
 # lemmatizer.lemmatize has already wrappers
-def impl_lemmatize(docs: pd.Series) -> pd.Series:
+def impl_lemmatize(docs: pd.Series, batch_size: int = lemmatizer.LEMMATIZER_BATCH_SIZE, n_process: int = 1) -> pd.Series:
     '''Lemmatizes the documents
     Appel à une API externe
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        batch_size (int): Number of documents processed at once by the spacy model (def=lemmatizer.LEMMATIZER_BATCH_SIZE)
+        n_process (int): Number of processes used by the spacy model, -1 means all the CPUs (def=1)
 
     Returns:
         pd.Series: Modified documents
     '''
     logger.debug('Calling basic.lemmatize')
     # Process
-    return lemmatizer.lemmatize(docs)
+    return lemmatizer.lemmatize(docs, batch_size=batch_size, n_process=n_process)
 
 # lemmatizer.lemmatize has already wrappers
-def lemmatize(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame]) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
+def lemmatize(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame], batch_size: int = lemmatizer.LEMMATIZER_BATCH_SIZE,
+              n_process: int = 1) -> Union[str, list, np.ndarray, pd.Series, pd.DataFrame]:
     '''Lemmatizes the documents
     Appel à une API externe
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        batch_size (int): Number of documents processed at once by the spacy model (def=lemmatizer.LEMMATIZER_BATCH_SIZE)
+        n_process (int): Number of processes used by the spacy model, -1 means all the CPUs (def=1)
 
     Returns:
         pd.Series: Modified documents
     '''
     logger.debug('Calling basic.lemmatize')
     # Process
-    return impl_lemmatize(docs)
+    return impl_lemmatize(docs, batch_size=batch_size, n_process=n_process)
+
+
+def doc_lemmatize(text: str) -> str:
+    '''Lemmatizes the document - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    return lemmatizer.doc_lemmatize(text)
 
 @utils.regroup_data_series
 def impl_stemmatize(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
@@ -447,16 +718,27 @@ def impl_stemmatize(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        use_tqdm (bool): Whether tqdm should be used on the vocabulary (default: False)
 
     Returns:
         pd.Series: Modified documents
     '''
-    stemmer = FrenchStemmer()
+    # The documents are split at once, each unique token of the batch is stemmed once
+    is_string = np.fromiter((isinstance(text, str) for text in docs), dtype=bool, count=len(docs))
+    tokens_by_doc = [text.split(' ') for text in docs[is_string]]
+    nb_tokens = np.fromiter((len(tokens) for tokens in tokens_by_doc), dtype=np.int64, count=len(tokens_by_doc))
+    tokens = np.array(list(itertools.chain.from_iterable(tokens_by_doc)), dtype=object)
+    codes, vocabulary = pd.factorize(tokens)
     if use_tqdm:
-        return docs.progress_apply(lambda x: " ".join(stemmer.stem(x) for x in x.split(' ')) if isinstance(x, str) else None)
-    else:
-        return docs.apply(lambda x: " ".join(stemmer.stem(x) for x in x.split(' ')) if isinstance(x, str) else None)
-
+        vocabulary = tqdm(iterable=vocabulary)
+    stems = np.array([stem_token(token) for token in vocabulary], dtype=object)
+    # Rebuild the documents
+    stemmed = stems[codes].tolist()
+    ends = np.cumsum(nb_tokens).tolist()
+    results = np.full(len(docs), None, dtype=object)
+    results[is_string] = [' '.join(stemmed[end - nb:end]) for end, nb in zip(ends, nb_tokens.tolist())]
+    return pd.Series(results, index=docs.index, name=docs.name, dtype=object)
 
 
 @utils.data_agnostic
@@ -473,6 +755,20 @@ def stemmatize(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
     logger.warning('Calling the FRENCH stemmer')
     return impl_stemmatize(docs)
 
+
+def doc_stemmatize(text: str) -> str:
+    '''Stemmatizes words in the document - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        return None
+    return " ".join([stem_token(x) for x in text.split(' ')])
+
 @utils.regroup_data_series
 def impl_add_point(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
     '''Adds a dot at the end of each line
@@ -484,6 +780,7 @@ def impl_add_point(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
         pd.Series: Modified documents
     '''
     if use_tqdm:
+        register_tqdm_pandas()
         return docs.progress_apply(lambda x: (x + '.' if not x.endswith('.') else x) if isinstance(x, str) else None)
     else:
         return docs.apply(lambda x: (x + '.' if not x.endswith('.') else x) if isinstance(x, str) else None)
@@ -502,6 +799,20 @@ def add_point(docs: pd.Series, use_tqdm: bool = False) -> pd.Series:
     logger.debug('Calling basic.add_point')
     return impl_add_point(docs, use_tqdm)
 
+
+def doc_add_point(text: str) -> str:
+    '''Adds a dot at the end of the document - document level
+
+    Args:
+        text (str): Document to process
+
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        return None
+    return text + '.' if not text.endswith('.') else text
+
 @utils.regroup_data_series
 def impl_deal_with_specific_characters(docs: pd.Series) -> pd.Series:
     '''Adds spaces before and after some punctuations (, : ; .)
@@ -511,7 +822,7 @@ def impl_deal_with_specific_characters(docs: pd.Series) -> pd.Series:
     Returns:
       pd.Series: Modified documents
     '''
-    return docs.str.replace(r"(\s)?([',.;:])(\s)?", r' \2 ', regex=True)
+    return docs.str.replace(RE_SPECIFIC_CHARACTERS, r' \2 ', regex=True)
 
 
 @utils.data_agnostic
@@ -526,6 +837,17 @@ def deal_with_specific_characters(docs: pd.Series) -> pd.Series:
     logger.debug('Calling basic.deal_with_specific_characters')
     return impl_deal_with_specific_characters(docs)
 
+
+def doc_deal_with_specific_characters(text: str) -> str:
+    '''Adds spaces before and after some punctuations (, : ; .) - document level
+
+    Args:
+      text (str): Document to process
+    Returns:
+      str: Modified document
+    '''
+    return RE_SPECIFIC_CHARACTERS.sub(r' \2 ', text) if isinstance(text, str) else _doc_na(text)
+
 @utils.regroup_data_series
 def impl_replace_urls(docs: pd.Series, replacement_char: str = ' ', replace_with_domain: bool = False) -> pd.Series:
     '''Replaces URLs by either a str or the url domain
@@ -538,12 +860,10 @@ def impl_replace_urls(docs: pd.Series, replacement_char: str = ' ', replace_with
     Returns:
         pd.Series: Modified documents
     '''
-    # based on : https://stackoverflow.com/questions/6038061/regular-expression-to-find-urls-within-a-string
-    regex = r'(?i)(?<!\w|/)(((http|ftp|https):\/\/)*(www\.|ftp\.)+|((http|ftp|https):\/\/)+(www\.|ftp\.)*)([\w_-]+(?:(?:\.[\w_-]+)+))([\w.,@?^=%&:\/~+#-]*[\w@?^=%&\/~+#-])?'
     if not replace_with_domain:
-        return docs.str.replace(regex, replacement_char, regex=True)
+        return docs.str.replace(RE_URLS, replacement_char, regex=True)
     else:
-        return docs.str.replace(regex, r' \8 ', regex=True)
+        return docs.str.replace(RE_URLS, r' \8 ', regex=True)
 
 
 @utils.data_agnostic
@@ -560,37 +880,70 @@ def replace_urls(docs: pd.Series, replacement_char: str = ' ', replace_with_doma
     '''
     logger.debug('Calling basic.replace_urls')
     return impl_replace_urls(docs, replacement_char, replace_with_domain)
+
+
+def doc_replace_urls(text: str, replacement_char: str = ' ', replace_with_domain: bool = False) -> str:
+    '''Replaces URLs by either a str or the url domain - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        replacement_char (str): Replacement character (def= ' ')
+        replace_with_domain (bool): Replacement_char is overriden and the url is replaced by its domain (def= False)
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        return _doc_na(text)
+    return RE_URLS.sub(r' \8 ' if replace_with_domain else replacement_char, text)
     
 @utils.regroup_data_series
-def impl_remove_words(docs: pd.Series, words_to_remove: List[str], case_insensitive=False) -> pd.Series:
+def impl_remove_words(docs: pd.Series, words_to_remove: Union[List[str], None] = None, case_insensitive=False, engine: str = 'token',
+                      matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> pd.Series:
     '''Function to remove words from a list
 
     Args:
         docs (pd.Series): Documents to process
-        words_to_remove (list<str>): List of words to remove
+        words_to_remove (list<str>): List of words to remove (not used if matcher is given)
     Kwargs:
         case_insensitive (bool): Whether the replacement is case sensitive (defaut : False)
+        engine (str): 'token' (split on the boundary characters & lookup of the tokens) or 'regex', same results.
+            The regex engine is always used if case_insensitive (defaut : 'token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher, cf. words_matcher.get_matcher (defaut : None)
+    Raises:
+        ValueError: If engine is not 'token' or 'regex'
+        ValueError: If neither words_to_remove nor matcher is given
     Returns:
         pd.Series: Modified documents
     '''
-    regex = utils.get_regex_match_words(words_to_remove, case_insensitive=case_insensitive)
-    return docs.str.replace(regex, '', regex=True)
-    
+    if matcher is None:
+        if words_to_remove is None:
+            raise ValueError("Either words_to_remove or matcher must be given")
+        # The matchers are built once per set of words (cf. words_matcher.MATCHERS)
+        matcher = words_matcher.get_matcher(words_to_remove, case_insensitive=case_insensitive, engine=engine)
+    return matcher.transform(docs)
+
 
 @utils.data_agnostic
-def remove_words(docs: pd.Series, words_to_remove: List[str], case_insensitive=False) -> pd.Series:
+def remove_words(docs: pd.Series, words_to_remove: Union[List[str], None] = None, case_insensitive=False, engine: str = 'token',
+                 matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> pd.Series:
     '''Function to remove words from a list
 
     Args:
         docs (pd.Series): Documents to process
-        words_to_remove (list<str>): List of words to remove
+        words_to_remove (list<str>): List of words to remove (not used if matcher is given)
     Kwargs:
         case_insensitive (bool): Whether the replacement is case sensitive (defaut : False)
+        engine (str): 'token' or 'regex', same results (defaut : 'token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher, cf. words_matcher.get_matcher (defaut : None)
+    Raises:
+        ValueError: If engine is not 'token' or 'regex'
+        ValueError: If neither words_to_remove nor matcher is given
     Returns:
         pd.Series: Modified documents
     '''
     logger.debug('Calling utils.remove_words')
-    return impl_remove_words(docs, words_to_remove, case_insensitive)
+    return impl_remove_words(docs, words_to_remove, case_insensitive, engine, matcher)
 
 @utils.regroup_data_series
 def impl_fix_text(docs: pd.Series, use_tqdm: bool = False,  **ftfy_kwargs) -> pd.Series:
@@ -616,7 +969,9 @@ def impl_fix_text(docs: pd.Series, use_tqdm: bool = False,  **ftfy_kwargs) -> pd
     Returns:
         pd.Series: Modified documents
     '''
+    import ftfy
     if use_tqdm:
+        register_tqdm_pandas()
         return docs.progress_apply(lambda x: ftfy.fix_text(x, **ftfy_kwargs) if isinstance(x, str) else None)
     else:
         return docs.apply(lambda x: ftfy.fix_text(x, **ftfy_kwargs) if isinstance(x, str) else None)
@@ -648,5 +1003,20 @@ def fix_text(docs: pd.Series, use_tqdm: bool = False, **ftfy_kwargs) -> pd.Serie
     logger.debug('Calling basic.fix_text')
     return impl_fix_text(docs, use_tqdm, **ftfy_kwargs)
 
+
+def doc_fix_text(text: str, **ftfy_kwargs) -> str:
+    '''Fixes numerous inconsistencies within a text (via ftfy) - document level
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        ftfy_kwargs (dict): Kwargs forwarded to ftfy
+
+    Returns:
+        str: Modified document
+    '''
+    import ftfy
+    return ftfy.fix_text(text, **ftfy_kwargs) if isinstance(text, str) else None
+
 if __name__ == '__main__':
     logger.error("This script is not stand alone but belongs to a package that has to be imported.")
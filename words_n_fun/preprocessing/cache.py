@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+
+## Persistent cache of the preprocessing pipelines outputs
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# Classes :
+# - PipelineCache -> On-disk (SQLite) store of the pipelines outputs, keyed by (pipeline, document)
+# - CachedPipeline -> Pipeline whose outputs are served from / written to a PipelineCache
+#
+# Fonctions :
+# - get_pipeline_key -> Returns a key identifying a pipeline definition
+# - hash_document -> Returns the key of a document
+
+
+import time
+import types
+import sqlite3
+import inspect
+import hashlib
+import logging
+import functools
+import threading
+import numpy as np
+import pandas as pd
+from typing import Union, Callable, List, Dict
+
+import words_n_fun
+from words_n_fun import utils
+from words_n_fun.preprocessing import lemmatizer
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Version of the cache format & keys, must be incremented when they change
+# (the outputs of the transformations are versioned by the version of the package, cf. get_pipeline_key)
+CACHE_VERSION = 1
+# Steps whose outputs depend on the spacy model of the lemmatizer
+LEMMATIZE_STEPS = {'usage:lemmatize'} | {f"callable:words_n_fun.preprocessing.{module}.{function}"
+                                         for module in ['basic', 'lemmatizer']
+                                         for function in ['impl_lemmatize', 'lemmatize', 'doc_lemmatize']}
+
+
+class PipelineCache():
+    '''Class PipelineCache:
+    Content-addressed store of the outputs of the preprocessing pipelines, backed by a SQLite file.
+    Entries are keyed by a hash of the pipeline definition (cf. get_pipeline_key) and a hash of the document
+    (cf. hash_document), hence the outputs can be reused across runs.
+    When the size of the stored outputs exceeds max_size, the least recently used entries are evicted.
+    '''
+
+    def __init__(self, path: str, max_size: int = 1024**3) -> None:
+        '''Class constructor
+
+        Args:
+            path (str): Path to the SQLite file (created if it does not exist)
+        Kwargs:
+            max_size (int): Maximum size (in bytes) of the stored outputs, 0 means no limit (default: 1 GB)
+        Raises:
+            ValueError: If max_size < 0
+        '''
+        if max_size < 0:
+            raise ValueError("max_size parameter must be >= 0")
+        self.path = path
+        self.max_size = max_size
+        self._connection = None
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def __getstate__(self) -> dict:
+        '''The SQLite connection can't be pickled, a new one is opened after unpickling (eg. in a worker process)'''
+        return {'path': self.path, 'max_size': self.max_size}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['path'], max_size=state['max_size'])
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        '''Lazy opening of the SQLite connection'''
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        return self._connection
+
+    def _init_db(self) -> None:
+        '''Creates the tables if needed'''
+        with self._lock, self.connection as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("CREATE TABLE IF NOT EXISTS entries (pipeline TEXT NOT NULL, document BLOB NOT NULL, "
+                        "value TEXT, size INTEGER NOT NULL, last_access REAL NOT NULL, PRIMARY KEY (pipeline, document))")
+            con.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            con.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            con.executemany("INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)", [('hits',), ('misses',), ('evictions',)])
+
+    def get_many(self, pipeline_key: str, documents: List[str]) -> Dict[str, Union[str, None]]:
+        '''Gets the cached outputs of some documents
+
+        Args:
+            pipeline_key (str): Key of the pipeline (cf. get_pipeline_key)
+            documents (list<str>): Documents to look for
+        Returns:
+            dict: Outputs of the documents found in the cache
+        '''
+        hashes = {hash_document(document): document for document in documents}
+        results = {}
+        with self._lock, self.connection as con:
+            hashes_list = list(hashes.keys())
+            # Batches of 500 to stay below the SQLite variables limit
+            for i in range(0, len(hashes_list), 500):
+                batch = hashes_list[i: i + 500]
+                query = f"SELECT document, value FROM entries WHERE pipeline = ? AND document IN ({','.join('?' * len(batch))})"
+                for document_hash, value in con.execute(query, [pipeline_key] + batch):
+                    results[hashes[document_hash]] = value
+            now = time.time()
+            con.executemany("UPDATE entries SET last_access = ? WHERE pipeline = ? AND document = ?",
+                            [(now, pipeline_key, hash_document(document)) for document in results])
+            con.execute("UPDATE stats SET value = value + ? WHERE name = 'hits'", (len(results),))
+            con.execute("UPDATE stats SET value = value + ? WHERE name = 'misses'", (len(hashes) - len(results),))
+        return results
+
+    def set_many(self, pipeline_key: str, outputs: Dict[str, Union[str, None]]) -> None:
+        '''Stores the outputs of some documents
+
+        Args:
+            pipeline_key (str): Key of the pipeline (cf. get_pipeline_key)
+            outputs (dict): Outputs to store (document -> output)
+        '''
+        now = time.time()
+        rows = [(pipeline_key, hash_document(document), value, len(value.encode('utf-8')) if value is not None else 0, now)
+                for document, value in outputs.items()]
+        with self._lock, self.connection as con:
+            con.executemany("INSERT OR REPLACE INTO entries (pipeline, document, value, size, last_access) VALUES (?, ?, ?, ?, ?)", rows)
+        if self.max_size:
+            self.evict()
+
+    def evict(self) -> int:
+        '''Evicts the least recently used entries until the size of the stored outputs is below max_size
+
+        Returns:
+            int: Number of evicted entries
+        '''
+        with self._lock, self.connection as con:
+            total_size = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if not self.max_size or total_size <= self.max_size:
+                return 0
+            # Get the last_access threshold such that enough entries are removed
+            size_to_free = total_size - self.max_size
+            freed_size, nb_evicted, threshold = 0, 0, None
+            for size, last_access in con.execute("SELECT size, last_access FROM entries ORDER BY last_access"):
+                freed_size += size
+                nb_evicted += 1
+                threshold = last_access
+                if freed_size >= size_to_free:
+                    break
+            nb_evicted = con.execute("DELETE FROM entries WHERE last_access <= ?", (threshold,)).rowcount
+            con.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (nb_evicted,))
+        logger.debug(f"{nb_evicted} entries evicted from the cache {self.path}")
+        return nb_evicted
+
+    def stats(self) -> dict:
+        '''Returns the statistics of the cache (cumulated over all the runs using this cache file)
+
+        Returns:
+            dict: Number of hits, misses, evictions, hit rate, number of entries and size of the stored outputs
+        '''
+        with self._lock, self.connection as con:
+            stats = dict(con.execute("SELECT name, value FROM stats").fetchall())
+            stats['entries'], stats['size'] = con.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        nb_lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / nb_lookups if nb_lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        '''Removes all the entries and resets the statistics'''
+        with self._lock, self.connection as con:
+            con.execute("DELETE FROM entries")
+            con.execute("UPDATE stats SET value = 0")
+
+    def close(self) -> None:
+        '''Closes the SQLite connection'''
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class CachedPipeline():
+    '''Class CachedPipeline:
+    Wraps a pd.Series -> pd.Series function applying a pipeline. The outputs of the documents already in the cache
+    are served without running the pipeline, the pipeline is only applied on the other documents.
+    Only strings are cached, other values are always processed.
+    '''
+
+    def __init__(self, function: Callable, pipeline_key: str, cache: PipelineCache) -> None:
+        '''Class constructor
+
+        Args:
+            function (Callable): Function applying the pipeline on a pd.Series
+            pipeline_key (str): Key of the pipeline (cf. get_pipeline_key)
+            cache (PipelineCache): Cache to use
+        '''
+        self.function = function
+        self.pipeline_key = pipeline_key
+        self.cache = cache
+
+    def __call__(self, docs: pd.Series) -> pd.Series:
+        '''Applies the pipeline using the cache
+
+        Args:
+            docs (pd.Series): Documents to process
+        Returns:
+            pd.Series: Processed documents
+        '''
+        codes, uniques = utils.factorize_series(docs)
+        is_str = np.array([isinstance(doc, str) for doc in uniques], dtype=bool)
+        cached = self.cache.get_many(self.pipeline_key, list(uniques[is_str]))
+        to_process = np.array([not is_str[i] or uniques[i] not in cached for i in range(len(uniques))], dtype=bool)
+        logger.debug(f"Cache: {len(cached)} hits, {int(to_process.sum())} documents to process")
+        outputs = uniques.copy()
+        if is_str.any():
+            outputs[is_str] = [cached.get(doc) for doc in uniques[is_str]]
+        if to_process.any():
+            docs_to_process = uniques[to_process].reset_index(drop=True)
+            # The .str accessor of pandas needs at least one string: without any string left to process, a sentinel
+            # one is added and its output dropped (the other values are processed unchanged)
+            nb_docs_to_process = len(docs_to_process)
+            if not is_str[to_process].any():
+                docs_to_process = pd.concat([docs_to_process, pd.Series([''], dtype=object)], ignore_index=True)
+            processed = list(self.function(docs_to_process))[:nb_docs_to_process]
+            outputs[to_process] = list(processed)
+            # Only strings outputs are stored
+            new_outputs = {doc: value for doc, value in zip(uniques[to_process], processed)
+                           if isinstance(doc, str) and (value is None or isinstance(value, str))}
+            if new_outputs:
+                self.cache.set_many(self.pipeline_key, new_outputs)
+        return utils.expand_series(outputs, codes, index=docs.index, name=docs.name)
+
+
+def get_pipeline_key(pipeline: list) -> Union[str, None]:
+    '''Returns a key identifying a pipeline definition
+    Steps are normalized: USAGE names, module level functions (by name & code) and functools.partial (function & arguments).
+    The version of the package is part of the key: the outputs of its transformations may change from one version to another.
+
+    Args:
+        pipeline (list): List of transformations (from the USAGE dict or callables)
+    Returns:
+        str: Key of the pipeline, None if a step can't be identified across runs (eg. lambda functions)
+    '''
+    steps = [_normalize_step(item) for item in pipeline]
+    if any(step is None for step in steps):
+        return None
+    definition = repr((CACHE_VERSION, words_n_fun.__version__, steps))
+    return hashlib.sha256(definition.encode('utf-8')).hexdigest()
+
+
+def _normalize_step(item) -> Union[str, None]:
+    '''Returns a normalized representation of a pipeline step
+
+    Args:
+        item (?): Step of a pipeline
+    Returns:
+        str: Normalized representation, None if the step can't be identified across runs
+    '''
+    if isinstance(item, str):
+        return _add_model_config(f"usage:{item}")
+    if isinstance(item, functools.partial):
+        func = _normalize_step(item.func)
+        if func is None:
+            return None
+        return f"{func}({item.args!r}, {sorted(item.keywords.items())!r})"
+    qualname = getattr(item, '__qualname__', None)
+    if callable(item) and qualname is not None and '<' not in qualname:
+        return _add_model_config(f"callable:{item.__module__}.{qualname}") + _get_code_digest(item)
+    return None
+
+
+def _get_code_digest(function: Callable) -> str:
+    '''Returns a digest of the code of a function (bytecode, constants & names, nested functions included):
+    the key of a pipeline changes when one of its functions is edited
+
+    Args:
+        function (Callable): Function (the function wrapped by decorators is considered)
+    Returns:
+        str: Digest of the code, '' if the function has no Python code (eg. builtins)
+    '''
+    code = getattr(inspect.unwrap(function), '__code__', None)
+    if code is None:
+        return ''
+    digest = hashlib.sha256()
+    _update_code_digest(digest, code)
+    return f"#{digest.hexdigest()[:16]}"
+
+
+def _update_code_digest(digest, code: types.CodeType) -> None:
+    '''Adds a code object to a digest (cf. _get_code_digest)
+
+    Args:
+        digest (hashlib hash): Digest to update
+        code (types.CodeType): Code object
+    '''
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode('utf-8'))
+    for constant in code.co_consts:
+        _update_constant_digest(digest, constant)
+
+
+def _update_constant_digest(digest, constant) -> None:
+    '''Adds a constant of a code object to a digest, independently of the hash seed (frozensets are sorted)
+
+    Args:
+        digest (hashlib hash): Digest to update
+        constant (?): Constant (code object, tuple, frozenset, str, number...)
+    '''
+    if isinstance(constant, types.CodeType):
+        _update_code_digest(digest, constant)
+    elif isinstance(constant, (tuple, frozenset)):
+        digest.update(b'(' if isinstance(constant, tuple) else b'{')
+        items = constant if isinstance(constant, tuple) else sorted(constant, key=repr)
+        for item in items:
+            _update_constant_digest(digest, item)
+            digest.update(b',')
+        digest.update(b')' if isinstance(constant, tuple) else b'}')
+    else:
+        digest.update(repr(constant).encode('utf-8'))
+
+
+def _add_model_config(step: str) -> str:
+    '''Adds the spacy model selected (cf. lemmatizer.set_spacy_model) to the lemmatization steps:
+    their outputs depend on the model
+
+    Args:
+        step (str): Normalized representation of a step
+    Returns:
+        str: Normalized representation, with the model config for the lemmatization steps
+    '''
+    if step in LEMMATIZE_STEPS:
+        return f"{step}[{lemmatizer._model_config['model_name']}, {sorted(lemmatizer._model_config['exclude'])!r}]"
+    return step
+
+
+def hash_document(document: str) -> bytes:
+    '''Returns the key of a document
+
+    Args:
+        document (str): Document
+    Returns:
+        bytes: Key of the document
+    '''
+    return hashlib.blake2b(document.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+if __name__ == '__main__':
+    logger.error("This script is not stand alone but belongs to a package that has to be imported.")
@@ -20,82 +20,205 @@
 #
 # Fonctions :
 # - lemmatize -> Lemmatizes text
+# - doc_lemmatize -> Lemmatizes text - document level
+# - set_spacy_model -> Sets the spacy model used by the lemmatizer
+# - get_spacy_model -> Returns the spacy model used by the lemmatizer (loaded on first use)
+# - preload -> Loads the spacy model (eg. before forking workers)
 
 
 # Get logger
 import logging
-import sys
+import re
+import threading
+import importlib.util
 
 import pandas as pd
+from typing import Union, List, TYPE_CHECKING
 from words_n_fun import utils
 
+if TYPE_CHECKING:
+    import spacy
+
 logger = logging.getLogger(__name__)
 
 
+# Default spacy model
+DEFAULT_MODEL = 'fr_core_news_sm'
+# Components of fr_core_news_sm not needed for the lemmas (the lemmatizer only relies on tok2vec, morphologizer & attribute_ruler)
+EXCLUDED_COMPONENTS = ['parser', 'ner', 'senter']
+# Default number of documents processed at once by the model (cf. spacy Language.pipe)
+LEMMATIZER_BATCH_SIZE = 1000
+
 # Spacy has to be installed for the lemmatizer to work
 # Since it is an optional dependency, a warning is raised if a call to the lemmatizer is done
-if 'spacy' in sys.modules:
-    import spacy
-    try:
-        if not spacy.util.is_package("fr_core_news_sm"):
-            logger.info("Downloading fr_core_news_sm")
-            spacy.cli.download('fr_core_news_sm')
-        spacy_model = spacy.load('fr_core_news_sm')
-        LEMMATIZER_AVAILABLE = True
-    except:
-        spacy_model = None
-        LEMMATIZER_AVAILABLE = False
-        logger.error("Unexpected error downloading or loading spacy model fr_core_news_sm")
-else:
-    LEMMATIZER_AVAILABLE = False
+# Spacy and its model are only imported / loaded on the first lemmatization (cf. get_spacy_model)
+LEMMATIZER_AVAILABLE = importlib.util.find_spec('spacy') is not None
+if not LEMMATIZER_AVAILABLE:
     logger.warning("Spacy has not been found, lemmatizer features are not available.")
     logger.warning("To use it, you must install spacy. For instance: pip install words-n-fun[lemmatizer]")
 
+# Model used by the lemmatizer (cf. set_spacy_model) & loaded models
+_model_config = {'model_name': DEFAULT_MODEL, 'exclude': tuple(EXCLUDED_COMPONENTS)}
+_models = {}
+_models_lock = threading.Lock()
+
+
+def set_spacy_model(model_name: str = DEFAULT_MODEL, exclude: Union[List[str], None] = None) -> None:
+    '''Sets the spacy model used by the lemmatizer (loaded on its first use)
+
+    Kwargs:
+        model_name (str): Name of an installed spacy model (def=DEFAULT_MODEL)
+        exclude (list<str>): Components of the model not loaded, None for EXCLUDED_COMPONENTS (def=None)
+    '''
+    _model_config['model_name'] = model_name
+    _model_config['exclude'] = tuple(EXCLUDED_COMPONENTS if exclude is None else exclude)
+
+
+def get_spacy_model() -> 'spacy.language.Language':
+    '''Returns the spacy model used by the lemmatizer (cf. set_spacy_model), loaded once per process (thread safe)
+    fr_core_news_sm is downloaded if it is not installed.
+
+    Raises:
+        ImportError : If spacy is not found
+        Exception : If the model can't be loaded
+    Returns:
+        spacy.language.Language: The spacy model
+    '''
+    key = (_model_config['model_name'], _model_config['exclude'])
+    model = _models.get(key)
+    if model is not None:
+        return model
+    _check_lemmatizer()
+    with _models_lock:
+        # The model may have been loaded by another thread meanwhile
+        if key not in _models:
+            _models[key] = _load_spacy_model(*key)
+        return _models[key]
+
+
+def preload(model_name: Union[str, None] = None, exclude: Union[List[str], None] = None) -> 'spacy.language.Language':
+    '''Sets (if model_name is given) and loads the spacy model used by the lemmatizer
+    To be called in a parent process, its forked workers then share the model (copy-on-write) instead of loading it
+
+    Kwargs:
+        model_name (str): Name of an installed spacy model, None to keep the current one (def=None)
+        exclude (list<str>): Components of the model not loaded, None for EXCLUDED_COMPONENTS (def=None)
+    Raises:
+        ImportError : If spacy is not found
+        Exception : If the model can't be loaded
+    Returns:
+        spacy.language.Language: The spacy model
+    '''
+    if model_name is not None:
+        set_spacy_model(model_name, exclude=exclude)
+    return get_spacy_model()
+
+
+def _load_spacy_model(model_name: str, exclude: tuple) -> 'spacy.language.Language':
+    '''Loads a spacy model
+
+    Args:
+        model_name (str): Name of the model
+        exclude (tuple<str>): Components of the model not loaded
+    Raises:
+        Exception : If the model can't be loaded
+    Returns:
+        spacy.language.Language: The spacy model
+    '''
+    import spacy
+    try:
+        if model_name == DEFAULT_MODEL and not spacy.util.is_package(model_name):
+            logger.info(f"Downloading {model_name}")
+            spacy.cli.download(model_name)
+        logger.info(f"Loading spacy model {model_name}")
+        return spacy.load(model_name, exclude=list(exclude))
+    except Exception as e:
+        logger.error(f"Unable to call spacy lemmatizer withouth spacy {model_name} model")
+        raise Exception(f"Unable to call spacy lemmatizer withouth spacy {model_name} model") from e
+
+
+# Preprocessing of the documents before the lemmatization
+RE_NON_WORDS = re.compile(r'\W')
+RE_NUMBERS = re.compile(r"([0-9]+(\.[0-9]+)?)")
+RE_SPACES = re.compile(r'\s+')
+
 
 @utils.data_agnostic
 @utils.regroup_data_series
-def lemmatize(docs: pd.Series) -> pd.Series:
+def lemmatize(docs: pd.Series, batch_size: int = LEMMATIZER_BATCH_SIZE, n_process: int = 1) -> pd.Series:
     '''Text lemmatizer - spacy
-    #   This feature uses the fr_core_news_sm from Spacy to process the text
+    #   This feature uses the fr_core_news_sm from Spacy to process the text (cf. set_spacy_model)
+    #   The documents are streamed through the model by batches (cf. spacy Language.pipe), only the lemmas are kept
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        batch_size (int): Number of documents processed at once by the model (def=LEMMATIZER_BATCH_SIZE)
+        n_process (int): Number of processes used by the model, -1 means all the CPUs (def=1)
 
     Raises:
+        ValueError : If batch_size < 1
+        ValueError : If n_process is 0 or < -1
         ImportError : If spacy is not found
-        Exception : fr_core_news_sm model is not found
+        Exception : The spacy model can't be loaded
     Returns:
         pd.Series: Modified documents
     '''
-    if not LEMMATIZER_AVAILABLE:
-        logger.error("Spacy has not been found, lemmatizer features are not available.")
-        logger.error("To use it, you must install spacy. For instance: pip install words-n-fun[lemmatizer]")
-        raise ImportError("Spacy has not been found, lemmatizer features are not available.")
-    if not spacy.util.is_package("fr_core_news_sm"):
-        logger.error("Unable to call spacy lemmatizer withouth spacy fr_core_news_sm model")
-        raise Exception("Unable to call spacy lemmatizer withouth spacy fr_core_news_sm model")
+    if batch_size < 1:
+        raise ValueError("batch_size parameter must be >= 1")
+    if n_process == 0 or n_process < -1:
+        raise ValueError("n_process parameter must be >= 1 or -1")
+    spacy_model = get_spacy_model()
     docs = (
         pd.Series(docs)
         .str.lower()
-        .str.replace('\W', ' ', regex=True)
-        .str.replace(r"([0-9]+(\.[0-9]+)?)", r" \1 ", regex=True)
-        .str.replace('\s+', ' ', regex=True)
+        .str.replace(RE_NON_WORDS, ' ', regex=True)
+        .str.replace(RE_NUMBERS, r" \1 ", regex=True)
+        .str.replace(RE_SPACES, ' ', regex=True)
         .str.strip()
     )
     docs = list(docs.values)
     if len(docs) == 0:
         return None
-    lemmatized = []
-    for doc in docs:
-        if isinstance(doc, str):
-            content = spacy_model(doc)
-            lem = ' '.join([token.lemma_ for token in content])
-            lemmatized.append(lem)
-        else:
-            lemmatized.append(None)
-
+    # The strings are given to the model through a generator, the spacy Doc objects are dropped once lemmatized
+    texts = (doc for doc in docs if isinstance(doc, str))
+    contents = spacy_model.pipe(texts, batch_size=batch_size, n_process=n_process)
+    lemmatized = [' '.join([token.lemma_ for token in next(contents)]) if isinstance(doc, str) else None for doc in docs]
     return pd.Series(lemmatized)
 
 
+def doc_lemmatize(text: str) -> str:
+    '''Text lemmatizer - spacy - document level
+
+    Args:
+        text (str): Document to process
+
+    Raises:
+        ImportError : If spacy is not found
+        Exception : The spacy model can't be loaded
+    Returns:
+        str: Modified document
+    '''
+    spacy_model = get_spacy_model()
+    if not isinstance(text, str):
+        return None
+    text = RE_NON_WORDS.sub(' ', text.lower())
+    text = RE_NUMBERS.sub(r" \1 ", text)
+    text = RE_SPACES.sub(' ', text).strip()
+    return ' '.join([token.lemma_ for token in spacy_model(text)])
+
+
+def _check_lemmatizer() -> None:
+    '''Checks that spacy is available
+
+    Raises:
+        ImportError : If spacy is not found
+    '''
+    if not LEMMATIZER_AVAILABLE:
+        logger.error("Spacy has not been found, lemmatizer features are not available.")
+        logger.error("To use it, you must install spacy. For instance: pip install words-n-fun[lemmatizer]")
+        raise ImportError("Spacy has not been found, lemmatizer features are not available.")
+
+
 if __name__ == '__main__':
     logger.error("This script is not stand alone but belongs to a package that has to be imported.")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+## Columnar representation of substrings of a corpus (sentences, tokens sequences)
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# Classes :
+# - SpanArray -> Substrings of the rows of a corpus as (start, end) spans, in flat int64 arrays with offsets per row
+# - SpanArrayBuilder -> Builds a SpanArray row by row
+
+
+import array
+import logging
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Tuple, Union, TYPE_CHECKING
+
+from words_n_fun import utils
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+
+class SpanArray():
+    '''Class SpanArray:
+    Substrings of the rows of a corpus (eg. the sentences of each document), stored as the texts of the rows and
+    (start, end) character spans in flat int64 arrays, with the offsets of the spans of each row (as an arrow ListArray):
+    the spans of the row i are starts[offsets[i]:offsets[i + 1]] & ends[offsets[i]:offsets[i + 1]].
+    The substrings are only created on demand (cf. __getitem__, to_series, to_frame, to_arrow): a span takes 16 bytes,
+    a substring in a list of a pd.Series more than 50.
+    '''
+
+    def __init__(self, texts: Union[list, np.ndarray], offsets: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> None:
+        '''Class constructor
+
+        Args:
+            texts (list | np.ndarray): Text of each row (None if the row has no text)
+            offsets (np.ndarray): Offsets of the spans of each row (int64, len(texts) + 1 values, from 0 to the number of spans)
+            starts (np.ndarray): Start of each span in the text of its row (int64)
+            ends (np.ndarray): End of each span in the text of its row (int64)
+        Raises:
+            ValueError: If the arrays are not consistent
+        '''
+        self.texts = np.asarray(texts, dtype=object) if not isinstance(texts, np.ndarray) else texts
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        if len(self.offsets) != len(self.texts) + 1 or self.offsets[0] != 0 or self.offsets[-1] != len(self.starts):
+            raise ValueError("offsets must have len(texts) + 1 values, from 0 to the number of spans")
+        if len(self.starts) != len(self.ends):
+            raise ValueError("starts and ends must have the same length")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[Union[str, None], Iterable[Tuple[int, int]]]]) -> 'SpanArray':
+        '''Builds a SpanArray row by row (the spans are never all in memory as Python tuples)
+
+        Args:
+            rows (Iterable<tuple>): Text (None if the row has no text) & (start, end) spans of each row
+        Returns:
+            SpanArray: The spans
+        '''
+        builder = SpanArrayBuilder()
+        for text, spans in rows:
+            builder.append(text, spans)
+        return builder.build()
+
+    @property
+    def nb_spans(self) -> int:
+        '''Total number of spans'''
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        '''Memory used by the spans (the texts excepted)'''
+        return self.offsets.nbytes + self.starts.nbytes + self.ends.nbytes
+
+    def lengths(self) -> np.ndarray:
+        '''Returns the number of spans of each row
+
+        Returns:
+            np.ndarray: Number of spans of each row
+        '''
+        return np.diff(self.offsets)
+
+    def row_ids(self) -> np.ndarray:
+        '''Returns the row of each span
+
+        Returns:
+            np.ndarray: Row of each span
+        '''
+        return np.repeat(np.arange(len(self.texts)), self.lengths())
+
+    def get_substrings(self) -> List[str]:
+        '''Returns the substrings of all the spans (flat)
+
+        Returns:
+            list<str>: Substring of each span
+        '''
+        texts = self.texts
+        return [texts[row][start:end] for row, start, end in zip(self.row_ids().tolist(), self.starts.tolist(), self.ends.tolist())]
+
+    def to_series(self) -> pd.Series:
+        '''Converts to a pd.Series of lists of substrings (None for the rows without text)
+
+        Returns:
+            pd.Series: Substrings of each row
+        '''
+        return pd.Series([self[i] for i in range(len(self))], dtype=object)
+
+    def to_frame(self, with_text: bool = True) -> pd.DataFrame:
+        '''Converts to a DataFrame with one row per span: columns row_id, start, end (& text)
+
+        Kwargs:
+            with_text (bool): Whether the substrings are added (column text) (default: True)
+        Returns:
+            pd.DataFrame: Spans
+        '''
+        df = pd.DataFrame({'row_id': self.row_ids(), 'start': self.starts, 'end': self.ends})
+        if with_text:
+            df['text'] = pd.Series(self.get_substrings(), dtype=object)
+        return df
+
+    def to_arrow(self) -> 'pa.ListArray':
+        '''Converts to a pyarrow ListArray of strings (the offsets are reused, null for the rows without text)
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        Returns:
+            pa.ListArray: Substrings of each row
+        '''
+        utils._check_pyarrow()
+        pa = utils.pa
+        mask = pa.array([text is None for text in self.texts], type=pa.bool_())
+        return pa.ListArray.from_arrays(pa.array(self.offsets, type=pa.int32() if self.nb_spans < 2 ** 31 else pa.int64()),
+                                        pa.array(self.get_substrings(), type=pa.string()), mask=mask)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, i: int) -> Union[List[str], None]:
+        '''Returns the substrings of a row (None if the row has no text)
+
+        Args:
+            i (int): Position of the row (negative -> from the end)
+        Raises:
+            IndexError: If the row does not exist
+        Returns:
+            list<str>: Substrings of the row
+        '''
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("SpanArray index out of range")
+        text = self.texts[i]
+        if text is None:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return [text[s:e] for s, e in zip(self.starts[start:end].tolist(), self.ends[start:end].tolist())]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class SpanArrayBuilder():
+    '''Class SpanArrayBuilder:
+    Builds a SpanArray row by row, the spans being appended to compact int64 buffers (array.array)
+    The SpanArray built shares the buffers: no row can be appended after build
+    '''
+
+    def __init__(self) -> None:
+        '''Class constructor'''
+        self.texts = []
+        self.offsets = array.array('q', [0])
+        self.starts = array.array('q')
+        self.ends = array.array('q')
+
+    def append(self, text: Union[str, None], spans: Iterable[Tuple[int, int]]) -> None:
+        '''Appends a row
+
+        Args:
+            text (str): Text of the row (None if the row has no text)
+            spans (Iterable<tuple>): (start, end) spans of the row
+        '''
+        self.texts.append(text)
+        starts, ends = self.starts, self.ends
+        for start, end in spans:
+            starts.append(start)
+            ends.append(end)
+        self.offsets.append(len(starts))
+
+    def build(self) -> SpanArray:
+        '''Returns the SpanArray of the rows appended
+
+        Returns:
+            SpanArray: The spans
+        '''
+        return SpanArray(self.texts, np.frombuffer(self.offsets, dtype=np.int64), np.frombuffer(self.starts, dtype=np.int64),
+                         np.frombuffer(self.ends, dtype=np.int64))
+
+
+if __name__ == '__main__':
+    logger.error("This script is not stand alone but belongs to a package that has to be imported.")
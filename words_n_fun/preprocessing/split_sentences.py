@@ -19,18 +19,22 @@
 #
 # Fonctions :
 # - split_sentences : Splits a text into sentences
+# - split_sentences_spans : Splits a text into sentences, as (start, end) spans
 # - split_sentences_df : Splits a set of texts into sentences
+# - iter_split_sentences_df : Splits a corpus into sentences chunk by chunk (generator, global ids)
+# - split_line : Splits a line into sentences, parenthesis excepted (linear time)
+# - find_parenthesis_groups : Finds the parenthesis not to split
 
 
 import re
 import logging
-import functools
+import numpy as np
 import pandas as pd
-from typing import Union, List, Tuple
+from typing import Union, List, Tuple, Iterable, Iterator
 
+from words_n_fun import utils
 from words_n_fun import CustomTqdm as tqdm
-
-tqdm.pandas()
+from words_n_fun.preprocessing.span_arrays import SpanArray
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -43,10 +47,22 @@ re_lastspace = re.compile(r"\s+$")
 # Detect parenthesis
 re_parenthesis = re.compile(r"\([^())]+\)")
 # Regex to split punctuation ignoring classicar acronims
-re_specialsplit_v1 = re.compile("(?<!\s\w\.\w\.\s)(?<!\sM\.\s)(?<=(?:\.|\?|!)\s)")
+# (the punctuation lookbehind first: it fails at most positions, the other ones are then not tried)
+re_specialsplit_v1 = re.compile(r"(?<=(?:\.|\?|!)\s)(?<!\s\w\.\w\.\s)(?<!\sM\.\s)")
 re_specialsplit_v2 = re.compile(
-    r"(?<!^\w.\s)(?<!\s\w.\s)(?<!\w\.\w\.\s)(?<!\bMme\.\s)(?<!\bDr\.\s)(?<=(?:\.|\?|\!)\s)"
+    r"(?<=(?:\.|\?|\!)\s)(?<!^\w.\s)(?<!\s\w.\s)(?<!\w\.\w\.\s)(?<!\bMme\.\s)(?<!\bDr\.\s)"
 )
+# Detect the parenthesis characters (cf. find_parenthesis_groups)
+re_parenthesis_chars = re.compile(r"[()]")
+# Prefix of the keys replacing the parenthesis before the split
+PARENTHESIS_KEY = "UID_PE_PARENTHESES"
+# Columns added by iter_split_sentences_df: global id of the sentence & of its row in the corpus
+SENTENCE_ID_COLUMN = "sentence_id"
+ROW_ID_COLUMN = "row_id"
+# Default number of rows of the chunks of iter_split_sentences_df
+SPLIT_CHUNKSIZE = 10000
+# Output formats of split_sentences_df
+SPLIT_OUTPUT_FORMATS = ("frame", "spans")
 
 
 def parenthesis_to_key(line: str) -> Tuple[str, List[Tuple]]:
@@ -80,6 +96,131 @@ def key_to_parenthesis(lines: List[str], key_parenthesis: List[Tuple]) -> List[s
     return lines
 
 
+def find_parenthesis_groups(line: str) -> Union[List[Tuple[int, int, int]], None]:
+    """Finds in one pass the parenthesis replaced by a key in parenthesis_to_key, tracking the parenthesis depth
+    A parenthesis is replaced if it is not empty and all the parenthesis inside it are replaced, the keys being
+    numbered in the order of the closing parenthesis.
+
+    Args:
+        line (str): Line of a text
+    Returns:
+        list<tuple>: Outermost parenthesis replaced (start, end, number of the key), in the order of the line
+        None: If the keys would be mixed up by key_to_parenthesis (the line must be processed by
+            parenthesis_to_key & key_to_parenthesis to get the same results)
+    """
+    if PARENTHESIS_KEY in line:
+        return None
+    groups = _find_replaced_parenthesis(line)
+    # key_to_parenthesis replaces the first occurrence of each key, from the last one:
+    # with more than 10 keys, a key followed by a digit (eg. key 1 & "0") may be mistaken for another one (key 10)
+    if len(groups) > 10 and any(end + 1 < len(line) and line[end + 1] in "0123456789" for _, end, _ in groups):
+        return None
+    return _get_outermost_groups(groups)
+
+
+def _find_replaced_parenthesis(line: str) -> List[Tuple[int, int, int]]:
+    """Finds all the parenthesis replaced by a key in parenthesis_to_key (cf. find_parenthesis_groups)
+
+    Args:
+        line (str): Line of a text
+    Returns:
+        list<tuple>: Parenthesis replaced (start, end, number of the key), in the order of the closing parenthesis
+    """
+    groups = []
+    # Opened parenthesis: [start, whether it has content, whether all the parenthesis inside it are replaced]
+    stack = []
+    previous = -1
+    for match in re_parenthesis_chars.finditer(line):
+        position = match.start()
+        # Characters between two parenthesis are the content of the innermost opened one
+        if stack and position > previous + 1:
+            stack[-1][1] = True
+        previous = position
+        if line[position] == "(":
+            stack.append([position, False, True])
+        elif stack:
+            start, has_content, is_replaced = stack.pop()
+            is_replaced = has_content and is_replaced
+            if is_replaced:
+                groups.append((start, position, len(groups)))
+            if stack:
+                if is_replaced:
+                    stack[-1][1] = True
+                else:
+                    stack[-1][2] = False
+    return groups
+
+
+def _get_outermost_groups(groups: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Outermost parenthesis, in the order of the line (the parenthesis are nested or disjoint)"""
+    groups = sorted(groups)
+    outermost = []
+    for group in groups:
+        if not outermost or group[0] > outermost[-1][1]:
+            outermost.append(group)
+    return outermost
+
+
+def split_line(line: str, re_specialsplit: re.Pattern) -> List[str]:
+    """Splits a line into sentences, the parenthesis are not split
+    Same results as parenthesis_to_key, re_specialsplit.split and key_to_parenthesis, in linear time
+
+    Args:
+        line (str): Line of a text
+        re_specialsplit (re.Pattern): Split regex (re_specialsplit_v1 or re_specialsplit_v2)
+    Returns:
+        list<str> : List of sentences
+    """
+    if "(" not in line:
+        return re_specialsplit.split(line)
+    groups = find_parenthesis_groups(line)
+    if groups is None:
+        line, key_paren = parenthesis_to_key(line)
+        return key_to_parenthesis(re_specialsplit.split(line), key_paren)
+    if not groups:
+        return re_specialsplit.split(line)
+    positions = [0] + _get_split_positions(line, re_specialsplit, groups) + [len(line)]
+    return [line[start:end] for start, end in zip(positions[:-1], positions[1:])]
+
+
+def _get_split_positions(line: str, re_specialsplit: re.Pattern, groups: List[Tuple[int, int, int]]) -> List[int]:
+    """Positions where a line is split into sentences, the parenthesis groups excepted
+
+    Args:
+        line (str): Line of a text
+        re_specialsplit (re.Pattern): Split regex (re_specialsplit_v1 or re_specialsplit_v2)
+        groups (list<tuple>): Outermost parenthesis not to split (cf. find_parenthesis_groups)
+    Returns:
+        list<int>: Split positions in the line (0 & len(line) excluded)
+    """
+    if not groups:
+        return [match.start() for match in re_specialsplit.finditer(line)]
+    # The split regex looks behind the split positions: it is applied on the line with the keys
+    parts = []
+    # End of each key in the line with the keys, & offset of the positions after it
+    key_bounds = []
+    previous_end = 0
+    offset = 0
+    for start, end, k in groups:
+        key = f"{PARENTHESIS_KEY}_{k}"
+        parts.append(line[previous_end:start])
+        parts.append(key)
+        offset += end + 1 - start - len(key)
+        key_bounds.append((end + 1 - offset, offset))
+        previous_end = end + 1
+    parts.append(line[previous_end:])
+    # Split positions in the line (the keys are never split)
+    positions = []
+    offset = 0
+    i_key = 0
+    for match in re_specialsplit.finditer("".join(parts)):
+        while i_key < len(key_bounds) and key_bounds[i_key][0] <= match.start():
+            offset = key_bounds[i_key][1]
+            i_key += 1
+        positions.append(match.start() + offset)
+    return positions
+
+
 def split_sentences(text: str, version: int = 1) -> List[str]:
     """Splits a text into sentences
         - Parenthesis are removed before split so parenthesis are not splitted
@@ -92,54 +233,238 @@ def split_sentences(text: str, version: int = 1) -> List[str]:
     Returns:
         list<str> : List of sentences
     """
-    if version not in [1, 2]:
-        raise ValueError(" split_sentences version must be 1 or 2")
-    re_specialsplit = re_specialsplit_v2 if version == 2 else re_specialsplit_v1
-    # We split around \n after singling them out and removing trailing spaces.
-    text = re_multiline.sub("\n", text)
-    text = re_lastspace.sub("", text)
-    text_lines = text.split("\n")
-
+    re_specialsplit = _get_split_regex(version)
     text_list = []
 
-    for i, sentence in enumerate(text_lines):
-        # replace parenthesis
-        sentence, key_paren = parenthesis_to_key(sentence)
-
-        # split sentences
+    for sentence in _normalize_text(text).split("\n"):
+        # split sentences, parenthesis excepted
         # We split around ".", "!", "?" if they are followed by a whitespace or a newline
         # Special occurences ("i.e", "e.g", "M.") are skipped
-        splits = re_specialsplit.split(sentence)
+        text_list.extend(split_line(sentence, re_specialsplit))
 
-        # reapply parenthesis
-        sentences = key_to_parenthesis(splits, key_paren)
+    return text_list
 
-        # combine all sentences
-        text_list.extend(sentences)
 
-    return text_list
+def split_sentences_spans(text: str, version: int = 1) -> Tuple[str, List[Tuple[int, int]]]:
+    """Splits a text into sentences, as (start, end) spans rather than substrings
+    The sentences are the ones of split_sentences (one span per sentence) in the text normalized as by split_sentences
+    (several \n joined, trailing spaces removed). Lines with the rare parenthesis on which split_sentences falls back
+    on parenthesis_to_key & key_to_parenthesis (cf. find_parenthesis_groups) are split on the parenthesis themselves.
+
+    Args:
+        text (str): Arbitrary text
+        version (int): 1 = original version, 2 = extra rules are added
+    Returns:
+        str: Normalized text
+        list<tuple>: (start, end) span of each sentence in the normalized text
+    """
+    re_specialsplit = _get_split_regex(version)
+    text = _normalize_text(text)
+    spans = []
+    line_start = 0
+    for line in text.split("\n"):
+        groups = _get_outermost_groups(_find_replaced_parenthesis(line)) if "(" in line else []
+        positions = [line_start + position for position in _get_split_positions(line, re_specialsplit, groups)]
+        line_end = line_start + len(line)
+        spans.extend(zip([line_start] + positions, positions + [line_end]))
+        line_start = line_end + 1
+    return text, spans
+
+
+def _get_split_regex(version: int) -> re.Pattern:
+    """Split regex of a version of split_sentences
+
+    Args:
+        version (int): 1 = original version, 2 = extra rules are added
+    Raises:
+        ValueError: If version is not 1 or 2
+    Returns:
+        re.Pattern: Split regex
+    """
+    if version not in [1, 2]:
+        raise ValueError(" split_sentences version must be 1 or 2")
+    return re_specialsplit_v2 if version == 2 else re_specialsplit_v1
+
+
+def _normalize_text(text: str) -> str:
+    """Text normalized before the split: several \n joined & trailing spaces removed"""
+    # We split around \n after singling them out and removing trailing spaces.
+    if "\n" in text:
+        text = re_multiline.sub("\n", text)
+    # Same as re_lastspace.sub("", text) (\s are the str.isspace characters), without trying the regex at each space
+    return text.rstrip()
 
 
 def split_sentences_df(
-    df: pd.DataFrame, col: Union[str, int], use_tqdm: bool = False, version: int = 1
-) -> pd.DataFrame:
+    df: pd.DataFrame, col: Union[str, int], use_tqdm: bool = False, version: int = 1, output_format: str = "frame"
+) -> Union[pd.DataFrame, SpanArray]:
     """Function to split several texts from a pandas DataFrame into sentences
 
     Args:
         df (pd.DataFrame): DataFrame containing the texts
         col (str ou int): Column name where the text is
+        use_tqdm (bool): Whether tqdm should be used (default: False)
+        version (int): 1 = original version, 2 = extra rules are added (default: 1)
+        output_format (str): "frame" -> one row per sentence, "spans" -> SpanArray of the sentences of each row, as spans
+            of the normalized texts (cf. split_sentences_spans), without a substring per sentence (default: "frame")
+    Raises:
+        ValueError: If output_format is not "frame" or "spans"
     Returns:
-        pd.DataFrame: New DataFrame with the text split into sentences
+        pd.DataFrame: New DataFrame with the text split into sentences (one row per sentence)
+        SpanArray: Sentences of each row (output_format "spans")
     """
-    func = functools.partial(split_sentences, version=version)
-    df2 = df.copy()
-    if use_tqdm:
-        df2[col] = df2[col].progress_apply(func)
+    if output_format not in SPLIT_OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {SPLIT_OUTPUT_FORMATS}")
+    if output_format == "spans":
+        return _split_sentences_spans(df[col], use_tqdm=use_tqdm, version=version)
+    df2, _ = _explode_sentences(df, col, use_tqdm=use_tqdm, version=version)
+    return df2
+
+
+def iter_split_sentences_df(
+    docs: Union[str, pd.DataFrame, Iterable[pd.DataFrame]], col: Union[str, int], chunksize: int = SPLIT_CHUNKSIZE,
+    use_tqdm: bool = False, version: int = 1, **generator_args
+) -> Iterator[pd.DataFrame]:
+    """Splits a corpus into sentences chunk by chunk, only one chunk being in memory at once
+    Each chunk of sentences gets the columns SENTENCE_ID_COLUMN (position of the sentence in the corpus) & ROW_ID_COLUMN
+    (position of its row in the corpus): the ids are the same whatever the chunks
+    Null texts (eg. the empty cells of a csv file) give one empty sentence, as empty strings
+
+    Args:
+        docs (str | pd.DataFrame | Iterable<pd.DataFrame>): Path of a csv, parquet or arrow file, DataFrame (both read
+            by chunks, cf. utils.get_generator) or chunks of a corpus (eg. from utils.get_generator)
+        col (str ou int): Column name where the text is
+    Kwargs:
+        chunksize (int): Number of rows of the chunks read from a file or a DataFrame, 0 -> all of them (default: SPLIT_CHUNKSIZE)
+        use_tqdm (bool): Whether tqdm should be used, one step per chunk (default: False)
+        version (int): 1 = original version, 2 = extra rules are added (default: 1)
+        generator_args: Arguments of utils.get_generator when reading a file (first_row, columns, sep, nrows, pandas args)
+    Raises:
+        ValueError: If version is not 1 or 2
+        ValueError: If chunksize < 0
+        FileNotFoundError: If docs is the path of a file that does not exist
+        ValueError: If docs is a str that is not the path of a csv, parquet or arrow file
+        ValueError: If first_row is not in ['header', 'data', 'skip'] or if the csv file is empty
+        ValueError: If col is not a column of the corpus (checked on each chunk of an Iterable, when it is split)
+        ValueError: If the corpus already has a column SENTENCE_ID_COLUMN or ROW_ID_COLUMN (idem)
+    Returns:
+        Iterator<pd.DataFrame>: Chunks of sentences (one row per sentence, index starting at 0)
+    """
+    if version not in [1, 2]:
+        raise ValueError(" split_sentences version must be 1 or 2")
+    if chunksize < 0:
+        raise ValueError("Chunksize must be >= 0")
+    # Files & DataFrames are checked before the first chunk is read (only the first line or the schema of a file)
+    if isinstance(docs, str):
+        if utils.get_file_format(docs) is None:
+            raise ValueError(f"{docs} is not the path of a csv, parquet or arrow file")
+        columns = utils.get_columns_to_use(docs, first_row=generator_args.get('first_row', 'header'),
+                                           columns=generator_args.get('columns', ['docs', 'tags']),
+                                           sep=generator_args.get('sep', ','))
+        _check_columns(columns, col)
+    elif isinstance(docs, pd.DataFrame):
+        _check_columns(docs.columns, col)
+    if isinstance(docs, (str, pd.DataFrame)):
+        chunks = utils.get_generator(docs, chunksize=chunksize, **generator_args)
     else:
-        df2[col] = df2[col].apply(func)
+        chunks = docs
+    if use_tqdm:
+        chunks = tqdm(iterable=chunks, unit="chunk")
+    return _iter_split_sentences(chunks, col, version)
 
-    return df2.explode(col).reset_index(drop=True)
 
+def _iter_split_sentences(chunks: Iterable[pd.DataFrame], col: Union[str, int], version: int) -> Iterator[pd.DataFrame]:
+    """Generator of iter_split_sentences_df
+
+    Args:
+        chunks (Iterable<pd.DataFrame>): Chunks of a corpus
+        col (str ou int): Column name where the text is
+        version (int): 1 = original version, 2 = extra rules are added
+    Raises:
+        ValueError: If col is not a column of a chunk
+        ValueError: If a chunk already has a column SENTENCE_ID_COLUMN or ROW_ID_COLUMN
+    Yields:
+        pd.DataFrame: Chunks of sentences
+    """
+    nb_rows = 0
+    nb_sentences = 0
+    for chunk in chunks:
+        _check_columns(chunk.columns, col)
+        # Null texts (eg. the empty cells of a csv file) give one empty sentence, as empty strings
+        df_sentences, rows = _explode_sentences(chunk, col, version=version, null_as_empty=True)
+        df_sentences[SENTENCE_ID_COLUMN] = np.arange(nb_sentences, nb_sentences + len(df_sentences))
+        df_sentences[ROW_ID_COLUMN] = rows + nb_rows
+        nb_sentences += len(df_sentences)
+        nb_rows += len(chunk)
+        yield df_sentences
+
+
+def _check_columns(columns: Iterable, col: Union[str, int]) -> None:
+    """Checks the columns of a corpus split by iter_split_sentences_df
+
+    Args:
+        columns (Iterable): Columns of the corpus
+        col (str ou int): Column name where the text is
+    Raises:
+        ValueError: If col is not in columns
+        ValueError: If SENTENCE_ID_COLUMN or ROW_ID_COLUMN is in columns
+    """
+    columns = list(columns)
+    if col not in columns:
+        raise ValueError(f"The column {col} is not in the columns of the corpus ({columns})")
+    if SENTENCE_ID_COLUMN in columns or ROW_ID_COLUMN in columns:
+        raise ValueError(f"The columns {SENTENCE_ID_COLUMN} and {ROW_ID_COLUMN} are added by iter_split_sentences_df")
+
+
+def _explode_sentences(
+    df: pd.DataFrame, col: Union[str, int], use_tqdm: bool = False, version: int = 1, null_as_empty: bool = False
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Splits the texts of a DataFrame into sentences, one row per sentence (as with explode)
+
+    Args:
+        df (pd.DataFrame): DataFrame containing the texts
+        col (str ou int): Column name where the text is
+    Kwargs:
+        use_tqdm (bool): Whether tqdm should be used (default: False)
+        version (int): 1 = original version, 2 = extra rules are added (default: 1)
+        null_as_empty (bool): Whether the null texts are split as empty strings (one empty sentence) (default: False)
+    Returns:
+        pd.DataFrame: New DataFrame with the text split into sentences (index starting at 0)
+        np.ndarray: Position in df of the row of each sentence
+    """
+    texts = df[col]
+    if use_tqdm:
+        texts = tqdm(iterable=texts, total=len(texts))
+    sentences = []
+    nb_sentences = []
+    for text in texts:
+        if null_as_empty and pd.api.types.is_scalar(text) and pd.isna(text):
+            text = ''
+        text_sentences = split_sentences(text, version=version)
+        sentences.extend(text_sentences)
+        nb_sentences.append(len(text_sentences))
+    # Each row is repeated for each of its sentences
+    rows = np.repeat(np.arange(len(df)), nb_sentences)
+    df2 = df.iloc[rows].reset_index(drop=True)
+    df2[col] = pd.Series(sentences, dtype=object)
+    return df2, rows
+
+
+def _split_sentences_spans(texts: pd.Series, use_tqdm: bool = False, version: int = 1) -> SpanArray:
+    """Splits texts into sentences, as a SpanArray (cf. split_sentences_spans)
+
+    Args:
+        texts (pd.Series): Texts
+    Kwargs:
+        use_tqdm (bool): Whether tqdm should be used (default: False)
+        version (int): 1 = original version, 2 = extra rules are added (default: 1)
+    Returns:
+        SpanArray: Sentences of each text, as spans of the normalized texts
+    """
+    _get_split_regex(version)
+    if use_tqdm:
+        texts = tqdm(iterable=texts, total=len(texts))
+    return SpanArray.from_rows(split_sentences_spans(text, version=version) for text in texts)
 
 if __name__ == "__main__":
     logger.error(
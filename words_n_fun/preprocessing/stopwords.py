@@ -18,28 +18,48 @@
 #
 #
 # Functions :
-# - remove_stopwords
+# - remove_stopwords (engines: 'token' -> words_matcher.WordsMatcher, 'regex' -> utils.get_regex_match_words)
+# - doc_remove_stopwords
+# - get_stopwords_list
+# - get_stopwords_options
+# - build_stopwords_artifact (cf. make build-stopwords)
+# - load_stopwords_artifact
+# - get_stopwords_matcher (cf. words_matcher.MatcherRegistry)
 # - stopwords_ascii
 # - stopwords_nltk
 # - stopwords_nltk_ascii
 
 
 import os
-import nltk
+import mmap
+import struct
+import pickle
+import hashlib
+import functools
+import numpy as np
 import pandas as pd
-from typing import Union
+from typing import Union, List
 import unicodedata
 
 from words_n_fun import utils
+from words_n_fun.preprocessing import words_matcher
 
 # Get logger
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Setting the path where the nltk stopwords data is located
+# Setting the path where the nltk stopwords data is located (added to nltk.data.path when nltk is first used)
 stopwords_dir_path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'nltk_data')
-nltk.data.path.append(stopwords_dir_path)
+
+# Precomputed stopwords sets & matchers, loaded instead of being built from the lists & the nltk corpus
+# (built by build_stopwords_artifact, cf. make build-stopwords)
+STOPWORDS_ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'configs', 'stopwords.bin')
+# Version of the artifact format, to be bumped when its content or the class WordsMatcher changes
+STOPWORDS_ARTIFACT_VERSION = 1
+# Header of the artifact: magic, format version & sha256 of the payload (a pickle)
+ARTIFACT_MAGIC = b'WNFSTOPW'
+ARTIFACT_HEADER = struct.Struct('>8sI32s')
 
 
 # From R stopwords package (wrapper around https://github.com/stopwords-iso/stopwords-iso)
@@ -108,6 +128,9 @@ STOPWORDS = ["a", "abord", "absolument", "afin", "ah", "ai", "aie", "aient", "ai
              "ès", "étaient", "étais", "était", "étant", "état", "étiez", "étions", "été", "étée", "étées", "étés",
              "êtes", "être", "ô"]
 
+# Engines removing the stopwords: 'token' (cf. words_matcher.WordsMatcher) or 'regex' (cf. utils.get_regex_match_words)
+ENGINES = words_matcher.ENGINES
+
 # Specific Pôle Emploi stopwords #1
 STOPWORDS_OFFRES_1 = ["recherche", "recherchons", "mission", "missions", "poste", "recrute", "recrutons"]
 
@@ -138,6 +161,10 @@ def stopwords_nltk(try_update: bool = False) -> list:
         list: FRENCH stopwords from the NLTK package
     '''
     logger.debug('Calling stopwords.stopwords_nltk')
+    # nltk is imported on first use (it takes more than 100 ms)
+    import nltk
+    if stopwords_dir_path not in nltk.data.path:
+        nltk.data.path.append(stopwords_dir_path)
     if try_update:
         logger.debug("Trying to download an up to date list from NLTK.")
         nltk.download('stopwords', quiet=True)
@@ -157,18 +184,124 @@ def stopwords_nltk_ascii() -> list:
     return remove_accents(stopwords_nltk())
 
 
-STOPWORDS_OPTIONS = {
-    'none': set(),
-    'iso': set().union(STOPWORDS, stopwords_ascii()),
-    'nltk': set().union(stopwords_nltk(), stopwords_nltk_ascii()),
-    'offres_pe': set().union(STOPWORDS_OFFRES_1, STOPWORDS_OFFRES_2),
-    'all': set().union(STOPWORDS, stopwords_ascii(), stopwords_nltk(), stopwords_nltk_ascii()),
-}
+@functools.lru_cache(maxsize=1)
+def get_stopwords_options() -> dict:
+    '''Returns the stopwords sets of each option, loaded on the first call from the artifact STOPWORDS_ARTIFACT_PATH
+    (its matchers are added to the registry words_matcher.MATCHERS). If the artifact can't be used, the sets are built
+    from the lists & the nltk corpus. Also available as the module attribute STOPWORDS_OPTIONS
+
+    Returns:
+        dict: Stopwords set of each option
+    '''
+    artifact = load_stopwords_artifact()
+    if artifact is None:
+        return _build_stopwords_options()
+    options = {opt: set(words) for opt, words in artifact['options'].items()}
+    # Matchers of get_stopwords_matcher(opt) (token engine, no word added nor removed)
+    for opt, matcher in artifact['matchers'].items():
+        words_matcher.MATCHERS.add(options[opt], matcher)
+    return options
+
+
+def _build_stopwords_options() -> dict:
+    '''Builds the stopwords sets of each option from the lists & the nltk corpus
+
+    Returns:
+        dict: Stopwords set of each option
+    '''
+    return {
+        'none': set(),
+        'iso': set().union(STOPWORDS, stopwords_ascii()),
+        'nltk': set().union(stopwords_nltk(), stopwords_nltk_ascii()),
+        'offres_pe': set().union(STOPWORDS_OFFRES_1, STOPWORDS_OFFRES_2),
+        'all': set().union(STOPWORDS, stopwords_ascii(), stopwords_nltk(), stopwords_nltk_ascii()),
+    }
+
+
+def build_stopwords_artifact(path: str = STOPWORDS_ARTIFACT_PATH) -> None:
+    '''Precomputes the stopwords sets of each option & their matchers (token engine) into a binary artifact
+    The artifact has to be built again when the lists or the nltk corpus change (else it is ignored, cf. load_stopwords_artifact)
+
+    Kwargs:
+        path (str): Path of the artifact (def=STOPWORDS_ARTIFACT_PATH)
+    '''
+    logger.debug('Calling stopwords.build_stopwords_artifact')
+    options = _build_stopwords_options()
+    # Sorted words: the same sources always give the same file
+    payload = pickle.dumps({
+        'sources': _get_sources_digest(),
+        'options': {opt: sorted(words) for opt, words in options.items()},
+        'matchers': {opt: words_matcher.WordsMatcher(sorted(words)) for opt, words in options.items() if words},
+    }, protocol=4)
+    header = ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, STOPWORDS_ARTIFACT_VERSION, hashlib.sha256(payload).digest())
+    # Written next to the artifact, then renamed (a process loading it never reads a partial file)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_stopwords_artifact(path: str = STOPWORDS_ARTIFACT_PATH) -> Union[dict, None]:
+    '''Loads the artifact of build_stopwords_artifact (memory mapped)
+    The artifact is not used (None is returned) if it is missing, of another format version, corrupted (checksum) or
+    outdated (the lists or the nltk corpus shipped in nltk_data have changed since it was built)
+
+    Kwargs:
+        path (str): Path of the artifact (def=STOPWORDS_ARTIFACT_PATH)
+    Returns:
+        dict: Stopwords lists ('options') & matchers ('matchers') of each option, None if the artifact can't be used
+    '''
+    if not os.path.isfile(path):
+        logger.debug(f"No stopwords artifact {path}, the stopwords sets are built")
+        return None
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            magic, version, checksum = ARTIFACT_HEADER.unpack_from(buffer)
+            if magic != ARTIFACT_MAGIC or version != STOPWORDS_ARTIFACT_VERSION:
+                logger.warning(f"The stopwords artifact {path} is not of version {STOPWORDS_ARTIFACT_VERSION}, it is ignored")
+                return None
+            with memoryview(buffer)[ARTIFACT_HEADER.size:] as payload:
+                if hashlib.sha256(payload).digest() != checksum:
+                    logger.warning(f"The stopwords artifact {path} is corrupted (checksum), it is ignored")
+                    return None
+                artifact = pickle.loads(payload)
+        if artifact['sources'] != _get_sources_digest():
+            logger.warning(f"The stopwords artifact {path} is outdated (cf. make build-stopwords), it is ignored")
+            return None
+    except Exception as e:
+        logger.warning(f"The stopwords artifact {path} can't be loaded ({e!r}), it is ignored")
+        return None
+    return artifact
+
+
+def _get_sources_digest() -> str:
+    '''Returns the digest of the sources of the stopwords sets (lists & nltk corpus shipped in nltk_data)
+
+    Returns:
+        str: sha256 of the sources
+    '''
+    digest = hashlib.sha256()
+    for words in (STOPWORDS, STOPWORDS_OFFRES_1, STOPWORDS_OFFRES_2):
+        digest.update('\n'.join(words).encode('utf-8'))
+        digest.update(b'\0')
+    with open(os.path.join(stopwords_dir_path, 'corpora', 'stopwords', 'french'), 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def __getattr__(name: str):
+    '''Lazy module attributes: STOPWORDS_OPTIONS is built on first access (cf. get_stopwords_options)'''
+    if name == 'STOPWORDS_OPTIONS':
+        return get_stopwords_options()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 @utils.data_agnostic
 @utils.regroup_data_series
 def remove_stopwords(docs: pd.Series, opt: str = 'all', set_to_add: Union[list, None] = None,
-                     set_to_remove: Union[list, None] = None) -> pd.Series:
+                     set_to_remove: Union[list, None] = None, engine: str = 'token',
+                     matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> pd.Series:
     '''Stopwords removal
 
     Args:
@@ -177,14 +310,17 @@ def remove_stopwords(docs: pd.Series, opt: str = 'all', set_to_add: Union[list,
         opt (str): Specifies which stopwords set to use (def='all')
         set_to_add (list): Additionnal stopwords to look for and remove
         set_to_remove (list): Words existing in the stopwords set that should not be removed
+        engine (str): 'token' (split on the boundary characters & lookup of the tokens) or 'regex', same results (def='token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher (cf. get_stopwords_matcher), opt, set_to_add,
+            set_to_remove and engine are then ignored (def=None)
+    Raises:
+        ValueError: If engine is not 'token' or 'regex'
     Returns:
         pd.Series: Modified documents
     '''
     logger.debug('Calling stopwords.remove_stopwords')
-    if set_to_add is None:
-        set_to_add = []
-    if set_to_remove is None:
-        set_to_remove = []
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
     # Check if everything is in lowercase (NaNs are replaced, letters are kept)
     if (
         docs
@@ -197,30 +333,115 @@ def remove_stopwords(docs: pd.Series, opt: str = 'all', set_to_add: Union[list,
     ):
         logger.warning(docs)
         logger.warning('Some characters appear to be in uppercase, stopwords are in lowercase only.')
-    # Common soptwords lists
+    if matcher is None:
+        matcher = get_stopwords_matcher(opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove, engine=engine)
+    # Empty list case
+    if matcher is None:
+        logger.warning("Stopwords_list is empty.")
+        logger.warning("Non strings entries are still replaced by None.")
+        return docs.apply(lambda x: x if isinstance(x, str) else None)
+    return matcher.transform(docs)
+
 
+def doc_remove_stopwords(text: str, opt: str = 'all', set_to_add: Union[list, None] = None,
+                         set_to_remove: Union[list, None] = None, engine: str = 'token',
+                         matcher: Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None] = None) -> str:
+    '''Stopwords removal on a single document
 
-    if opt in STOPWORDS_OPTIONS.keys():
-        stopwords_list = list(STOPWORDS_OPTIONS.get(opt))
+    Args:
+        text (str): Document to process
+    Kwargs:
+        opt (str): Specifies which stopwords set to use (def='all')
+        set_to_add (list): Additionnal stopwords to look for and remove
+        set_to_remove (list): Words existing in the stopwords set that should not be removed
+        engine (str): 'token' (split on the boundary characters & lookup of the tokens) or 'regex', same results (def='token')
+        matcher (WordsMatcher | RegexMatcher): Pre-built matcher (cf. get_stopwords_matcher), opt, set_to_add,
+            set_to_remove and engine are then ignored (def=None)
+    Raises:
+        ValueError: If engine is not 'token' or 'regex'
+    Returns:
+        str: Modified document
+    '''
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+    if matcher is None:
+        matcher = get_stopwords_matcher(opt=opt, set_to_add=set_to_add, set_to_remove=set_to_remove, engine=engine)
+    if not isinstance(text, str):
+        if matcher is None:
+            return None
+        # Same behaviour as the pandas .str accessor
+        return text if pd.api.types.is_scalar(text) and pd.isna(text) else np.nan
+    if matcher is None:
+        return text
+    return matcher.remove_words(text)
+
+
+def get_stopwords_list(opt: str = 'all', set_to_add: Union[list, None] = None,
+                       set_to_remove: Union[list, None] = None) -> List[str]:
+    '''Returns the list of stopwords to remove
+
+    Kwargs:
+        opt (str): Specifies which stopwords set to use (def='all')
+        set_to_add (list): Additionnal stopwords to look for and remove
+        set_to_remove (list): Words existing in the stopwords set that should not be removed
+    Returns:
+        list<str>: Stopwords
+    '''
+    if set_to_add is None:
+        set_to_add = []
+    if set_to_remove is None:
+        set_to_remove = []
+    # Common soptwords lists
+    stopwords_options = get_stopwords_options()
+    if opt in stopwords_options.keys():
+        stopwords_list = list(stopwords_options.get(opt))
     else:
         logger.warning(f"Option {opt} does not exist.")
-        logger.warning(f"Existing options are : {', '.join(STOPWORDS_OPTIONS.keys())}. ")
+        logger.warning(f"Existing options are : {', '.join(stopwords_options.keys())}. ")
         logger.warning("By default, all the stopwords are used.")
         stopwords_list = STOPWORDS
     # Add custom set
     if len(set_to_add) != 0:
-        stopwords_list = list(set(stopwords_list + set_to_add))
+        stopwords_list = list(set(stopwords_list + list(set_to_add)))
     # Remove unwanted words
     if len(set_to_remove) != 0:
         stopwords_list = list(set(stopwords_list) - set(set_to_remove))
-    # Empty list case
-    if len(stopwords_list) == 0:
-        logger.warning("Stopwords_list is empty.")
-        logger.warning("Non strings entries are still replaced by None.")
-        return docs.apply(lambda x: x if isinstance(x, str) else None)
+    return stopwords_list
 
-    regex = utils.get_regex_match_words(stopwords_list)
-    return docs.str.replace(regex, '', regex=True)
+
+def get_stopwords_matcher(opt: str = 'all', set_to_add: Union[list, None] = None, set_to_remove: Union[list, None] = None,
+                          engine: str = 'token') -> Union[words_matcher.WordsMatcher, words_matcher.RegexMatcher, None]:
+    '''Returns the matcher of the stopwords, from the registry words_matcher.MATCHERS
+    Can be built once and given to remove_stopwords (matcher argument)
+
+    Kwargs:
+        opt (str): Specifies which stopwords set to use (def='all')
+        set_to_add (list): Additionnal stopwords to look for and remove
+        set_to_remove (list): Words existing in the stopwords set that should not be removed
+        engine (str): 'token' or 'regex', same results (def='token')
+    Raises:
+        ValueError: If engine is not 'token' or 'regex'
+    Returns:
+        WordsMatcher | RegexMatcher: Matcher of the stopwords, None if there is no stopword to remove
+    '''
+    stopwords_set = _get_stopwords_set(opt, tuple(set_to_add or ()), tuple(set_to_remove or ()))
+    if len(stopwords_set) == 0:
+        return None
+    return words_matcher.get_matcher(stopwords_set, engine=engine)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_stopwords_set(opt: str, set_to_add: tuple, set_to_remove: tuple) -> frozenset:
+    '''Returns the set of stopwords to remove (cached, the same frozenset is then a cheap key of the matchers registry)
+
+    Args:
+        opt (str): Specifies which stopwords set to use
+        set_to_add (tuple): Additionnal stopwords to look for and remove
+        set_to_remove (tuple): Words existing in the stopwords set that should not be removed
+    Returns:
+        frozenset<str>: Stopwords
+    '''
+    return frozenset(get_stopwords_list(opt=opt, set_to_add=list(set_to_add), set_to_remove=list(set_to_remove)))
 
 
 if __name__ == '__main__':
@@ -18,9 +18,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 #
+# Classes :
+# - GenderSynonymIndex -> Gendered synonyms found in a corpus, fitted incrementally & saved to disk
+#
 # Fonctions :
 # - remove_gender_synonyms -> Removes gendered synonyms
-# - matching_words -> Male/Female token matching
+# - doc_remove_gender_synonyms -> Removes gendered synonyms - document level
+# - matching_words -> Male/Female token matching (suffixes of SYNONYM_DICT looked up in a reversed suffixes trie)
 # - update_synonyms_set -> Update the synonyms set
 
 
@@ -35,8 +39,11 @@
 
 
 import re
+import json
+import functools
+import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Callable, Iterable, Tuple, Union
 
 from words_n_fun import utils
 
@@ -66,79 +73,263 @@ SYNONYM_DICT = {
     "s": ['s']
 }
 
+# Set match paterns
+RE_SPACES_AROUND_SLASH = re.compile(r'(\s*)/(\s*)')  # Whitespaces around "/"
+RE_SPACES_BEFORE_PARENTHESIS = re.compile(r'(\s*)\((\s*)')  # Whitespaces before "("
+RE_CLOSING_PARENTHESIS = re.compile(r'\)')
+# The three patterns above in a single pass (same results as applied one after the other)
+RE_NORMALIZE_SEPARATORS = re.compile(r'\s*([/(])\s*|\)')
+RE_PARENTHESIS_PATTERN = re.compile(r"([\w\-]+)\(([\w\-]+)\)()")  # Case :  serveur(se)
+RE_SLASH_PATTERN = re.compile(r"([\w\-]+)/([\w\-]+)(\([\w\-]+\))?")  # Case: serveur/serveuse and serveur/serveur(se)
+RE_SLASH_PATTERN_BIWORDS = re.compile(r"([\w\-]+\s[\w\-]+)/([\w\-]+\s[\w\-]+)()")  # Case: apprenti boucher/apprentie bouchere
+RE_SLASH_PATTERN_TRIWORDS = re.compile(r"([\w\-]+\s[\w\-]+\s[\w\-]+)/([\w\-]+\s[\w\-]+\s[\w\-]+)()")  # Case:  aide apprenti boucher/aide apprentie bouchere
+MATCH_PATTERNS = [RE_PARENTHESIS_PATTERN, RE_SLASH_PATTERN, RE_SLASH_PATTERN_BIWORDS, RE_SLASH_PATTERN_TRIWORDS]
+RE_DIGITS_SPACES = re.compile(r'^[\d\s]+$')
+
+# Key of the trie nodes listing the female endings of a male ending
+_ENDS = None
+# Cache size of the decisions on the pairs of words
+SYNONYMS_CACHE_SIZE = 2 ** 16
+# Version of the files of GenderSynonymIndex.save
+GENDER_SYNONYM_INDEX_VERSION = 1
+
+
+def _build_suffixes_trie(synonym_dict: dict) -> dict:
+    '''Builds the trie of the male endings of a synonyms dictionary, read from their last character
+
+    Args:
+        synonym_dict (dict): Female endings of each male ending (cf. SYNONYM_DICT)
+    Returns:
+        dict: Trie of the reversed male endings, the nodes ending one list its female endings
+    '''
+    trie = {}
+    for word1_end, word2_ends in synonym_dict.items():
+        node = trie
+        for char in reversed(word1_end):
+            node = node.setdefault(char, {})
+        node.setdefault(_ENDS, []).extend(word2_ends)
+    return trie
+
+
+# Trie of SYNONYM_DICT (cf. matching_words)
+SUFFIXES_TRIE = _build_suffixes_trie(SYNONYM_DICT)
+
+
+class GenderSynonymIndex():
+    '''Class GenderSynonymIndex:
+    Gendered synonyms found in a corpus (the synonyms set of update_synonyms_set, with the number of the first document
+    of each pair), fitted at once or chunk by chunk and saved to disk (json). Once fitted, the index is the authority
+    for the pairs given to remove_gender_synonyms: a pair is a synonym if and only if it is in the index (a dict lookup,
+    matching_words is not called). The documents of the corpus fitted (whatever the chunks) get the same results as
+    without an index; the pairs not seen in this corpus are kept, and the pairs can be edited (synonyms).
+    An index not fitted yet falls back on the rules of matching_words.
+    '''
+
+    def __init__(self) -> None:
+        '''Class constructor'''
+        # (male word, female word) -> number of the first document of the pair
+        self.synonyms = {}
+        self.nb_docs = 0
+
+    def fit(self, docs: Iterable[str]) -> 'GenderSynonymIndex':
+        '''Builds the index of a corpus
+
+        Args:
+            docs (Iterable<str>): Documents of the corpus
+        Returns:
+            GenderSynonymIndex: The index
+        '''
+        self.synonyms = {}
+        self.nb_docs = 0
+        return self.partial_fit(docs)
+
+    def partial_fit(self, docs: Iterable[str]) -> 'GenderSynonymIndex':
+        '''Adds the synonyms of documents to the index (eg. the next chunk of a corpus)
+        The documents are numbered after the ones already seen
+
+        Args:
+            docs (Iterable<str>): Documents to add
+        Returns:
+            GenderSynonymIndex: The index
+        '''
+        synonyms = self.synonyms
+        for text in docs:
+            if isinstance(text, str) and ('/' in text or '(' in text):
+                text = RE_NORMALIZE_SEPARATORS.sub(_normalize_separator, text)
+                for pattern in MATCH_PATTERNS:
+                    for (word1, word2, word3) in pattern.findall(text):
+                        if (word1, word2) not in synonyms and _is_synonym(word1, word2):
+                            synonyms[(word1, word2)] = self.nb_docs
+            self.nb_docs += 1
+        return self
+
+    @property
+    def is_fitted(self) -> bool:
+        '''Whether documents were given to fit / partial_fit (or the index was loaded)'''
+        return self.nb_docs > 0
+
+    def is_synonym(self, word1: str, word2: str) -> bool:
+        '''Whether a pair of words are gendered synonyms: in the index if it is fitted, else according to matching_words
+
+        Args:
+            word1 (str): Male word
+            word2 (str): Female word (or ending)
+        Returns:
+            bool: Whether word2 is the female version of word1
+        '''
+        if self.is_fitted:
+            return (word1, word2) in self.synonyms
+        return _is_synonym(word1, word2)
+
+    def transform(self, docs: pd.Series) -> pd.Series:
+        '''Removes the gendered synonyms of documents (cf. remove_gender_synonyms)
+
+        Args:
+            docs (pd.Series): Documents to process
+        Returns:
+            pd.Series: Modified documents
+        '''
+        return remove_gender_synonyms(docs, index=self)
+
+    def save(self, path: str) -> None:
+        '''Saves the index to a json file
+
+        Args:
+            path (str): Path of the file
+        '''
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': GENDER_SYNONYM_INDEX_VERSION, 'nb_docs': self.nb_docs,
+                       'synonyms': [[word1, word2, num_doc] for (word1, word2), num_doc in self.synonyms.items()]},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'GenderSynonymIndex':
+        '''Loads an index saved by GenderSynonymIndex.save
+
+        Args:
+            path (str): Path of the file
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not an index of version GENDER_SYNONYM_INDEX_VERSION
+        Returns:
+            GenderSynonymIndex: The index
+        '''
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        if not isinstance(content, dict) or content.get('version') != GENDER_SYNONYM_INDEX_VERSION:
+            raise ValueError(f"{path} is not a gender synonyms index of version {GENDER_SYNONYM_INDEX_VERSION}")
+        index = cls()
+        index.nb_docs = content['nb_docs']
+        index.synonyms = {(word1, word2): num_doc for word1, word2, num_doc in content['synonyms']}
+        return index
+
+    def __len__(self) -> int:
+        return len(self.synonyms)
+
+    def __contains__(self, pair: Tuple[str, str]) -> bool:
+        return pair in self.synonyms
+
 
 @utils.data_agnostic
 @utils.regroup_data_series
-def remove_gender_synonyms(docs: pd.Series) -> pd.Series:
+def remove_gender_synonyms(docs: pd.Series, index: Union[GenderSynonymIndex, None] = None) -> pd.Series:
     '''Removes gendered synonyms
 
     Args:
         docs (pd.Series): Documents to process
+    Kwargs:
+        index (GenderSynonymIndex): Index of the synonyms of the corpus, authority for the pairs once fitted (default: None)
     Returns:
         pd.Series: Modified documents
     '''
-    logger.debug('Calling synonym_malefemale_replacement.getSynonyms')
-
-    # Preprocessing
-    docs = docs.str.replace('(\s*)/(\s*)', '/', regex=True)  # Removes whitespaces around "/"
-    docs = docs.str.replace('(\s*)\((\s*)', '(', regex=True)  # Removes potential whitespaces before "("
-    docs = docs.str.replace('\)', ') ', regex=True)  # Add a space after ")"
-
-    # Set match paterns
-    parenthesis_pattern = r"([\w\-]+)\(([\w\-]+)\)()"  # Case :  serveur(se)
-    slash_pattern = r"([\w\-]+)/([\w\-]+)(\([\w\-]+\))?"  # Case: serveur/serveuse and serveur/serveur(se)
-    slash_pattern_BiWords = r"([\w\-]+\s[\w\-]+)/([\w\-]+\s[\w\-]+)()"  # Case: apprenti boucher/apprentie bouchere
-    slash_pattern_TriWords = r"([\w\-]+\s[\w\-]+\s[\w\-]+)/([\w\-]+\s[\w\-]+\s[\w\-]+)()"  # Case:  aide apprenti boucher/aide apprentie bouchere
-    match_pattern = [parenthesis_pattern, slash_pattern, slash_pattern_BiWords, slash_pattern_TriWords]
-
-    # Creating synonyms listings
-    synonyms_set = {}
-    for i in range(len(docs)):  # For every document
-        for match in match_pattern:  # ... and for every match ...
-            # Update the synonyms set
-            text = docs.iloc[i]
-            if isinstance(text, str):
-                synonyms_set = update_synonyms_set(synonyms_set, re.findall(match, text), i)
-
-    # Update the documents
-    for i in range(len(docs)):  # For every document
-        text = docs.iloc[i]
-
-        if not isinstance(text, str):
-            text = None
-        else:
-            # We process each pattern individually
-            match_parenthesis_pattern = re.findall(parenthesis_pattern, text)
-            match_slash_pattern = re.findall(slash_pattern, text)
-            match_slash_pattern_BiWords = re.findall(slash_pattern_BiWords, text)
-            match_slash_pattern_TriWords = re.findall(slash_pattern_TriWords, text)
-
-            # Parenthesis
-            if len(match_parenthesis_pattern) != 0:
-                for (word1, word2, word3) in match_parenthesis_pattern:
-                    if (word1, word2, word1) in synonyms_set:
-                        text = text.replace(word1 + "(" + word2 + ")", word1)  # Case: serveur(se)
-            # Slashes
-            if len(match_slash_pattern) != 0:
-                for (word1, word2, word3) in match_slash_pattern:
-                    if word1 == word2:  # Case: serveur/serveur(se)
-                        text = text.replace(word1 + "/" + word2 + "(" + word3 + ")", word1)
-                        text = text.replace(word1 + "/" + word2, word1)
-                    elif (word1, word2, word1) in synonyms_set:
-                        text = text.replace(word1 + "/" + word2 + "(" + word3 + ")", word1)
-                        text = text.replace(word1 + "/" + word2, word1)
-            # Slashes BiWords
-            if len(match_slash_pattern_BiWords) != 0:
-                for (word1, word2, word3) in match_slash_pattern_BiWords:  # Case: apprenti boucher/apprentie bouchere
-                    if (word1, word2, word1) in synonyms_set:
-                        text = text.replace(word1 + "/" + word2, word1)
-            # Slashes TriWords
-            if len(match_slash_pattern_TriWords) != 0:
-                for (word1, word2, word3) in match_slash_pattern_TriWords:
-                    if (word1, word2, word1) in synonyms_set:
-                        text = text.replace(word1 + "/" + word2, word1)
-            docs.iloc[i] = text
-    return docs
+    logger.debug('Calling synonym_malefemale_replacement.remove_gender_synonyms')
+    # Whether a pair of words is a synonym only depends on the pair: the documents are processed one by one
+    return pd.Series([doc_remove_gender_synonyms(text, index=index) for text in docs], index=docs.index, name=docs.name, dtype=object)
+
+
+def doc_remove_gender_synonyms(text: str, index: Union[GenderSynonymIndex, None] = None) -> str:
+    '''Removes gendered synonyms - document level
+    Same results as remove_gender_synonyms: whether a pair of words is a synonym only depends on the pair
+
+    Args:
+        text (str): Document to process
+    Kwargs:
+        index (GenderSynonymIndex): Index of the synonyms of the corpus, authority for the pairs once fitted (default: None)
+    Returns:
+        str: Modified document
+    '''
+    if not isinstance(text, str):
+        # As the pandas .str accessor: null values are kept as is, other values become NaN
+        return text if pd.api.types.is_scalar(text) and pd.isna(text) else np.nan
+    # Without "/" nor parenthesis, neither the preprocessing nor the patterns change the document
+    if '/' not in text and '(' not in text and ')' not in text:
+        return text
+    # Preprocessing: whitespaces around "/" & before "(" are removed, a space is added after ")"
+    text = RE_NORMALIZE_SEPARATORS.sub(_normalize_separator, text)
+    return _replace_synonyms(text, index.is_synonym if index is not None else _is_synonym)
+
+
+def _normalize_separator(match: re.Match) -> str:
+    '''Replacement of a match of RE_NORMALIZE_SEPARATORS'''
+    return match.group(1) or ') '
+
+
+def _replace_synonyms(text: str, is_synonym: Callable[[str, str], bool]) -> str:
+    '''Keeps the male version of the gendered synonyms of a document
+
+    Args:
+        text (str): Document to process (preprocessed)
+        is_synonym (Callable): Whether a pair of words are synonyms (_is_synonym or GenderSynonymIndex.is_synonym)
+    Returns:
+        str: Modified document
+    '''
+    # We process each pattern individually (all of them on the preprocessed document)
+    has_slash = '/' in text
+    match_parenthesis_pattern = RE_PARENTHESIS_PATTERN.findall(text) if '(' in text else []
+    match_slash_pattern = RE_SLASH_PATTERN.findall(text) if has_slash else []
+    match_slash_pattern_BiWords = RE_SLASH_PATTERN_BIWORDS.findall(text) if has_slash else []
+    match_slash_pattern_TriWords = RE_SLASH_PATTERN_TRIWORDS.findall(text) if has_slash else []
+
+    # Parenthesis
+    if len(match_parenthesis_pattern) != 0:
+        for (word1, word2, word3) in match_parenthesis_pattern:
+            if is_synonym(word1, word2):
+                text = text.replace(word1 + "(" + word2 + ")", word1)  # Case: serveur(se)
+    # Slashes
+    if len(match_slash_pattern) != 0:
+        for (word1, word2, word3) in match_slash_pattern:
+            if word1 == word2:  # Case: serveur/serveur(se)
+                text = text.replace(word1 + "/" + word2 + "(" + word3 + ")", word1)
+                text = text.replace(word1 + "/" + word2, word1)
+            elif is_synonym(word1, word2):
+                text = text.replace(word1 + "/" + word2 + "(" + word3 + ")", word1)
+                text = text.replace(word1 + "/" + word2, word1)
+    # Slashes BiWords
+    if len(match_slash_pattern_BiWords) != 0:
+        for (word1, word2, word3) in match_slash_pattern_BiWords:  # Case: apprenti boucher/apprentie bouchere
+            if is_synonym(word1, word2):
+                text = text.replace(word1 + "/" + word2, word1)
+    # Slashes TriWords
+    if len(match_slash_pattern_TriWords) != 0:
+        for (word1, word2, word3) in match_slash_pattern_TriWords:
+            if is_synonym(word1, word2):
+                text = text.replace(word1 + "/" + word2, word1)
+    return text
+
+
+@functools.lru_cache(maxsize=SYNONYMS_CACHE_SIZE)
+def _is_synonym(word1: str, word2: str) -> bool:
+    '''Whether a pair of words are gendered synonyms (same rules as update_synonyms_set)
+
+    Args:
+        word1 (str): Male word
+        word2 (str): Female word (or ending)
+    Returns:
+        bool: Whether word2 is the female version of word1
+    '''
+    if word1 == word2 and RE_DIGITS_SPACES.match(word1) is None:
+        return True
+    return matching_words(word1, word2)[2] != "unknown"
 
 
 def matching_words(word1: str, word2: str) -> Tuple[str, str, str]:
@@ -166,20 +357,20 @@ def matching_words(word1: str, word2: str) -> Tuple[str, str, str]:
     if len(word2) == 0:
         raise TypeError('Word2 is empty.')
 
-    combi = None
-    for word1_end in SYNONYM_DICT.keys():
-        for word2_end in SYNONYM_DICT[word1_end]:
-            if combi is None:
-                if word1[-len(word1_end):] == word1_end:
-                    if (
-                        (word2 == word2_end)
-                        or (word2[-len(word2_end):] == word2_end and word1[:4] == word2[:4])
-                        or (word2[-len(word2_end):] == word2_end and len(word2) <= (len(word2_end) + 2))
-                    ):
-                        combi = (word1, word2, word1)
-    if combi is None:
-        combi = (word1, word2, "unknown")
-    return combi
+    # Walk of the male endings which are suffixes of word1 (shortest first)
+    node = SUFFIXES_TRIE
+    for char in reversed(word1):
+        node = node.get(char)
+        if node is None:
+            break
+        for word2_end in node.get(_ENDS, ()):
+            if (
+                (word2 == word2_end)
+                or (word2.endswith(word2_end) and word1[:4] == word2[:4])
+                or (word2.endswith(word2_end) and len(word2) <= (len(word2_end) + 2))
+            ):
+                return (word1, word2, word1)
+    return (word1, word2, "unknown")
 
 
 def update_synonyms_set(synonyms_set: dict, match: list, numligne: int) -> dict:
@@ -198,7 +389,7 @@ def update_synonyms_set(synonyms_set: dict, match: list, numligne: int) -> dict:
         combi = None
         for (word1, word2, word3) in match:
             # Example : Case serveur/serveur(se) #re.match("[^\d\s]+$", word1) : word1 is neither digit nor whitespace
-            if word1 == word2 and re.match("^[\d\s]+$", word1) is None:
+            if word1 == word2 and RE_DIGITS_SPACES.match(word1) is None:
                 combi = (word1, word2, word1)
             else:
                 combi = matching_words(word1, word2)
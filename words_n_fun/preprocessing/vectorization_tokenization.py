@@ -19,19 +19,33 @@
 #
 # Fonctions :
 # - split_text_into_tokens -> Splits an input text into seq_size tokens (word or char) with at most nbech tokens
+# - split_text_into_token_ids -> Same sequences as id matrices (vectorized, sliding windows over the ids of the tokens)
 
-from typing import Tuple
+import re
+import itertools
+from typing import List, Tuple, Union
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from words_n_fun import utils
+from words_n_fun.preprocessing.span_arrays import SpanArray, SpanArrayBuilder
 
 # Get logger
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Words of str.split (\s are the str.isspace characters)
+RE_WORDS = re.compile(r"\S+")
+# Output formats of split_text_into_tokens
+TOKENS_OUTPUT_FORMATS = ('lists', 'spans')
+# Number of documents encoded at once by split_text_into_token_ids
+TOKEN_IDS_CHUNKSIZE = 10000
+
 
 def split_text_into_tokens(docs: pd.Series, nbech: int = 10, seq_size: int = 3, step: int = 1,
-                           granularity: str = "word") -> Tuple[pd.Series, pd.Series]:
+                           granularity: str = "word", output_format: str = 'lists') -> Union[Tuple[pd.Series, pd.Series],
+                                                                                              Tuple[SpanArray, SpanArray]]:
     '''Split an input text into seq_size tokens (word or char) with at most nbech tokens
 
     Args:
@@ -41,14 +55,17 @@ def split_text_into_tokens(docs: pd.Series, nbech: int = 10, seq_size: int = 3,
       seq_size (int): Number of tokens per sequence (default=3)
       step (int): Overlap between sequences (default=1)
       granularity (str): Tokenization granularity ('word' or 'char')
+      output_format (str): 'lists' -> pd.Series of lists, 'spans' -> SpanArray of (start, end) spans of the documents,
+        without a substring per token (a sequence of words is the span from its first to its last word) (default='lists')
     Raises:
       ValueError: If nbech is not > 0
       ValueError: If seq_size is not > 0
       ValueError: If step is not > 0
       ValueError: If granularity is neither word nor char
+      ValueError: If output_format is neither lists nor spans
     Returns:
-      pd.Series: List of sequences generated per document
-      pd.Series: List of "next item" generated per document
+      pd.Series | SpanArray: List of sequences generated per document
+      pd.Series | SpanArray: List of "next item" generated per document
     '''
     logger.debug('Calling fonction basic.split_text_into_tokens')
     if nbech <= 0:
@@ -59,6 +76,10 @@ def split_text_into_tokens(docs: pd.Series, nbech: int = 10, seq_size: int = 3,
         raise ValueError("Step must be > 0")
     if granularity not in ['word', 'char']:
         raise ValueError("granularity must either be word or char")
+    if output_format not in TOKENS_OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {TOKENS_OUTPUT_FORMATS}")
+    if output_format == 'spans':
+        return _split_text_into_token_spans(docs, nbech=nbech, seq_size=seq_size, step=step, granularity=granularity)
 
     sequences = pd.Series([None] * docs.shape[0])
     next_items = pd.Series([None] * docs.shape[0])
@@ -93,5 +114,206 @@ def split_text_into_tokens(docs: pd.Series, nbech: int = 10, seq_size: int = 3,
     return sequences, next_items
 
 
+def _split_text_into_token_spans(docs: pd.Series, nbech: int, seq_size: int, step: int,
+                                 granularity: str) -> Tuple[SpanArray, SpanArray]:
+    '''Same sequences and next items as split_text_into_tokens, as (start, end) spans of the documents
+
+    Args:
+      docs (pd.Series): Documents
+      nbech (int): Max number of  sequences
+      seq_size (int): Number of tokens per sequence
+      step (int): Overlap between sequences
+      granularity (str): Tokenization granularity ('word' or 'char')
+    Returns:
+      SpanArray: Sequences generated per document
+      SpanArray: "Next items" generated per document
+    '''
+    sequences = SpanArrayBuilder()
+    next_items = SpanArrayBuilder()
+    for text in docs:
+        if not isinstance(text, str):
+            sequences.append(None, [])
+            next_items.append(None, [])
+            continue
+        sequence, next_item = _get_token_spans(text, nbech, seq_size, step, granularity)
+        sequences.append(text, sequence)
+        next_items.append(text, next_item)
+    return sequences.build(), next_items.build()
+
+
+def _get_token_spans(text: str, nbech: int, seq_size: int, step: int,
+                     granularity: str) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    '''Spans of the sequences and next items of a document (cf. split_text_into_tokens)
+
+    Args:
+      text (str): Document
+      nbech (int): Max number of  sequences
+      seq_size (int): Number of tokens per sequence
+      step (int): Overlap between sequences
+      granularity (str): Tokenization granularity ('word' or 'char')
+    Returns:
+      list<tuple>: (start, end) span of each sequence
+      list<tuple>: (start, end) span of each next item
+    '''
+    sequence = []
+    next_item = []
+    if granularity == "char":
+        for j in range(0, len(text) - seq_size, step):
+            if text.find(".", j, j + seq_size) < 0:
+                sequence.append((j, j + seq_size))
+                next_item.append((j + seq_size, j + seq_size + 1))
+            if len(sequence) >= nbech:
+                break
+    elif granularity == "word":
+        words = [match.span() for match in RE_WORDS.finditer(text)]
+        for j in range(0, len(words) - seq_size, step):
+            sequence.append((words[j][0], words[j + seq_size - 1][1]))
+            next_item.append(words[j + seq_size])
+            if len(sequence) >= nbech:
+                break
+            if (len(words) - seq_size - 1) % step != 0:
+                sequence.append((words[len(words) - seq_size][0], words[len(words) - 1][1]))
+                next_item.append(words[len(words) - 1])
+    return sequence, next_item
+
+
+def split_text_into_token_ids(docs: pd.Series, nbech: int = 10, seq_size: int = 3, step: int = 1, granularity: str = "word",
+                              vocabulary: Union[List[str], None] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    '''Vectorized version of split_text_into_tokens, the tokens being encoded as integer ids (eg. to train a model)
+    The ids of the documents (by chunks of TOKEN_IDS_CHUNKSIZE) are concatenated, the windows are views of this array (sliding_window_view)
+    and the windows kept (step, "." for char, nbech per document) are selected with masks.
+    The windows are the ones of split_text_into_tokens, without the last window that it adds at each step
+    with word granularity (when the words do not end on a step).
+
+    Args:
+      docs (pd.Series): Documents
+    Kwargs:
+      nbech (int): Max number of  sequences per document (default=10)
+      seq_size (int): Number of tokens per sequence (default=3)
+      step (int): Overlap between sequences (default=1)
+      granularity (str): Tokenization granularity ('word' or 'char')
+      vocabulary (list<str>): Tokens already encoded (id = position, eg. the vocabulary returned for a previous chunk),
+        the new tokens are added at the end (default=None)
+    Raises:
+      ValueError: If nbech is not > 0
+      ValueError: If seq_size is not > 0
+      ValueError: If step is not > 0
+      ValueError: If granularity is neither word nor char
+    Returns:
+      np.ndarray: Ids of the sequences (int32, one row of seq_size ids per sequence)
+      np.ndarray: Id of the "next item" of each sequence (int32)
+      np.ndarray: Offsets of the sequences of each document (int64, the sequences of the document i are the rows
+        offsets[i]:offsets[i + 1])
+      list<str>: Vocabulary (token of each id)
+    '''
+    logger.debug('Calling fonction basic.split_text_into_token_ids')
+    if nbech <= 0:
+        raise ValueError("nbech must be > 0")
+    if seq_size <= 0:
+        raise ValueError("seq_size must be > 0")
+    if step <= 0:
+        raise ValueError("Step must be > 0")
+    if granularity not in ['word', 'char']:
+        raise ValueError("granularity must either be word or char")
+
+    texts = [text if isinstance(text, str) else '' for text in docs]
+    vocabulary = list(vocabulary) if vocabulary is not None else []
+    token_ids = {token: i for i, token in enumerate(vocabulary)}
+    # The documents are processed by chunks: the size of the intermediate arrays does not depend on the size of the corpus
+    sequences, next_items, nb_sequences = [], [], []
+    for i in range(0, len(texts), TOKEN_IDS_CHUNKSIZE):
+        chunk_sequences, chunk_next_items, chunk_nb_sequences = _split_chunk_into_token_ids(
+            texts[i: i + TOKEN_IDS_CHUNKSIZE], nbech, seq_size, step, granularity, token_ids, vocabulary)
+        sequences.append(chunk_sequences)
+        next_items.append(chunk_next_items)
+        nb_sequences.append(chunk_nb_sequences)
+    if not texts:
+        return np.empty((0, seq_size), dtype=np.int32), np.empty(0, dtype=np.int32), np.zeros(1, dtype=np.int64), vocabulary
+    offsets = np.concatenate([[0], np.cumsum(np.concatenate(nb_sequences))]).astype(np.int64)
+    return np.concatenate(sequences), np.concatenate(next_items), offsets, vocabulary
+
+
+def _split_chunk_into_token_ids(texts: List[str], nbech: int, seq_size: int, step: int, granularity: str,
+                                token_ids: dict, vocabulary: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''Sequences of ids of a chunk of documents (cf. split_text_into_token_ids)
+
+    Args:
+      texts (list<str>): Documents ('' if not a str)
+      nbech (int): Max number of  sequences per document
+      seq_size (int): Number of tokens per sequence
+      step (int): Overlap between sequences
+      granularity (str): Tokenization granularity ('word' or 'char')
+      token_ids (dict): Id of each token of the vocabulary, completed with the new tokens
+      vocabulary (list<str>): Token of each id, completed with the new tokens
+    Returns:
+      np.ndarray: Ids of the sequences (int32)
+      np.ndarray: Id of the "next item" of each sequence (int32)
+      np.ndarray: Number of sequences of each document
+    '''
+    if granularity == "char":
+        # Unicode code points of the documents
+        tokens = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    else:
+        words = [text.split() for text in texts]
+        tokens = list(itertools.chain.from_iterable(words))
+        lengths = np.array([len(text_words) for text_words in words], dtype=np.int64)
+    ids = _encode_tokens(tokens, granularity, token_ids, vocabulary)
+
+    # Candidate starts: a sequence starts at each step, if it is followed by a "next item" in its document
+    doc_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    nb_candidates = np.maximum((lengths - seq_size + step - 1) // step, 0)
+    if granularity == "word":
+        # The first nbech candidates of each document (only these ones are built)
+        nb_candidates = np.minimum(nb_candidates, nbech)
+    starts = np.repeat(doc_starts, nb_candidates) + step * _ranks_in_groups(nb_candidates)
+    if granularity == "char":
+        # Sequences without "." & the first nbech ones of each document
+        nb_dots = np.concatenate([[0], np.cumsum(tokens == ord('.'), dtype=np.int64)])
+        is_kept = nb_dots[starts + seq_size] == nb_dots[starts]
+        ranks = np.cumsum(is_kept)
+        first_ranks = np.concatenate([[0], ranks])[np.cumsum(nb_candidates) - nb_candidates]
+        is_kept &= ranks - np.repeat(first_ranks, nb_candidates) <= nbech
+        candidates_docs = np.repeat(np.arange(len(texts)), nb_candidates)
+        nb_sequences = np.bincount(candidates_docs[is_kept], minlength=len(texts))
+        starts = starts[is_kept]
+    else:
+        nb_sequences = nb_candidates
+    if len(ids) >= seq_size:
+        sequences = sliding_window_view(ids, seq_size)[starts]
+    else:
+        sequences = np.empty((0, seq_size), dtype=np.int32)
+    return sequences, ids[starts + seq_size], nb_sequences
+
+
+def _ranks_in_groups(sizes: np.ndarray) -> np.ndarray:
+    '''Position of each element in its group (0, 1, ..., sizes[0] - 1, 0, 1, ..., sizes[1] - 1, ...)'''
+    ends = np.cumsum(sizes)
+    return np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - sizes, sizes)
+
+
+def _encode_tokens(tokens: Union[list, np.ndarray], granularity: str, token_ids: dict, vocabulary: List[str]) -> np.ndarray:
+    '''Encodes tokens as ids, the new tokens being added to the vocabulary in order of first appearance
+
+    Args:
+      tokens (list | np.ndarray): Words (granularity word) or unicode code points (granularity char)
+      granularity (str): Tokenization granularity ('word' or 'char')
+      token_ids (dict): Id of each token of the vocabulary, completed with the new tokens
+      vocabulary (list<str>): Token of each id, completed with the new tokens
+    Returns:
+      np.ndarray: Id of each token (int32)
+    '''
+    codes, uniques = pd.factorize(np.asarray(tokens, dtype=object) if granularity == "word" else tokens)
+    if granularity == "char":
+        uniques = [chr(code) for code in uniques]
+    uniques_ids = np.empty(len(uniques), dtype=np.int32)
+    for i, token in enumerate(uniques):
+        if token not in token_ids:
+            token_ids[token] = len(vocabulary)
+            vocabulary.append(token)
+        uniques_ids[i] = token_ids[token]
+    return uniques_ids[codes] if len(codes) else np.empty(0, dtype=np.int32)
+
+
 if __name__ == '__main__':
     logger.error("This script is not stand alone but belongs to a package that has to be imported.")
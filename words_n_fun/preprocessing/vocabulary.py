@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+## Vocabulary of a corpus (word counts & ids)
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# Classes :
+# - Vocabulary -> Words of a corpus with their counts, fitted chunk by chunk, ids sorted by frequency
+
+
+import json
+import logging
+import itertools
+import numpy as np
+import pandas as pd
+from collections import Counter
+from typing import Iterable, List, Tuple, Union
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Version of the files saved by Vocabulary.save
+VOCABULARY_VERSION = 1
+
+
+class Vocabulary():
+    '''Class Vocabulary:
+    Words of a corpus (str.split) with their counts, fitted at once or chunk by chunk (a corpus too large for the memory
+    is read by chunks, eg. with utils.get_generator) and saved to disk (json). The words kept (min_count, max_size) get
+    ids sorted by decreasing count, and documents are encoded into int32 ids with offsets per document.
+    '''
+
+    def __init__(self, min_count: int = 1, max_size: Union[int, None] = None) -> None:
+        '''Class constructor
+
+        Kwargs:
+            min_count (int): Minimum count of the words kept (default: 1)
+            max_size (int): Maximum number of words kept, the most frequent ones, None -> no limit (default: None)
+        Raises:
+            ValueError: If min_count is not > 0
+            ValueError: If max_size is not None nor > 0
+        '''
+        if min_count <= 0:
+            raise ValueError("min_count must be > 0")
+        if max_size is not None and max_size <= 0:
+            raise ValueError("max_size must be None or > 0")
+        self.min_count = min_count
+        self.max_size = max_size
+        # Count of each word of the corpus (all the words, the pruning is only applied on the ids)
+        self.counts = Counter()
+        self.nb_docs = 0
+        # Words kept & their index (computed on demand, reset by partial_fit)
+        self._words = None
+        self._index = None
+
+    def fit(self, docs: Iterable[str]) -> 'Vocabulary':
+        '''Counts the words of a corpus
+
+        Args:
+            docs (Iterable<str>): Documents of the corpus
+        Returns:
+            Vocabulary: The vocabulary
+        '''
+        self.counts = Counter()
+        self.nb_docs = 0
+        return self.partial_fit(docs)
+
+    def partial_fit(self, docs: Iterable[str]) -> 'Vocabulary':
+        '''Adds the counts of the words of documents (eg. the next chunk of a corpus)
+
+        Args:
+            docs (Iterable<str>): Documents to add (the ones that are not str are ignored)
+        Returns:
+            Vocabulary: The vocabulary
+        '''
+        counts = self.counts
+        nb_docs = 0
+        for text in docs:
+            nb_docs += 1
+            if isinstance(text, str):
+                counts.update(text.split())
+        self.nb_docs += nb_docs
+        self._words = None
+        self._index = None
+        return self
+
+    @property
+    def words(self) -> List[str]:
+        '''Words kept (count >= min_count, the max_size most frequent ones), the id of a word being its position:
+        by decreasing count, then in alphabetical order
+        '''
+        if self._words is None:
+            words = sorted((word for word, count in self.counts.items() if count >= self.min_count),
+                           key=lambda word: (-self.counts[word], word))
+            self._words = words[:self.max_size] if self.max_size is not None else words
+        return self._words
+
+    @property
+    def unknown_id(self) -> int:
+        '''Id of the words that are not kept (the one after the last word)'''
+        return len(self.words)
+
+    def to_frame(self, sort_by: str = 'count') -> pd.DataFrame:
+        '''Returns the words kept & their counts
+
+        Kwargs:
+            sort_by (str): 'count' -> order of the ids, 'word' -> alphabetical order (default: 'count')
+        Raises:
+            ValueError: If sort_by is neither count nor word
+        Returns:
+            pd.DataFrame: Words (column word) & counts (column count)
+        '''
+        if sort_by not in ['count', 'word']:
+            raise ValueError("sort_by must either be count or word")
+        words = self.words if sort_by == 'count' else sorted(self.words)
+        return pd.DataFrame({'word': pd.Series(words, dtype=object),
+                             'count': np.array([self.counts[word] for word in words], dtype=np.int64)})
+
+    def encode(self, docs: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        '''Encodes documents into the ids of their words (unknown_id for the words not kept)
+
+        Args:
+            docs (Iterable<str>): Documents to encode (the ones that are not str have no word)
+        Returns:
+            np.ndarray: Ids of the words of all the documents (int32)
+            np.ndarray: Offsets of the words of each document (int64, the ids of the document i are ids[offsets[i]:offsets[i + 1]])
+        '''
+        if self._index is None:
+            self._index = pd.Index(self.words, dtype=object)
+        words = [text.split() if isinstance(text, str) else [] for text in docs]
+        offsets = np.concatenate([[0], np.cumsum([len(text_words) for text_words in words], dtype=np.int64)]).astype(np.int64)
+        ids = self._index.get_indexer(np.array(list(itertools.chain.from_iterable(words)), dtype=object)).astype(np.int32)
+        ids[ids < 0] = self.unknown_id
+        return ids, offsets
+
+    def decode(self, ids: Iterable[int]) -> List[Union[str, None]]:
+        '''Words of ids (None for unknown_id)
+
+        Args:
+            ids (Iterable<int>): Ids
+        Returns:
+            list<str>: Words
+        '''
+        words = self.words
+        return [words[i] if i < len(words) else None for i in ids]
+
+    def save(self, path: str) -> None:
+        '''Saves the vocabulary to a json file (the counts of all the words)
+
+        Args:
+            path (str): Path of the file
+        '''
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': VOCABULARY_VERSION, 'min_count': self.min_count, 'max_size': self.max_size,
+                       'nb_docs': self.nb_docs, 'counts': [[word, count] for word, count in self.counts.items()]},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'Vocabulary':
+        '''Loads a vocabulary saved by Vocabulary.save
+
+        Args:
+            path (str): Path of the file
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a vocabulary of version VOCABULARY_VERSION
+        Returns:
+            Vocabulary: The vocabulary
+        '''
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        if not isinstance(content, dict) or content.get('version') != VOCABULARY_VERSION:
+            raise ValueError(f"{path} is not a vocabulary of version {VOCABULARY_VERSION}")
+        vocabulary = cls(min_count=content['min_count'], max_size=content['max_size'])
+        vocabulary.nb_docs = content['nb_docs']
+        vocabulary.counts = Counter({word: count for word, count in content['counts']})
+        return vocabulary
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        if self._index is None:
+            self._index = pd.Index(self.words, dtype=object)
+        return word in self._index
+
+
+if __name__ == '__main__':
+    logger.error("This script is not stand alone but belongs to a package that has to be imported.")
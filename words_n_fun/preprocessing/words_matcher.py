@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+
+## Token based matching of words lists (stopwords, words to remove)
+# Copyright (C) <2018-2022>  <Agence Data Services, DSI Pôle Emploi>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+#
+# Classes :
+# - WordsMatcher -> Removes words from documents, same results as the regex of utils.get_regex_match_words
+# - RegexMatcher -> Removes words from documents with the compiled regex of utils.get_regex_match_words
+# - MatcherRegistry -> Bounded LRU registry of the matchers, keyed by the set of words & the flags
+#
+# Fonctions :
+# - get_matcher -> Returns the matcher of a list of words (from the default registry MATCHERS)
+# - sort_words -> Sorts words longest first (deterministic order of the alternatives of a regex)
+
+
+import re
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict, namedtuple
+from typing import Iterable, List, Union
+
+from words_n_fun import utils
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Engines removing the words: 'token' (cf. WordsMatcher) or 'regex' (cf. RegexMatcher)
+ENGINES = ('token', 'regex')
+# Default maximum number of matchers kept by a registry
+REGISTRY_MAXSIZE = 64
+# Statistics of a registry (same fields as functools.lru_cache)
+MatcherInfo = namedtuple('MatcherInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+# Characters accepted before & after the words (same defaults as utils.get_regex_match_words), whitespaces excepted
+BOUNDARY_CHARS = '.?!,;:()"\'/<>=[]{}~*'
+# Splits a text into runs of non boundary characters & single boundary characters
+RE_BOUNDARY = re.compile(f"([{re.escape(BOUNDARY_CHARS)}\\s])")
+# Key of the trie nodes ending a word
+_END = None
+
+
+class WordsMatcher():
+    '''Class WordsMatcher:
+    Removes words from documents, a word being removed if it is preceded by the beginning of the document or a
+    boundary character and followed by a boundary character or the end of the document (boundary characters are
+    BOUNDARY_CHARS and whitespaces). If several words match at the same position, the longest one is removed.
+    The results are the same as with the regex of utils.get_regex_match_words (words sorted by sort_words).
+
+    The documents are split into tokens alternating runs of non boundary characters (possibly empty) and single
+    boundary characters (cf. split_tokens). A word is then a sequence of tokens, beginning & ending with a run:
+    most of them are a single run ('avec') but some of them are phrases ("aujourd'hui" -> 'aujourd', "'", 'hui').
+    The words are stored in a trie of tokens, walked from each run of the documents: the boundary conditions are
+    given by the alternation and most runs are not the beginning of a word, hence a single dict lookup per run.
+    '''
+
+    def __init__(self, words: Iterable[str]) -> None:
+        '''Class constructor
+
+        Args:
+            words (Iterable<str>): Words to match
+        '''
+        self.trie = {}
+        self.nb_words = 0
+        # Duplicates removed in the given order (same trie, hence same pickle, for the same words list)
+        for word in dict.fromkeys(words):
+            # The empty word matches nothing
+            if not word:
+                continue
+            tokens = split_tokens(word)
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[_END] = True
+            self.nb_words += 1
+
+    def remove_words(self, text: str) -> str:
+        '''Removes the words from a document
+
+        Args:
+            text (str): Document to process
+        Returns:
+            str: Modified document
+        '''
+        tokens = split_tokens(text)
+        nb_tokens = len(tokens)
+        trie = self.trie
+        kept = []
+        # Even indexes: runs, odd indexes: boundary characters
+        i = 0
+        while i < nb_tokens:
+            # Longest word beginning with this run (words end with a run, ie. at an even index)
+            node = trie.get(tokens[i])
+            match_end = -1
+            j = i
+            while node is not None:
+                if _END in node:
+                    match_end = j
+                if j + 2 >= nb_tokens:
+                    break
+                node = node.get(tokens[j + 1])
+                if node is not None:
+                    node = node.get(tokens[j + 2])
+                j += 2
+            if match_end < 0:
+                kept.append(tokens[i])
+                if i + 1 < nb_tokens:
+                    kept.append(tokens[i + 1])
+                i += 2
+            elif tokens[match_end] == '':
+                # The word ends with a boundary character, the next word may begin right after it
+                i = match_end
+            else:
+                if match_end + 1 < nb_tokens:
+                    kept.append(tokens[match_end + 1])
+                i = match_end + 2
+        return ''.join(kept)
+
+    def transform(self, docs: pd.Series) -> pd.Series:
+        '''Removes the words from documents
+        Non strings values are handled as with the pandas .str accessor (null values are kept, other values become NaN)
+
+        Args:
+            docs (pd.Series): Documents to process
+        Returns:
+            pd.Series: Modified documents
+        '''
+        values = [self.remove_words(doc) if isinstance(doc, str) else (doc if pd.api.types.is_scalar(doc) and pd.isna(doc) else np.nan)
+                  for doc in docs]
+        return pd.Series(values, index=docs.index, name=docs.name, dtype=object)
+
+
+class RegexMatcher():
+    '''Class RegexMatcher:
+    Removes words from documents with the regex of utils.get_regex_match_words, compiled once.
+    Same interface as WordsMatcher, used for the case insensitive matching (case folding of the re module).
+    '''
+
+    def __init__(self, words: Iterable[str], case_insensitive: bool = False) -> None:
+        '''Class constructor
+
+        Args:
+            words (Iterable<str>): Words to match
+        Kwargs:
+            case_insensitive (bool): Whether the matching is case insensitive (def=False)
+        '''
+        words = sort_words(words)
+        self.nb_words = len(words)
+        self.pattern = re.compile(utils.get_regex_match_words(words, case_insensitive=case_insensitive))
+
+    def remove_words(self, text: str) -> str:
+        '''Removes the words from a document
+
+        Args:
+            text (str): Document to process
+        Returns:
+            str: Modified document
+        '''
+        return self.pattern.sub('', text)
+
+    def transform(self, docs: pd.Series) -> pd.Series:
+        '''Removes the words from documents
+
+        Args:
+            docs (pd.Series): Documents to process
+        Returns:
+            pd.Series: Modified documents
+        '''
+        return docs.str.replace(self.pattern, '', regex=True)
+
+
+class MatcherRegistry():
+    '''Class MatcherRegistry:
+    Bounded LRU registry of the matchers, keyed by the set of words, the case sensitivity and the engine
+    (the order of the words and the duplicates don't change the matcher). Building a matcher over a stopwords
+    list takes longer than processing a short document, the registry allows to build it once per process.
+    Thread safe, with hit/miss counters (cf. cache_info).
+    '''
+
+    def __init__(self, maxsize: int = REGISTRY_MAXSIZE) -> None:
+        '''Class constructor
+
+        Kwargs:
+            maxsize (int): Maximum number of matchers kept, the least recently used one is dropped (def=REGISTRY_MAXSIZE)
+        Raises:
+            ValueError: If maxsize is not positive
+        '''
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._matchers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, words: Iterable[str], case_insensitive: bool = False, engine: str = 'token') -> Union[WordsMatcher, RegexMatcher]:
+        '''Returns the matcher of a list of words, built if it is not in the registry
+
+        Args:
+            words (Iterable<str>): Words to match
+        Kwargs:
+            case_insensitive (bool): Whether the matching is case insensitive, the regex engine is then always used (def=False)
+            engine (str): 'token' or 'regex', same results (def='token')
+        Raises:
+            ValueError: If engine is not 'token' or 'regex'
+        Returns:
+            WordsMatcher | RegexMatcher: Matcher of the words
+        '''
+        key = self._get_key(words, case_insensitive, engine)
+        engine = key[2]
+        with self._lock:
+            matcher = self._matchers.get(key)
+            if matcher is not None:
+                self._matchers.move_to_end(key)
+                self.hits += 1
+                return matcher
+            self.misses += 1
+        # Built outside the lock, the other threads are not blocked meanwhile
+        matcher = WordsMatcher(key[0]) if engine == 'token' else RegexMatcher(key[0], case_insensitive=case_insensitive)
+        with self._lock:
+            self._matchers[key] = matcher
+            while len(self._matchers) > self.maxsize:
+                self._matchers.popitem(last=False)
+        return matcher
+
+    def add(self, words: Iterable[str], matcher: Union[WordsMatcher, RegexMatcher], case_insensitive: bool = False,
+            engine: str = 'token') -> None:
+        '''Adds a pre-built matcher (eg. loaded from the stopwords artifact) to the registry, statistics are unchanged
+
+        Args:
+            words (Iterable<str>): Words matched by the matcher
+            matcher (WordsMatcher | RegexMatcher): Matcher of the words
+        Kwargs:
+            case_insensitive (bool): Whether the matching is case insensitive (def=False)
+            engine (str): Engine of the matcher, 'token' or 'regex' (def='token')
+        Raises:
+            ValueError: If engine is not 'token' or 'regex'
+        '''
+        key = self._get_key(words, case_insensitive, engine)
+        with self._lock:
+            self._matchers[key] = matcher
+            self._matchers.move_to_end(key)
+            while len(self._matchers) > self.maxsize:
+                self._matchers.popitem(last=False)
+
+    def cache_info(self) -> MatcherInfo:
+        '''Returns the statistics of the registry
+
+        Returns:
+            MatcherInfo: hits, misses, maxsize & currsize
+        '''
+        with self._lock:
+            return MatcherInfo(self.hits, self.misses, self.maxsize, len(self._matchers))
+
+    def clear(self) -> None:
+        '''Removes all the matchers and resets the statistics'''
+        with self._lock:
+            self._matchers.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._matchers)
+
+    @staticmethod
+    def _get_key(words: Iterable[str], case_insensitive: bool, engine: str) -> tuple:
+        '''Returns the key of a matcher in the registry
+
+        Args:
+            words (Iterable<str>): Words to match
+            case_insensitive (bool): Whether the matching is case insensitive
+            engine (str): 'token' or 'regex'
+        Raises:
+            ValueError: If engine is not 'token' or 'regex'
+        Returns:
+            tuple: Set of the words, case sensitivity & engine
+        '''
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+        # The case insensitive matching of the re module (case folding of each character) is kept
+        if case_insensitive:
+            engine = 'regex'
+        # The hash of a frozenset is computed once, a frozenset given as words is reused as is
+        return (frozenset(words), case_insensitive, engine)
+
+
+# Default registry
+MATCHERS = MatcherRegistry()
+
+
+def split_tokens(text: str) -> List[str]:
+    '''Splits a text into tokens alternating runs of non boundary characters (possibly empty, even indexes) and
+    single boundary characters (odd indexes)
+
+    Args:
+        text (str): Text to split
+    Returns:
+        list<str>: Tokens
+    '''
+    return RE_BOUNDARY.split(text)
+
+
+def get_matcher(words: Iterable[str], case_insensitive: bool = False, engine: str = 'token') -> Union[WordsMatcher, RegexMatcher]:
+    '''Returns the matcher of a list of words, from the default registry (cf. MatcherRegistry.get)
+
+    Args:
+        words (Iterable<str>): Words to match
+    Kwargs:
+        case_insensitive (bool): Whether the matching is case insensitive (def=False)
+        engine (str): 'token' or 'regex', same results (def='token')
+    Raises:
+        ValueError: If engine is not 'token' or 'regex'
+    Returns:
+        WordsMatcher | RegexMatcher: Matcher of the words
+    '''
+    return MATCHERS.get(words, case_insensitive=case_insensitive, engine=engine)
+
+
+def sort_words(words: Iterable[str]) -> List[str]:
+    '''Sorts words longest first (then alphabetically)
+    In a regex alternation, the first alternative matching wins: with this order the longest word is removed
+    (eg. "aujourd'hui" rather than "aujourd"), whatever the order of the input words.
+
+    Args:
+        words (Iterable<str>): Words to sort
+    Returns:
+        list<str>: Sorted words
+    '''
+    return sorted(set(words), key=lambda word: (-len(word), word))
+
+
+if __name__ == '__main__':
+    logger.error("This script is not stand alone but belongs to a package that has to be imported.")
@@ -24,34 +24,81 @@
 # - get_docs_type -> Returns the type of a list
 # - get_docs_length -> Returns the number of elements within a set of documents
 # - get_file_length -> Returns... the file length !
+# - is_file_empty -> Checks if a file is empty (without reading it entirely)
+# - estimate_file_length -> Returns an estimation of the number of rows within a file (reading only its beginning)
+# - get_csv_index -> Returns the row-offset index of a csv file (loaded from its sidecar file if up to date)
+# - build_csv_index -> Builds the row-offset index of a csv file in one pass
+# - read_csv_rows -> Loads some rows of a csv file, seeking directly to the first one thanks to the index
 # - get_new_csv_name -> Returns a new filename ("processed") from a given filename
+# - to_arrow_table -> Converts a dataFrame to a pyarrow Table
+# - to_arrow_array -> Converts a pd.Series to a pyarrow Array
+# - set_arrow_column -> Sets (or appends) a column of a pyarrow Table
+# - get_columnar_schema -> Returns the schema of a parquet or arrow file
+# - get_file_format -> Returns the format of a supported file (csv, parquet or arrow)
 # - get_generator -> Returns a generator given the type of document to process and the chunksize
 # - get_df_generator_from_csv -> Returns a dataFrame generator by chunk over a file
+# - get_df_generator_from_columnar -> Returns a dataFrame (or pyarrow Table) generator by chunk over a parquet or arrow file
+# - read_columnar_file -> Loads a parquet or arrow file (possibly only some columns)
+# - ColumnarFileWriter -> Writes dataFrames (or pyarrow Tables) chunk by chunk to a parquet or arrow file
 # - get_columns_to_use -> Returns the names of the columns to use while loading a csv file
 # - get_new_column_name -> Returns a new column name from a list of existing columns and a column name
 # - get_column_to_be_processed -> Returns the name of the column to process given the type of the "docs" element
 # - regroup_data_series ->Wrapper to regroup identical data of a pd.Series before being processed
+# - regroup_disabled -> Context manager disabling the regroup_data_series wrappers (data already regrouped)
 # - regroup_data_df -> Wrapper to regroup identical data of a pd.DataFrame before being processed
+# - factorize_series -> Returns the unique values of a pd.Series along with the inverse index (null values included)
+# - is_arrow_string -> Checks if a pd.Series holds Arrow-backed strings
+# - as_string_dtype -> Converts a pd.Series to the object dtype or to an Arrow-backed string dtype
+# - expand_series -> Scatters back processed unique values using an inverse index
 # - get_regex_match_words -> Returns a generic regex matching one or more words
 
 import os
 import re
-import csv
 import time
 import copy
+import json
 import errno
 import ntpath
+import contextvars
 import numpy as np
 import pandas as pd
 from functools import wraps
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Callable, Union, List
+from typing import Callable, Union, List, Tuple
 
 # Get logger
 import logging
 
 logger = logging.getLogger(__name__)
 
+# pyarrow is an optional dependency, needed to work with parquet and arrow files
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Supported file formats (by extension)
+FILE_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+# Default number of rows per batch when streaming a parquet or arrow file
+COLUMNAR_BATCH_SIZE = 65536
+
+# If True, the regroup_data_series wrappers directly call the decorated functions
+# Set by the callers that already regrouped the data (cf. regroup_disabled)
+_REGROUP_DISABLED = contextvars.ContextVar('regroup_disabled', default=False)
+
+# Row-offset index of csv files (cf. get_csv_index)
+# Suffix of the sidecar files storing the indexes
+CSV_INDEX_SUFFIX = '.wnfidx'
+# Version of the index format, an index with another version is rebuilt
+CSV_INDEX_VERSION = 1
+# The byte offset of every CSV_INDEX_STEP-th record is stored
+CSV_INDEX_STEP = 10000
+# Indexes of smaller files are not written to disk (counting their rows is fast enough)
+CSV_INDEX_MIN_FILE_SIZE = 10 * 1024**2
+
 
 def timer(function: Callable) -> Callable:
     '''Decorator to monitor the execution time of a function
@@ -79,7 +126,7 @@ def data_agnostic(function: Callable, prefered_column: str = "docs", sep: str =
     '''Decorator to manage type casting from and to pd.Series
 
     Supported types:
-        - str ending by .csv /!\ Not advised /!\
+        - str ending by .csv, .parquet or .arrow (cf. FILE_FORMATS) /!\ Not advised /!\
         - str
         - list
         - np.ndarray
@@ -110,7 +157,7 @@ def data_agnostic(function: Callable, prefered_column: str = "docs", sep: str =
 
         if docs_type == 'file_path':
             logger.warning(
-                f"{docs} is considered as a path to a csv file to load"
+                f"{docs} is considered as a path to a file to load"
                 + " This feature is not recommended."
                 + " It is advised to directly work on the content of the csv file (by loading it beforehand)"
             )
@@ -120,9 +167,13 @@ def data_agnostic(function: Callable, prefered_column: str = "docs", sep: str =
                     f"File {docs} not found."
                     + f" If {docs} is a string, use [docs] or pd.Series(docs)"
                 )
-            if get_file_length(docs, sep=sep) == 0:
+            if is_file_empty(docs):
                 raise ValueError(f'File {docs} is empty.')
 
+            # Parquet & arrow files are streamed, only the column to process is converted to pandas
+            if get_file_format(docs) in ('parquet', 'arrow'):
+                return _apply_on_columnar_file(function, docs, prefered_column, *args, **kwargs)
+
             # Process
             logger.info(f"Loading {docs}. By default : first row is considered as the header.")
             df = pd.read_csv(docs, sep=sep)
@@ -180,11 +231,35 @@ def data_agnostic(function: Callable, prefered_column: str = "docs", sep: str =
     return wrapper
 
 
+def _apply_on_columnar_file(function: Callable, filename: str, prefered_column: str, *args, **kwargs) -> str:
+    '''Applies a function on a column of a parquet or arrow file, the result is saved in a new file of the same format
+    The file is processed batch by batch, the other columns are not converted to pandas.
+
+    Args:
+        function (func): Function to apply (pd.Series -> pd.Series)
+        filename (str): Path to the parquet or arrow file
+        prefered_column (str): Column to process, we fall back on the first column if it does not exist
+    Returns:
+        str: Path to the output file
+    '''
+    available_columns = get_columnar_schema(filename).names
+    docs_column = prefered_column if prefered_column in available_columns else available_columns[0]
+    logger.info(f"Selecting {docs_column} as the column to be processed.")
+    saving_path = get_new_csv_name(filename)
+    with ColumnarFileWriter(saving_path) as writer:
+        for table in get_df_generator_from_columnar(filename, chunksize=COLUMNAR_BATCH_SIZE, as_arrow=True):
+            docs_input = table.column(docs_column).to_pandas()
+            results = function(docs_input, *args, **kwargs)
+            assert results.shape[0] == docs_input.shape[0], f'The return value of  {function} must have a length of {docs_input.shape[0]}. Current length : {results.shape[0]}.'
+            writer.write(set_arrow_column(table, docs_column, results))
+    return saving_path
+
+
 def data_agnostic_input(function: Callable, prefered_column: str = "docs", sep: str = ',') -> Callable:
     '''Decorator to manage type casting to pd.Series
 
     Supported types:
-        - str ending by .csv -> chargement du csv en dataframe /!\ Unadvised /!\
+        - str ending by .csv, .parquet or .arrow (cf. FILE_FORMATS) -> chargement du fichier en dataframe /!\ Unadvised /!\
         - str
         - list
         - np.ndarray
@@ -216,7 +291,7 @@ def data_agnostic_input(function: Callable, prefered_column: str = "docs", sep:
 
         if docs_type == 'file_path':
             logger.warning(
-                f"{docs} is considered as a path to a csv file to load"
+                f"{docs} is considered as a path to a file to load"
                 + " This feature is not recommended."
                 + " It is advised to directly work on the content of the csv file (by loading it beforehand)"
             )
@@ -226,14 +301,21 @@ def data_agnostic_input(function: Callable, prefered_column: str = "docs", sep:
                     f"File {docs} not found."
                     + f" If {docs} is a string, use [docs] or pd.Series(docs)"
                 )
-            if get_file_length(docs, sep=sep) == 0:
+            if is_file_empty(docs):
                 raise ValueError(f'File {docs} is empty.')
-            logger.info(f"Loading {docs}. By default : first row is considered as the header.")
-            df = pd.read_csv(docs, sep=sep)
-            # IF prefered_column exists, we use it, otherwise we fall back on the first column
-            docs_column = prefered_column if prefered_column in df.columns else df.columns[0]
-            logger.info(f"Using {docs_column} as the column to be processed.")
-            docs_input = df[docs_column]
+            # Parquet & arrow files: only the column to process is loaded
+            if get_file_format(docs) in ('parquet', 'arrow'):
+                available_columns = get_columnar_schema(docs).names
+                docs_column = prefered_column if prefered_column in available_columns else available_columns[0]
+                logger.info(f"Using {docs_column} as the column to be processed.")
+                docs_input = read_columnar_file(docs, columns_to_load=[docs_column])[docs_column]
+            else:
+                logger.info(f"Loading {docs}. By default : first row is considered as the header.")
+                df = pd.read_csv(docs, sep=sep)
+                # IF prefered_column exists, we use it, otherwise we fall back on the first column
+                docs_column = prefered_column if prefered_column in df.columns else df.columns[0]
+                logger.info(f"Using {docs_column} as the column to be processed.")
+                docs_input = df[docs_column]
 
         elif docs_type == 'str':
             docs_input = pd.Series(docs)
@@ -268,7 +350,7 @@ def get_docs_type(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame]) -
         (str): type of the docs list
     '''
     logger.debug('Calling utils.get_docs_type')
-    if isinstance(docs, str) and docs.endswith('.csv'):
+    if isinstance(docs, str) and get_file_format(docs) is not None:
         docs_type = 'file_path'
     elif isinstance(docs, str):
         docs_type = 'str'
@@ -290,7 +372,7 @@ def get_docs_length(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame],
     '''Returns the number of elements within a set of documents
 
     Args:
-        docs (?): Arbitrary document list (Supported types : str ending by .csv, str, list, np.ndarray, pd.Series, pd.DataFrame)
+        docs (?): Arbitrary document list (Supported types : str ending by .csv, .parquet or .arrow, str, list, np.ndarray, pd.Series, pd.DataFrame)
     Kwargs:
         first_row (str): When working with a pandas dataframe or csv file, specifies how the first line is handled
             -'header', 'data' or 'skip' (default : 'header')
@@ -317,7 +399,8 @@ def get_docs_length(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame],
 
     elif docs_type == 'file_path':
         file_length = get_file_length(docs, sep=sep)
-        if first_row in ['header', 'skip']:
+        # Parquet & arrow files have no header row
+        if first_row in ['header', 'skip'] and get_file_format(docs) == 'csv':
             file_length -= 1
         if nrows != 0:
             file_length = min(nrows, file_length)
@@ -346,22 +429,269 @@ def get_file_length(filename: str, sep: str = ',') -> int:
     if not os.path.isfile(filename):
         raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
 
+    # Parquet & arrow files: number of rows from the metadata
+    file_format = get_file_format(filename)
+    if file_format in ('parquet', 'arrow'):
+        _check_pyarrow()
+        if file_format == 'parquet':
+            return pq.ParquetFile(filename).metadata.num_rows
+        with pa.memory_map(filename, 'r') as source:
+            reader = _open_arrow_file(source)
+            return sum(batch.num_rows for batch in reader)
     # Check if csv file
     if filename.endswith('.csv'):
         # CSV files can contain "\n" within a data field, thus returning an incorrect number of rows
-        with open(filename, 'r', encoding='utf-8') as f:
-            # Using "if line" allows us to ignore empty lines
-            return sum(1 for line in csv.reader(f, delimiter=sep) if line)
+        # The row-offset index handles these cases (and empty lines are ignored), it is reused if up to date
+        return get_csv_index(filename, sep=sep)['nb_rows']
     else:
         with open(filename, 'r', encoding='utf-8') as f:
             return sum(1 for line in f)
 
 
+def estimate_file_length(filename: str, sep: str = ',', sample_size: int = 1024**2) -> int:
+    '''Returns an estimation of the number of rows within a file, only its beginning is read
+    If an up to date index exists (cf. get_csv_index), the exact number of rows is returned
+
+    Args:
+        filename (str): Path to the file
+    Kwargs:
+        sep (str): csv separator (default: ',')
+        sample_size (int): Number of bytes to read to estimate the size of a row (default: 1 MB)
+    Raises:
+        FileNotFoundError: If the file is not found
+    Returns:
+        int: (Estimated) Number of rows within the file
+    '''
+    logger.debug('Calling utils.estimate_file_length')
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+    index = _load_csv_index(filename, sep=sep)
+    if index is not None:
+        return index['nb_rows']
+    file_size = os.path.getsize(filename)
+    nb_rows, read_size = 0, 0
+    with open(filename, 'rb') as f:
+        for starts, ends in _iter_csv_records(f, sep=sep, block_size=sample_size):
+            nb_rows += len(ends)
+            read_size = ends[-1] if len(ends) else read_size
+            if read_size >= sample_size:
+                break
+    # The whole file has been read, the count is exact
+    if nb_rows == 0 or read_size >= file_size:
+        return nb_rows
+    return round(nb_rows * file_size / read_size)
+
+
+def get_csv_index(filename: str, sep: str = ',', step: int = CSV_INDEX_STEP, save: Union[bool, None] = None) -> dict:
+    '''Returns the row-offset index of a csv file
+    The index is loaded from its sidecar file (filename + CSV_INDEX_SUFFIX) if it is still valid (same size & mtime
+    as the csv file, same separator), otherwise it is built in one pass (cf. build_csv_index) and saved.
+
+    Args:
+        filename (str): Path to the csv file
+    Kwargs:
+        sep (str): csv separator (default: ',')
+        step (int): The byte offset of every step-th record is stored (default: CSV_INDEX_STEP)
+        save (bool): If the index must be written to its sidecar file,
+            None -> only for files bigger than CSV_INDEX_MIN_FILE_SIZE (default: None)
+    Raises:
+        FileNotFoundError: If the file is not found
+    Returns:
+        dict: Index, keys: 'nb_rows' (number of non-empty records, header included), 'step' & 'offsets'
+    '''
+    logger.debug('Calling utils.get_csv_index')
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+    index = _load_csv_index(filename, sep=sep)
+    if index is not None:
+        return index
+    index = build_csv_index(filename, sep=sep, step=step)
+    if save or (save is None and index['size'] >= CSV_INDEX_MIN_FILE_SIZE):
+        try:
+            with open(filename + CSV_INDEX_SUFFIX, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+        except OSError:
+            logger.warning(f"Can't write the index of the file {filename}")
+    return index
+
+
+def build_csv_index(filename: str, sep: str = ',', step: int = CSV_INDEX_STEP) -> dict:
+    '''Builds the row-offset index of a csv file in one pass
+    Records may contain quoted line breaks, empty lines are ignored (as for csv.reader).
+
+    Args:
+        filename (str): Path to the csv file
+    Kwargs:
+        sep (str): csv separator (default: ',')
+        step (int): The byte offset of every step-th record is stored (default: CSV_INDEX_STEP)
+    Raises:
+        ValueError: If step < 1
+    Returns:
+        dict: Index (cf. get_csv_index)
+    '''
+    logger.debug('Calling utils.build_csv_index')
+    if step < 1:
+        raise ValueError('step must be >= 1')
+    stat = os.stat(filename)
+    offsets = []
+    nb_rows = 0
+    with open(filename, 'rb') as f:
+        for starts, _ in _iter_csv_records(f, sep=sep):
+            records_numbers = np.arange(nb_rows, nb_rows + len(starts))
+            offsets.extend(starts[records_numbers % step == 0].tolist())
+            nb_rows += len(starts)
+    return {'version': CSV_INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sep': sep,
+            'nb_rows': nb_rows, 'step': step, 'offsets': offsets}
+
+
+def read_csv_rows(filename: str, start_row: int, nrows: Union[int, None] = None, **pandas_args) -> pd.DataFrame:
+    '''Loads some rows of a csv file, seeking directly to the first one thanks to the index (cf. get_csv_index)
+    Rows are counted as in get_file_length: the header (if any) is the row 0 and empty lines are ignored.
+
+    Args:
+        filename (str): Path to the csv file
+        start_row (int): First row to load
+    Kwargs:
+        nrows (int): Number of rows to load, None -> until the end of the file (default: None)
+        pandas_args: Arguments to pass to pd.read_csv (eg. sep, names)
+    Raises:
+        ValueError: If start_row < 0
+    Returns:
+        pd.DataFrame: Loaded rows (without header, index starting at 0)
+    '''
+    logger.debug('Calling utils.read_csv_rows')
+    if start_row < 0:
+        raise ValueError('start_row must be >= 0')
+    pandas_args = {'encoding': 'utf-8', 'header': None, 'sep': ',', **pandas_args}
+    index = get_csv_index(filename, sep=pandas_args['sep'])
+    if start_row >= index['nb_rows']:
+        return pd.DataFrame([], columns=pandas_args.get('names'))
+    with open(filename, 'rb') as f:
+        # Seek to the closest indexed record, then skip the remaining ones
+        f.seek(index['offsets'][start_row // index['step']])
+        nb_to_skip = start_row % index['step']
+        for starts, _ in _iter_csv_records(f, sep=pandas_args['sep'], offset=f.tell()):
+            if nb_to_skip < len(starts):
+                start = int(starts[nb_to_skip])
+                break
+            nb_to_skip -= len(starts)
+        f.seek(start)
+        return pd.read_csv(f, nrows=nrows, **pandas_args)
+
+
+def _load_csv_index(filename: str, sep: str = ',') -> Union[dict, None]:
+    '''Loads the index of a csv file from its sidecar file, if it exists and is up to date
+
+    Args:
+        filename (str): Path to the csv file
+    Kwargs:
+        sep (str): csv separator (default: ',')
+    Returns:
+        dict: Index (cf. get_csv_index), None if not found or outdated
+    '''
+    index_path = filename + CSV_INDEX_SUFFIX
+    if not os.path.isfile(index_path):
+        return None
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        stat = os.stat(filename)
+        if (index.get('version') == CSV_INDEX_VERSION and index.get('size') == stat.st_size
+                and index.get('mtime_ns') == stat.st_mtime_ns and index.get('sep') == sep):
+            return index
+    except (OSError, ValueError):
+        pass
+    logger.debug(f"Outdated index for the file {filename}")
+    return None
+
+
+def _iter_csv_records(f, sep: str = ',', offset: int = 0, block_size: int = 4 * 1024**2):
+    '''Iterates over the non-empty records of a csv file opened in binary mode
+    The file is read by blocks, the records boundaries are found with numpy. Only the quotes are processed in
+    python (as in csv.reader, a quote opens a quoted field only at the beginning of a field).
+
+    Args:
+        f (file): csv file opened in binary mode
+    Kwargs:
+        sep (str): csv separator (default: ',')
+        offset (int): Current position within the file (default: 0)
+        block_size (int): Number of bytes read at once (default: 4 MB)
+    Returns:
+        (generator): For each block, np.ndarray of the start & end byte offsets of the records ending within the block
+    '''
+    sep_byte = ord(sep) if len(sep) == 1 and ord(sep) < 128 else None
+    in_quotes = False
+    last_closing_quote = None
+    record_start = offset
+    position = offset
+    last_byte = None
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        data = np.frombuffer(block, dtype=np.uint8)
+        newlines = np.flatnonzero(data == 10)
+        # Get the quotes opening or closing a quoted field
+        in_quotes_at_block_start = in_quotes
+        toggles = []
+        quotes = np.flatnonzero(data == 34)
+        # Beginning of a field: preceded by a line break or a separator (or beginning of the file)
+        previous_bytes = np.full(len(quotes), -1 if last_byte is None else last_byte, dtype=np.int16)
+        previous_bytes[quotes > 0] = data[quotes[quotes > 0] - 1]
+        field_starts = (previous_bytes == -1) | (previous_bytes == 10) | (previous_bytes == (-2 if sep_byte is None else sep_byte))
+        for quote, field_start in zip((quotes + position).tolist(), field_starts.tolist()):
+            if in_quotes:
+                in_quotes = False
+                last_closing_quote = quote
+                toggles.append(quote - position)
+            # Beginning of a field, or escaped quote ("") within a quoted field
+            elif field_start or quote - 1 == last_closing_quote:
+                in_quotes = True
+                toggles.append(quote - position)
+        # A line break within a quoted field does not end the record
+        in_quotes_at_newlines = (in_quotes_at_block_start + np.searchsorted(np.array(toggles, dtype=np.int64), newlines)) % 2
+        ends = position + newlines[in_quotes_at_newlines == 0] + 1
+        starts = np.concatenate([[record_start], ends[:-1]]).astype(np.int64)
+        # Empty lines ("\n" or "\r\n") are ignored
+        lengths = ends - starts
+        first_bytes = np.full(len(starts), -1 if last_byte is None else last_byte, dtype=np.int16)
+        in_block = starts >= position
+        first_bytes[in_block] = data[starts[in_block] - position]
+        empty = (lengths == 1) | ((lengths == 2) & (first_bytes == 13))
+        yield starts[~empty], ends[~empty]
+        record_start = ends[-1] if len(ends) else record_start
+        position += len(block)
+        last_byte = data[-1]
+    # Last record without final line break
+    if position > record_start and not (position - record_start == 1 and last_byte == 13):
+        yield np.array([record_start], dtype=np.int64), np.array([position], dtype=np.int64)
+
+
+def is_file_empty(filename: str) -> bool:
+    '''Checks if a file is empty (i.e. no non-empty line), only the first lines are read
+
+    Args:
+        filename (str): Path to the file
+    Raises:
+        FileNotFoundError: If the file is not found
+    Returns:
+        bool: If the file is empty
+    '''
+    logger.debug('Calling utils.is_file_empty')
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+    # Parquet & arrow files always have a schema, hence they are not considered empty
+    if get_file_format(filename) in ('parquet', 'arrow'):
+        return os.path.getsize(filename) == 0
+    with open(filename, 'r', encoding='utf-8') as f:
+        return not any(line.strip('\r\n') for line in f)
+
+
 def get_new_csv_name(filename: str) -> str:
     '''Returns a new filename ("processed") from a given filename
 
     Args:
-        filename (str): Path to the csv file (.csv)
+        filename (str): Path to the file (.csv, or parquet / arrow file whose extension is kept)
     Raises:
         FileExistsError : If the file does not exist.
     Returns:
@@ -373,25 +703,37 @@ def get_new_csv_name(filename: str) -> str:
     file_path = os.path.abspath(filename)
     dir = os.path.dirname(os.path.abspath(filename))
     file_name = '.'.join(ntpath.basename(file_path).split('.')[:-1])
+    extension = os.path.splitext(filename)[1].lower() if get_file_format(filename) in ('parquet', 'arrow') else '.csv'
     # Get timestamp
     now = datetime.now().strftime('%Y%m%d_%H%M%S')
-    default_file = os.path.join(dir, ''.join([file_name, '_', now, '.csv']))
+    default_file = os.path.join(dir, ''.join([file_name, '_', now, extension]))
     if not os.path.isfile(default_file):
         return default_file
     else:
         for i in range(2, 1000):
-            new_file = os.path.join(dir, f"{file_name}_{now}_{i}.csv")
+            new_file = os.path.join(dir, f"{file_name}_{now}_{i}{extension}")
             if not os.path.isfile(new_file):
                 return new_file
         raise FileExistsError('Can not find new file name (tried 1000 different names)')
 
 
+def get_file_format(filename: str) -> Union[str, None]:
+    '''Returns the format of a supported file, given its extension
+
+    Args:
+        filename (str): Path to the file
+    Returns:
+        (str): 'csv', 'parquet' or 'arrow', None if not supported
+    '''
+    return FILE_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
 def get_generator(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame], chunksize: int = 0,
                   first_row: str = 'header', columns: List[str] = ['docs', 'tags'], sep: str = ',', nrows: int = 0, **pandas_args):
     '''Returns a generator given the type of document to process and the chunksize
 
     Args:
-        docs (?): Arbitrary document list (Supported types : str ending by .csv, str, list, np.ndarray, pd.Series, pd.DataFrame)
+        docs (?): Arbitrary document list (Supported types : str ending by .csv, .parquet or .arrow, str, list, np.ndarray, pd.Series, pd.DataFrame)
     Kwargs:
         chunksize (int): if > 0 data is processed by chunks of chunksize size (by default : 0)
         first_row (str): When working with a pandas dataframe or csv file, specifies how the first line is handled
@@ -414,7 +756,10 @@ def get_generator(docs: Union[str, list, np.ndarray, pd.Series, pd.DataFrame], c
 
     docs_type = get_docs_type(docs)
 
-    if docs_type == 'file_path':
+    if docs_type == 'file_path' and get_file_format(docs) in ('parquet', 'arrow'):
+        gen = get_df_generator_from_columnar(docs, chunksize=chunksize, nrows=nrows)
+
+    elif docs_type == 'file_path':
         gen = get_df_generator_from_csv(docs, chunksize=chunksize, first_row=first_row,
                                         columns=columns, sep=sep, nrows=nrows, **pandas_args)
 
@@ -495,54 +840,325 @@ def get_df_generator_from_csv(filename: str, chunksize: int = 0, first_row: str
         raise ValueError('nrows must be >= 0.')
     if not os.path.isfile(filename):
         raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
-    # File length
-    file_length = get_file_length(filename, sep=sep)
-    if file_length == 0:
+    if is_file_empty(filename):
         raise ValueError(f"File {filename} os empty.")
 
-    columns_to_use = get_columns_to_use(filename, first_row=first_row, columns=columns, sep=sep, file_length=file_length)
-
-    # If there is only one row and it should be treated as the header, yields empty df
-    if file_length == 1 and first_row == 'header':
-        logger.warning('Empty dataframe.')
-        yield pd.DataFrame([], columns=columns_to_use)
-    else:
-        # Manage chunks
-        start_line = 0 if first_row == 'data' else 1
-        end_line = file_length if nrows == 0 else min(file_length, nrows + start_line)
+    columns_to_use = get_columns_to_use(filename, first_row=first_row, columns=columns, sep=sep, check_empty=False)
+
+    # The file is opened once and read by chunks with a single iterator (no count of the rows beforehand)
+    start_line = 0 if first_row == 'data' else 1
+    file_size = os.path.getsize(filename)
+    progression_index = 0
+    progression_alerts_thresholds = list(range(0, 110, 10))
+    nb_rows = 0
+    with open(filename, 'rb') as f:
+        reader_args = dict(encoding='utf-8', sep=sep, skiprows=start_line, nrows=nrows if nrows != 0 else None,
+                           names=columns_to_use, header=None, **pandas_args)
         # Loads everything in one pass
         if chunksize == 0:
-            chunks_limits = [(start_line, end_line)]
-        # Multiple pass loading (potentially only one if chunksize > end_line - start_line + 1)
+            reader = [pd.read_csv(f, **reader_args)]
+        # Multiple pass loading (potentially only one if chunksize > number of rows)
         else:
-            chunks_limits = [
-                (
-                    max(start_line, i * chunksize + start_line),
-                    min((i + 1) * chunksize + start_line, end_line),
-                )
-                for i in range(1 + ((end_line - 1 - start_line) // chunksize))
-            ]
-        # Load data by chunks
-        progression_index = 0
-        progression_alerts_thresholds = list(range(0, 110, 10))
-        for limits in chunks_limits:
-            min_l = limits[0]
-            max_l = limits[1]
-            df = pd.read_csv(filename, encoding='utf-8', sep=sep, skiprows=min_l, nrows=max_l - min_l,
-                             names=columns_to_use, header=None, **pandas_args)
-            # Set correct index
-            df.index = range(min_l - start_line, max_l - start_line, 1)
-            # Print
-            progression = max_l / end_line * 100
+            reader = pd.read_csv(f, chunksize=chunksize, **reader_args)
+        for df in reader:
+            if df.shape[0] == 0:
+                continue
+            # Set correct index (carried over the chunks)
+            df.index = range(nb_rows, nb_rows + df.shape[0], 1)
+            nb_rows += df.shape[0]
+            # Print (progression in bytes consumed, the file is read ahead by the parser hence this is an estimation)
+            progression = min(f.tell() / file_size * 100, 100) if file_size else 100
             if progression > progression_alerts_thresholds[progression_index]:
                 logger.info(f"Loading file {filename.split('/')[-1]}: {round(progression, 2)} %")
-                progression_index = [i for i, _ in enumerate(progression_alerts_thresholds) if _ <= progression][0]
+                progression_index = [i for i, _ in enumerate(progression_alerts_thresholds) if _ <= progression][-1]
             # yield
             yield df
 
+    # If there are no data rows (eg. only the header), yields empty df
+    if nb_rows == 0:
+        logger.warning('Empty dataframe.')
+        yield pd.DataFrame([], columns=columns_to_use)
+
+
+def get_df_generator_from_columnar(filename: str, chunksize: int = 0, nrows: int = 0, columns_to_load: Union[List[str], None] = None,
+                                   as_arrow: bool = False):
+    '''Returns a dataFrame generator by chunk over a parquet or arrow file
+    The file is streamed (row groups / record batches), it is never fully loaded in memory if chunksize > 0.
+    If chunksize is 0 -> A one item generator is still returned
+
+    Args:
+        filename (str): Path to the parquet or arrow file
+    Kwargs:
+        chunksize (int): If not 0 the file is loaded chunkwise and this parameter specifies the chunksize (default : 0)
+        nrows (int) : Maximum number of rows to read (default: 0 we take it all)
+        columns_to_load (list<str>): Columns to load, None -> all of them (default: None)
+        as_arrow (bool): If True, pyarrow Tables are yielded instead of dataFrames (default: False)
+    Raises:
+        ValueError: If chunksize < 0
+        ValueError: If nrows < 0
+        FileNotFoundError: If the file is not found
+        ImportError: If pyarrow is not installed
+    Returns:
+        (Dataframe): DataFrame (or pyarrow Table) Generator
+    '''
+    logger.debug('Calling utils.get_df_generator_from_columnar')
+    if chunksize < 0:
+        raise ValueError('Chunksize must be >= 0.')
+    if nrows < 0:
+        raise ValueError('nrows must be >= 0.')
+    if not os.path.isfile(filename):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
+    _check_pyarrow()
+
+    schema = get_columnar_schema(filename)
+    if columns_to_load is not None:
+        schema = pa.schema([schema.field(column) for column in columns_to_load])
+    nb_rows = 0
+    with _iter_columnar_batches(filename, columns_to_load=columns_to_load, batch_size=chunksize or COLUMNAR_BATCH_SIZE) as batches:
+        for table in _rebatch(batches, chunksize=chunksize, nrows=nrows, schema=schema):
+            if as_arrow:
+                yield table
+            else:
+                df = table.to_pandas()
+                # Set correct index (carried over the chunks)
+                df.index = range(nb_rows, nb_rows + df.shape[0], 1)
+                yield df
+            nb_rows += table.num_rows
+            logger.info(f"Loading file {os.path.basename(filename)}: {nb_rows} rows")
+
+
+def read_columnar_file(filename: str, columns_to_load: Union[List[str], None] = None, nrows: int = 0) -> pd.DataFrame:
+    '''Loads a parquet or arrow file (possibly only some columns)
+
+    Args:
+        filename (str): Path to the parquet or arrow file
+    Kwargs:
+        columns_to_load (list<str>): Columns to load, None -> all of them (default: None)
+        nrows (int) : Maximum number of rows to read (default: 0 we take it all)
+    Raises:
+        ImportError: If pyarrow is not installed
+    Returns:
+        pd.DataFrame: Loaded data
+    '''
+    return next(get_df_generator_from_columnar(filename, chunksize=0, nrows=nrows, columns_to_load=columns_to_load))
+
+
+def get_columnar_schema(filename: str) -> 'pa.Schema':
+    '''Returns the schema of a parquet or arrow file (without loading its content)
+
+    Args:
+        filename (str): Path to the parquet or arrow file
+    Raises:
+        ImportError: If pyarrow is not installed
+    Returns:
+        pa.Schema: Schema of the file
+    '''
+    _check_pyarrow()
+    if get_file_format(filename) == 'parquet':
+        return pq.read_schema(filename)
+    with pa.memory_map(filename, 'r') as source:
+        return _open_arrow_file(source).schema
+
+
+class ColumnarFileWriter():
+    '''Class ColumnarFileWriter:
+    Writes dataFrames (or pyarrow Tables) chunk by chunk to a parquet (one row group per chunk) or arrow file.
+    The schema is set by the first chunk. Can be used as a context manager.
+    '''
+
+    def __init__(self, filename: str) -> None:
+        '''Class constructor
+
+        Args:
+            filename (str): Path to the parquet or arrow file to write
+        Raises:
+            ValueError: If the file is not a parquet or arrow file
+            ImportError: If pyarrow is not installed
+        '''
+        _check_pyarrow()
+        self.file_format = get_file_format(filename)
+        if self.file_format not in ('parquet', 'arrow'):
+            raise ValueError(f"{filename} is not a parquet or arrow file")
+        self.filename = filename
+        self.schema = None
+        self._writer = None
+        self._sink = None
+
+    def write(self, data: Union[pd.DataFrame, 'pa.Table']) -> None:
+        '''Writes a chunk
+
+        Args:
+            data (pd.DataFrame | pa.Table): Chunk to write
+        '''
+        table = data if isinstance(data, pa.Table) else to_arrow_table(data)
+        if self._writer is None:
+            # Columns with only null values in the first chunk are written as strings
+            self.schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field for field in table.schema])
+            if self.file_format == 'parquet':
+                self._writer = pq.ParquetWriter(self.filename, self.schema)
+            else:
+                self._sink = pa.OSFile(self.filename, 'wb')
+                self._writer = pa.ipc.new_file(self._sink, self.schema)
+        self._writer.write_table(table.cast(self.schema))
+
+    def close(self) -> None:
+        '''Closes the file'''
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def to_arrow_table(df: pd.DataFrame) -> 'pa.Table':
+    '''Converts a dataFrame to a pyarrow Table (the index is dropped)
+    Object columns mixing strings and other values (eg. outputs of a pipeline) are converted to strings (nulls are kept).
+
+    Args:
+        df (pd.DataFrame): DataFrame to convert
+    Returns:
+        pa.Table: Converted data
+    '''
+    _check_pyarrow()
+    arrays = [to_arrow_array(df[column]) for column in df.columns]
+    return pa.Table.from_arrays(arrays, names=[str(column) for column in df.columns])
+
+
+def to_arrow_array(series: pd.Series) -> 'pa.Array':
+    '''Converts a pd.Series to a pyarrow Array
+    If the values can't be converted as is (eg. strings mixed with numbers), they are converted to strings (nulls are kept).
+
+    Args:
+        series (pd.Series): Series to convert
+    Returns:
+        pa.Array: Converted data
+    '''
+    _check_pyarrow()
+    try:
+        return pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(series.map(lambda x: x if isinstance(x, str) or pd.isna(x) else str(x)), type=pa.string(), from_pandas=True)
+
+
+def set_arrow_column(table: 'pa.Table', column: str, series: pd.Series) -> 'pa.Table':
+    '''Sets (or appends if it does not exist) a column of a pyarrow Table
+
+    Args:
+        table (pa.Table): Table to modify
+        column (str): Name of the column
+        series (pd.Series): New values
+    Returns:
+        pa.Table: Modified table
+    '''
+    array = to_arrow_array(series)
+    if column in table.column_names:
+        return table.set_column(table.column_names.index(column), column, array)
+    return table.append_column(column, array)
+
+
+def _check_pyarrow() -> None:
+    '''Checks that pyarrow is installed
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    '''
+    if not PYARROW_AVAILABLE:
+        logger.error("pyarrow has not been found, parquet & arrow files are not supported.")
+        logger.error("To use them, you must install pyarrow. For instance: pip install words-n-fun[arrow]")
+        raise ImportError("pyarrow has not been found, parquet & arrow files are not supported.")
+
+
+def _open_arrow_file(source):
+    '''Opens an arrow IPC file, either in the file (random access) or the stream format
+
+    Args:
+        source (pa.NativeFile): Opened file
+    Returns:
+        Reader (iterable over the record batches, with a schema attribute)
+    '''
+    try:
+        reader = pa.ipc.open_file(source)
+        return _ArrowFileReader(reader)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source)
+
+
+class _ArrowFileReader():
+    '''Iterable over the record batches of an arrow file (random access format), loaded one at a time'''
+
+    def __init__(self, reader) -> None:
+        self.reader = reader
+        self.schema = reader.schema
+
+    def __iter__(self):
+        for i in range(self.reader.num_record_batches):
+            yield self.reader.get_batch(i)
+
+
+@contextmanager
+def _iter_columnar_batches(filename: str, columns_to_load: Union[List[str], None] = None, batch_size: int = COLUMNAR_BATCH_SIZE):
+    '''Context manager returning an iterator over the record batches of a parquet or arrow file
+
+    Args:
+        filename (str): Path to the parquet or arrow file
+    Kwargs:
+        columns_to_load (list<str>): Columns to load, None -> all of them (default: None)
+        batch_size (int): Maximum number of rows per batch when reading a parquet file (default: COLUMNAR_BATCH_SIZE)
+    Returns:
+        (generator): pa.RecordBatch generator
+    '''
+    if get_file_format(filename) == 'parquet':
+        with pq.ParquetFile(filename) as parquet_file:
+            yield parquet_file.iter_batches(batch_size=batch_size, columns=columns_to_load)
+    else:
+        with pa.memory_map(filename, 'r') as source:
+            reader = _open_arrow_file(source)
+            if columns_to_load is None:
+                yield iter(reader)
+            else:
+                yield (batch.select(columns_to_load) for batch in reader)
+
+
+def _rebatch(batches, chunksize: int = 0, nrows: int = 0, schema: Union['pa.Schema', None] = None):
+    '''Groups / splits record batches into tables of exactly chunksize rows (except the last one)
+
+    Args:
+        batches (iterable): pa.RecordBatch iterable
+    Kwargs:
+        chunksize (int): Number of rows per table, 0 -> a single table (default: 0)
+        nrows (int): Maximum number of rows, 0 -> no limit (default: 0)
+        schema (pa.Schema): Schema of the batches, used to build an empty table if there is no batch (default: None)
+    Returns:
+        (generator): pa.Table generator
+    '''
+    pending, nb_pending, nb_rows = [], 0, 0
+    for batch in batches:
+        if nrows and nb_rows + batch.num_rows > nrows:
+            batch = batch.slice(0, nrows - nb_rows)
+        nb_rows += batch.num_rows
+        pending.append(batch)
+        nb_pending += batch.num_rows
+        while chunksize and nb_pending >= chunksize:
+            table = pa.Table.from_batches(pending, schema=batch.schema)
+            yield table.slice(0, chunksize)
+            pending = table.slice(chunksize).to_batches()
+            nb_pending -= chunksize
+        if nrows and nb_rows >= nrows:
+            break
+    if nb_pending or (chunksize == 0) or nb_rows == 0:
+        yield pa.Table.from_batches(pending, schema=schema) if schema is not None else pa.Table.from_batches(pending)
+
 
 def get_columns_to_use(filename: str, first_row: str = 'header', columns: List[str] = ['docs', 'tags'],
-                       sep: str = ',', file_length: Union[int, None] = None) -> List[str]:
+                       sep: str = ',', file_length: Union[int, None] = None, check_empty: bool = True) -> List[str]:
     '''Returns the names of the columns to use while loading a csv file
 
     Args:
@@ -554,7 +1170,8 @@ def get_columns_to_use(filename: str, first_row: str = 'header', columns: List[s
             if first_row != 'header'. Truncate the data if there is too much columns & add some if they are missing
             (default : ['docs', 'tags'])
         sep (str): When working with a pandas dataframe or csv file, specifies the csv separator (default: ',')
-        file_length (int): Number of lines in the file (can speed up calculations by avoiding a call to get_file_length)
+        file_length (int): Number of lines in the file (deprecated, only used to check if the file is empty)
+        check_empty (bool): If the file must be checked for emptiness (default: True)
     Raises:
         ValueError: If 'first_row' is not in  ['header', 'data', 'skip']
         ValueError: If nrows < 0
@@ -570,10 +1187,12 @@ def get_columns_to_use(filename: str, first_row: str = 'header', columns: List[s
     if not os.path.isfile(filename):
         raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filename)
 
-    # Get file length if not passed to this function
-    if file_length is None:
-        file_length = get_file_length(filename, sep=sep)
-    if file_length == 0:
+    # Parquet & arrow files: columns from the schema
+    if get_file_format(filename) in ('parquet', 'arrow'):
+        return get_columnar_schema(filename).names
+
+    # Check if the file is empty (without counting its rows)
+    if file_length == 0 or (file_length is None and check_empty and is_file_empty(filename)):
         raise ValueError(f"File {filename} is empty.")
 
     # Open file to get first line
@@ -624,7 +1243,7 @@ def get_column_to_be_processed(docs: Union[str, list, np.ndarray, pd.Series, pd.
     '''Returns the name of the column to process given the type of the "docs" element
 
     Args:
-        docs (?): Arbitrary document list (Supported types : str ending by .csv, str, list, np.ndarray, pd.Series, pd.DataFrame)
+        docs (?): Arbitrary document list (Supported types : str ending by .csv, .parquet or .arrow, str, list, np.ndarray, pd.Series, pd.DataFrame)
     Kwargs:
         prefered_column (str): Default column name to consider as the document container when working
             with a pandas dataframe or csv file (default: 'docs')
@@ -691,39 +1310,40 @@ def regroup_data_series(function: Callable, min_nb_data:int = 1000, prefix_text:
         logger.debug('Calling utils.regroup_data_series')
 
         init_len = len(docs)
-        # If there is not enough data, the wrapper is discarded and the function returned as is
-        if init_len < min_nb_data:
+        # If there is not enough data, or if the data has already been regrouped by the caller,
+        # the wrapper is discarded and the function returned as is
+        if init_len < min_nb_data or init_len == 0 or _REGROUP_DISABLED.get():
             return function(docs, *args, **kwargs)
-        
+
+        # Regroup same values together: codes[i] is the position of docs.iloc[i] within unique_docs
+        # Null values are kept (None & NaN are distinct values), hence processed as in the non regrouped case
+        codes, unique_docs = factorize_series(docs)
         # If there is not enough duplicates in the data, the wrapper is discarded as well
-        unique_docs = docs.unique()
-        if  ( len(unique_docs) / init_len ) > max_percent_unique:
+        if (len(unique_docs) / init_len) > max_percent_unique:
             return function(docs, *args, **kwargs)
-        
-        init_name = docs.name
-        init_index = docs.index
-        # Put docs into a dataframe
-        df = pd.DataFrame(docs)
-        df.columns = ["input_data"]
-        # Regroup same values together
-        input_data = pd.Series(unique_docs).dropna()
-        logger.debug(f"{prefix_text} Reduced data to be processed by {100 * (df.shape[0] - len(input_data)) / df.shape[0]} % (grouped duplicated rows)")
+        logger.debug(f"{prefix_text} Reduced data to be processed by {100 * (init_len - len(unique_docs)) / init_len} % (grouped duplicated rows)")
         # Get output
-        output_data = function(input_data, *args, **kwargs)
+        output_data = function(unique_docs, *args, **kwargs)
         # Assert lengths
-        assert len(input_data) == len(output_data), f"regroup_data_series: Input data ({len(input_data)}) and Output data ({len(output_data)}) are not of equal length."
-        # Prepare result
-        docs_processed = pd.DataFrame({'input_data': input_data, 'output_data': output_data})
-        # Merge with original dataset (use reset_index & set_index to keep original order)
-        df = df.reset_index().merge(docs_processed, how='left', on='input_data').set_index('index')
-        result = df["output_data"]
-        # Check length & return
-        assert init_len == len(result), f"regroup_data_series: Input data ({init_len}) and Output data ({len(result)}) are not of equal length."
-        return result.rename(init_name).reindex(init_index)
+        assert len(unique_docs) == len(output_data), f"regroup_data_series: Input data ({len(unique_docs)}) and Output data ({len(output_data)}) are not of equal length."
+        # Scatter the results back to the original rows
+        return expand_series(output_data, codes, index=docs.index, name=docs.name)
 
     return wrapper
 
 
+@contextmanager
+def regroup_disabled():
+    '''Context manager disabling the regroup_data_series wrappers
+    To be used when the data has already been regrouped by the caller (eg. by the pipeline runner)
+    '''
+    token = _REGROUP_DISABLED.set(True)
+    try:
+        yield
+    finally:
+        _REGROUP_DISABLED.reset(token)
+
+
 def regroup_data_df(function: Callable, columns_to_be_processed: Union[list, None] = None,
                     min_nb_data: int = 1000, prefix_text: Union[str, None] = None) -> Callable:
     '''Wrapper to regroup identical data from a dataframe before processing
@@ -812,6 +1432,107 @@ def regroup_data_df(function: Callable, columns_to_be_processed: Union[list, Non
     return wrapper
 
 
+def factorize_series(docs: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    '''Returns the unique values of a pd.Series along with the inverse index
+    Unlike pd.factorize, null values are kept as unique values (None and NaN are kept apart) such that
+    the processing of the unique values gives the same results as the processing of the whole pd.Series
+
+    Args:
+        docs (pd.Series): Documents to regroup
+    Returns:
+        np.ndarray: Inverse index, docs == uniques[codes]
+        pd.Series: Unique values (object dtype - or the Arrow-backed string dtype of docs -, RangeIndex)
+    '''
+    # Arrow-backed strings only have one null value (pd.NA), the dtype is kept
+    if is_arrow_string(docs):
+        # (use_na_sentinel only exists from pandas 1.5: the null value is added after the factorization)
+        codes, uniques = pd.factorize(docs.array)
+        na_mask = codes == -1
+        if na_mask.any():
+            codes[na_mask] = len(uniques)
+            uniques = pd.array(list(uniques) + [pd.NA], dtype=docs.dtype)
+        return codes, pd.Series(uniques)
+    values = np.asarray(docs, dtype=object)
+    codes, uniques = pd.factorize(values)
+    uniques = list(uniques)
+    na_mask = codes == -1
+    if na_mask.any():
+        # None and the other null values (NaN, ...) get their own unique value
+        na_values = values[na_mask]
+        is_none = np.equal(na_values, None)
+        na_codes = np.empty(len(na_values), dtype=codes.dtype)
+        if is_none.any():
+            na_codes[is_none] = len(uniques)
+            uniques.append(None)
+        if not is_none.all():
+            na_codes[~is_none] = len(uniques)
+            uniques.append(na_values[~is_none][0])
+        codes[na_mask] = na_codes
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def expand_series(uniques: pd.Series, codes: np.ndarray, index: Union[pd.Index, None] = None, name=None) -> pd.Series:
+    '''Scatters back processed unique values using an inverse index (cf. factorize_series)
+
+    Args:
+        uniques (pd.Series): Processed unique values
+        codes (np.ndarray): Inverse index
+    Kwargs:
+        index (pd.Index): Index of the result
+        name (?): Name of the result
+    Returns:
+        pd.Series: Expanded pd.Series
+    '''
+    values = pd.Series(uniques).array.take(codes)
+    return pd.Series(values, index=index, name=name)
+
+
+def is_arrow_string(docs: pd.Series) -> bool:
+    '''Checks if a pd.Series holds Arrow-backed strings (string[pyarrow] or pd.ArrowDtype(pa.string()))
+
+    Args:
+        docs (pd.Series): Documents
+    Returns:
+        bool: True if the documents are Arrow-backed strings
+    '''
+    dtype = getattr(docs, 'dtype', None)
+    if isinstance(dtype, pd.StringDtype):
+        return dtype.storage == 'pyarrow'
+    arrow_dtype = getattr(pd, 'ArrowDtype', None)
+    if arrow_dtype is not None and isinstance(dtype, arrow_dtype):
+        return pa.types.is_string(dtype.pyarrow_dtype) or pa.types.is_large_string(dtype.pyarrow_dtype)
+    return False
+
+
+def as_string_dtype(docs: pd.Series, string_dtype: str) -> pd.Series:
+    '''Converts a pd.Series to the object dtype or to an Arrow-backed string dtype
+
+    With 'pyarrow', non string values become null values (as with the pandas .str accessor).
+    With 'object', null values of Arrow-backed strings become None.
+
+    Args:
+        docs (pd.Series): Documents to convert
+        string_dtype (str): 'pyarrow' (string[pyarrow]) or 'object'
+    Raises:
+        ValueError: If string_dtype is not 'pyarrow' or 'object'
+        ImportError: If string_dtype is 'pyarrow' and pyarrow is not installed
+    Returns:
+        pd.Series: Converted documents
+    '''
+    if string_dtype not in ('pyarrow', 'object'):
+        raise ValueError("string_dtype must either be 'pyarrow' or 'object'")
+    if string_dtype == 'pyarrow':
+        if is_arrow_string(docs):
+            return docs
+        _check_pyarrow()
+        is_str = np.array([isinstance(doc, str) for doc in docs], dtype=bool)
+        values = docs if is_str.all() else docs.where(is_str, None)
+        return values.astype(pd.StringDtype('pyarrow'))
+    if not is_arrow_string(docs):
+        return docs
+    return pd.Series(docs.to_numpy(dtype=object, na_value=None), index=docs.index, name=docs.name, dtype=object)
+
+
 def get_regex_match_words(words: List[str], case_insensitive: bool = False,
                           accepted_char_ahead: str = '.?!,;:()"\'/<>=[]{}~*',
                           accepted_char_behind: str = '.?!,;:()"\'/<>=[]{}~*',